@@ -10,6 +10,15 @@ import multiprocessing
 import boto3
 import json
 import time
+import sys
+
+# Shared helpers live in the main project (source/...)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from source.utils.image_hash import DedupEngine, dhash_batch, hamming_many
+from source.utils.hash_index import PerceptualHashIndex, snap_channel_key
+from source.services.datalake_records import DataLakeRecordBatcher
+from source.services.aws_clients import get_aws_provider
+from source.services.upload_scheduler import UploadScheduler, PRIORITY_LAKE
 
 # ==============================================================================
 # AWS CONFIGURATION
@@ -29,55 +38,56 @@ def load_config(config_path="config.txt"):
     config.read(config_path)
     return config
 
-def crop_center_square(image):
-    """Crop the image to a square (1:1 aspect ratio) from the center."""
-    h, w, _ = image.shape
-    min_dim = min(h, w)
-    
-    start_x = (w - min_dim) // 2
-    start_y = (h - min_dim) // 2
-    
-    return image[start_y:start_y+min_dim, start_x:start_x+min_dim]
-
-def is_corrupted(image, threshold=0.05):
-    """
-    Check if the image is corrupted (glitched).
-    Heuristic: Check for large blocks of pure white or Magenta.
-    """
-    # 1. Check for White Blocks (common bug)
-    white_mask = np.all(image > 225, axis=-1)
-    white_ratio = np.sum(white_mask) / white_mask.size
-    if white_ratio > threshold: return True
-        
-    # 2. Check for Magenta/Pink artifacts
-    pink_mask = (image[:,:,2] > 200) & (image[:,:,0] > 200) & (image[:,:,1] < 100)
-    pink_ratio = np.sum(pink_mask) / pink_mask.size
-    if pink_ratio > threshold: return True
-
-    # 3. Check for Green artifacts
-    green_mask = (image[:,:,1] > 200) & (image[:,:,2] < 100) & (image[:,:,0] < 100)
-    green_ratio = np.sum(green_mask) / green_mask.size
-    if green_ratio > threshold: return True
-        
-    return False
-
 def calculate_dhash(image, hash_size=8):
     """Calculate the difference hash (dHash) of an image."""
     if image is None: return 0
     resized = cv2.resize(image, (hash_size + 1, hash_size))
     gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
-    diff = gray[:, 1:] > gray[:, :-1]
-    return sum([2**i for (i, v) in enumerate(diff.flatten()) if v])
+    return int(dhash_batch(gray[np.newaxis])[0])
 
 def hamming_distance(hash1, hash2):
-    return bin(int(hash1) ^ int(hash2)).count('1')
+    return int(hamming_many(hash1, np.array([hash2], dtype=np.uint64))[0])
+
+# upload_to_datalake() outcomes
+UPLOAD_OK = "UPLOADED"
+UPLOAD_HELD = "HELD"     # Held back by the upload scheduler
+UPLOAD_FAILED = "FAILED"
+
+# One scheduler / record batcher per worker process (reused by every task it runs)
+_scheduler = None
+_record_batcher = None
+
+def get_s3():
+    """Process-wide cached S3 client (see AwsClientProvider)."""
+    return get_aws_provider().client('s3')
+
+def get_scheduler(share=1):
+    """
+    Bandwidth gate for this worker process. `share` = number of worker processes
+    uploading at once; each gets 1/share of the configured cap.
+    """
+    global _scheduler
+    if _scheduler is None:
+        config = load_config() or configparser.ConfigParser()
+        _scheduler = UploadScheduler.from_config(config, share=share)
+    return _scheduler
+
+def get_record_batcher():
+    global _record_batcher
+    if _record_batcher is None:
+        config = load_config() or configparser.ConfigParser()
+        _record_batcher = DataLakeRecordBatcher.from_config(config, get_s3(), S3_BUCKET, GLUE_TABLE,
+                                                            scheduler=get_scheduler())
+    return _record_batcher
 
 def upload_to_datalake(local_path, filename, factory="MDC", process="A"):
     """
-    Uploads Image and JSON Metadata to S3 Data Lake.
+    Uploads Image to the S3 Data Lake and queues its JSON metadata record
+    (records are written in batches, see DataLakeRecordBatcher).
+    Returns UPLOAD_OK, UPLOAD_HELD or UPLOAD_FAILED.
     """
     try:
-        s3 = boto3.client('s3', region_name=AWS_REGION)
+        s3 = get_s3()
         
         # 1. Parse Metadata from Filename
         # Expected Format: truck_{plate}_{timestamp}.jpg OR just {timestamp}.jpg
@@ -110,9 +120,12 @@ def upload_to_datalake(local_path, filename, factory="MDC", process="A"):
         s3_key_image = f"images/{factory}/{date_folder}/{filename}"
         s3_path_full = f"s3://{S3_BUCKET}/{s3_key_image}"
         
+        # Same bandwidth cap as the data-lake records (lowest class, not paused in peak hours)
+        if not get_scheduler().acquire(PRIORITY_LAKE, os.path.getsize(local_path)):
+            return UPLOAD_HELD
         s3.upload_file(local_path, S3_BUCKET, s3_key_image)
 
-        # 3. Upload JSON Log (Glue Schema)
+        # 3. Queue JSON Log (Glue Schema)
         log_record = {
             "factory": factory,
             "process": process,
@@ -123,30 +136,28 @@ def upload_to_datalake(local_path, filename, factory="MDC", process="A"):
             "image_s3_path": s3_path_full,
             "agent_id": "M4-PRO-MAX-PRODUCTION"
         }
-        
-        json_filename = f"log_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
-        s3_key_json = f"tables/{GLUE_TABLE}/{json_filename}"
-        
-        # Avoid writing local JSON file to disk to speed up IO
-        s3.put_object(
-            Bucket=S3_BUCKET,
-            Key=s3_key_json,
-            Body=json.dumps(log_record),
-            ContentType='application/json'
-        )
-        
-        return True
+        get_record_batcher().add(log_record)
+        return UPLOAD_OK
     except Exception as e:
         # Log error but don't stop processing
         print(f"[ERROR] AWS Upload Failed for {filename}: {e}")
-        return False
+        return UPLOAD_FAILED
 
 def process_channel_task(args):
     """Wrapper function to unpack arguments for parallel processing."""
     return process_channel(*args)
 
-def process_channel(source_base, target_base, channel_folder, date_folder, threshold=12):
-    """Process images in a specific channel and date folder using dHash."""
+def process_channel(source_base, target_base, channel_folder, date_folder, factory="MDC",
+                    threshold=12, window=1, method="dhash", index_path=None, lake_radius=4, upload_share=1):
+    """
+    Process images in a specific channel and date folder.
+    Whole folder is hashed as a batch (threaded reduced decode, NumPy hashes),
+    then near-duplicates of the last `window` kept images are dropped.
+    With `index_path`, kept images within `lake_radius` of anything already
+    uploaded for this channel (any earlier day) are skipped as well.
+    upload_share: number of worker processes sharing the upload bandwidth cap.
+    """
+    get_scheduler(upload_share)
     source_dir = os.path.join(source_base, channel_folder, date_folder)
     target_dir = os.path.join(target_base, channel_folder, date_folder)
     
@@ -161,53 +172,48 @@ def process_channel(source_base, target_base, channel_folder, date_folder, thres
     # Create target directory for local backup
     os.makedirs(target_dir, exist_ok=True)
 
-    # Helper to calculate hash for a given image path
-    def get_hash(img_path):
-        img = cv2.imread(img_path, cv2.IMREAD_REDUCED_COLOR_2)
-        if img is None: return None, True
-        if is_corrupted(img): return None, True
-        cropped = crop_center_square(img)
-        return calculate_dhash(cropped), False
+    # Hash + select (this task already runs in its own process: keep the decode pool small)
+    engine = DedupEngine(threshold=threshold, window=window, method=method, workers=2)
+    kept_paths, kept_hashes = engine.filter([os.path.join(source_dir, f) for f in files])
 
-    last_kept_hash = None
-    count = 0
-    
-    # Process Loop
-    for i, filename in enumerate(files):
-        current_img_path = os.path.join(source_dir, filename)
-        
-        current_hash, corrupted = get_hash(current_img_path)
-        
-        if corrupted or current_hash is None:
+    index = None
+    index_key = snap_channel_key(os.path.join(source_dir, files[0]), method) # Same key as the uploader
+    if index_path:
+        index = PerceptualHashIndex(index_path)
+
+    # Extract Process ID from channel name (e.g., ch1 -> A?)
+    process_id = channel_folder.replace("ch", "")
+    uploaded, held, failed = 0, 0, 0
+    new_hashes = []
+    for current_img_path, h in zip(kept_paths, kept_hashes):
+        filename = os.path.basename(current_img_path)
+
+        # 0. Already in the data lake (e.g. station idle across days)
+        if index and index.contains_near(index_key, h, lake_radius):
             continue
+
+        # 1. Local Backup
+        target_path = os.path.join(target_dir, filename)
+        shutil.copy2(current_img_path, target_path)
         
-        # Decide whether to keep
-        keep = False
-        if last_kept_hash is None:
-            keep = True # Always keep first valid
+        # 2. Cloud Upload (The Optimization!)
+        result = upload_to_datalake(target_path, filename, factory=factory, process=process_id)
+        if result == UPLOAD_OK:
+            new_hashes.append((int(h), filename))
+            uploaded += 1
+        elif result == UPLOAD_HELD:
+            held += 1
         else:
-            distance = hamming_distance(last_kept_hash, current_hash)
-            if distance > threshold:
-                keep = True
-        
-        if keep:
-            # 1. Local Backup
-            target_path = os.path.join(target_dir, filename)
-            shutil.copy2(current_img_path, target_path)
-            
-            # 2. Cloud Upload (The Optimization!)
-            # Extract Process ID from channel name (e.g., ch1 -> A?)
-            process_id = channel_folder.replace("ch", "") 
-            upload_to_datalake(target_path, filename, factory=factory, process=process_id)
-            
-            last_kept_hash = current_hash
-            count += 1
-        
-        # Optional: Print progress sparingly
-        if i % 1000 == 0 and i > 0:
-             print(f"[PROGRESS] {channel_folder}/{date_folder} - {i}/{len(files)}...", flush=True)
+            failed += 1
+
+    if index:
+        index.add_many(index_key, new_hashes)
+
+    # Write this folder's records now (worker processes may be reused or torn down)
+    get_record_batcher().flush()
             
-    return f"{channel_folder}/{date_folder}: Processed {len(files)} imgs, Kept & Uploaded {count}."
+    return (f"{channel_folder}/{date_folder}: Processed {len(files)} imgs, Kept {len(kept_paths)}, "
+            f"Uploaded {uploaded}, Held back {held}, Failed {failed}.")
 
 def check_hardware():
     print("="*40)
@@ -232,8 +238,18 @@ def main():
     check_hardware()
     config = load_config()
     factory = "MDC"
+    threshold, window, method = 12, 1, "dhash"
+    index_path, lake_radius = "hash_index.db", 4
     if config:
         factory = config['DEFAULT'].get('factory', 'MDC')
+        threshold = config.getint('FILTER', 'dedup_threshold', fallback=threshold)
+        window = config.getint('FILTER', 'dedup_window', fallback=window)
+        method = config.get('FILTER', 'dedup_method', fallback=method)
+        if not config.getboolean('DEDUP', 'enabled', fallback=True):
+            index_path = None
+        else:
+            index_path = config.get('DEDUP', 'index_path', fallback=index_path)
+            lake_radius = config.getint('DEDUP', 'lake_radius', fallback=lake_radius)
         
     source_base = os.path.join("ai_snap", "image", f"snap_image_{factory}")
     target_base = os.path.join("ai_snap", "image", f"ok_image_{factory}")
@@ -252,6 +268,7 @@ def main():
              return
 
     # Task Collection
+    max_workers = multiprocessing.cpu_count()
     tasks = []
     print("Scanning directories...")
     try:
@@ -262,7 +279,8 @@ def main():
                 if os.path.isdir(ch_path) and ch_name.startswith("ch"):
                     date_folders = sorted(os.listdir(ch_path))
                     for date_folder in date_folders:
-                         tasks.append((source_base, target_base, ch_name, date_folder))
+                         tasks.append((source_base, target_base, ch_name, date_folder,
+                                       factory, threshold, window, method, index_path, lake_radius, max_workers))
     except Exception as e:
         print(f"Error accessing source base: {e}")
         return
@@ -271,7 +289,6 @@ def main():
         print("No image folders found to process.")
         return
 
-    max_workers = multiprocessing.cpu_count()
     print(f"Starting processing for {len(tasks)} folders...")
 
     # Parallel Execution
@@ -2,9 +2,15 @@ import cv2
 import configparser
 import os
 import time
+import sys
+import threading
 import numpy as np
 from datetime import datetime
 
+# Shared helpers live in the main project (source/...)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from source.utils.image_quality import is_corrupted
+
 def load_config(config_path="config.txt"):
     # Try current directory first
     if not os.path.exists(config_path):
@@ -28,101 +34,196 @@ def get_nvr_config(config):
         print(f"Error: Missing NVR config key: {e}")
         return None, None, None
 
-def capture_and_create_grid(nvr_ip, nvr_user, nvr_pass, factory):
-    # Grid Settings
-    total_channels = 16
-    grid_cols = 4
-    target_width = 1920
-    target_height = 1080
-    
-    # Calculate cell size
-    cell_w = target_width // grid_cols
-    cell_h = target_height // grid_cols # 4 rows
-    
-    collected_frames = []
-
-    print("\n" + "="*50)
-    print(f"Starting Capture Cycle at {datetime.now().strftime('%H:%M:%S')}...")
-
-    for i in range(1, total_channels + 1):
-        # Construct RTSP URL
-        channel_id = f"{i}01"
-        rtsp_url = f"rtsp://{nvr_user}:{nvr_pass}@{nvr_ip}:554/Streaming/Channels/{channel_id}"
-        
-        print(f"[{i}/{total_channels}] Connecting...", end="", flush=True)
-        
-        cap = cv2.VideoCapture(rtsp_url)
-        
-        # Skip initial frames to wait for Keyframe/stable image
-        # Reading ~12 frames
-        for _ in range(12):
-            if cap.isOpened():
-                cap.read()
-        
-        frame_to_store = None
-        capture_time_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        if cap.isOpened():
+class ChannelGrabber(threading.Thread):
+    """
+    Persistent connection to one NVR channel.
+    The thread keeps grabbing (no decode) so the stream stays current, and only
+    decodes when a snapshot is requested. After (re)connecting it waits for the
+    first cleanly decoded frame (keyframe) instead of a fixed number of reads.
+    """
+    def __init__(self, channel, rtsp_url, factory, open_timeout_ms=5000, keyframe_timeout=5.0,
+                 save_interval=20.0):
+        super().__init__(name=f"Grabber-ch{channel}", daemon=True)
+        self.channel = channel
+        self.rtsp_url = rtsp_url
+        self.factory = factory
+        self.open_timeout_ms = open_timeout_ms
+        self.keyframe_timeout = keyframe_timeout
+        self.save_interval = save_interval
+        self.running = True
+        self.cap = None
+        self.status = "CONNECTING"
+
+        self._request = threading.Event()
+        self._lock = threading.Lock()
+        self._frame = None
+        self._frame_time = None
+        self._seq = 0
+        self._last_save = 0.0
+
+    def request_snapshot(self):
+        self._request.set()
+
+    def latest(self):
+        """(frame, capture datetime, sequence number) of the last decoded snapshot."""
+        with self._lock:
+            return self._frame, self._frame_time, self._seq
+
+    def _connect(self):
+        params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, self.open_timeout_ms,
+                  cv2.CAP_PROP_READ_TIMEOUT_MSEC, self.open_timeout_ms]
+        cap = cv2.VideoCapture(self.rtsp_url, cv2.CAP_FFMPEG, params)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        # Keyframe wait: read until a frame decodes cleanly (bounded by a timeout)
+        deadline = time.time() + self.keyframe_timeout
+        while time.time() < deadline:
             ret, frame = cap.read()
-            if ret:
-                # Save Image
-                try:
-                    # image/snap_image_{factory}/ch{i}/{date_folder}
-                    # date_folder = 04_01_2026
-                    date_folder = datetime.now().strftime('%d_%m_%Y')
-                    save_dir = os.path.join("image", f"snap_image_{factory}", f"ch{i}", date_folder)
-                    os.makedirs(save_dir, exist_ok=True)
-                    
-                    # {factory}_{channel}_{datetime}.jpg
-                    filename = f"{factory}_{i}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-                    cv2.imwrite(os.path.join(save_dir, filename), frame)
-                except Exception as e:
-                    print(f" Save Error: {e}")
-
-                # Resize for Grid
-                frame_to_store = cv2.resize(frame, (cell_w, cell_h))
-                print(f" SUCCESS.")
-            else:
-                print(" FAILED (No Frame).")
-        else:
-            print(f" FAILED (Connection). URL: {rtsp_url}")
-            
+            if ret and not is_corrupted(frame):
+                self._store(frame)
+                return cap
         cap.release()
-        
-        # If failure, use black image
-        if frame_to_store is None:
-            frame_to_store = np.zeros((cell_h, cell_w, 3), dtype=np.uint8)
-            cv2.putText(frame_to_store, f"CH {i} OFF", (10, cell_h // 2), 
+        return None
+
+    def run(self):
+        backoff = 1.0
+        while self.running:
+            if self.cap is None:
+                self.status = "CONNECTING"
+                self.cap = self._connect()
+                if self.cap is None:
+                    self.status = "OFF"
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, 30.0)
+                    continue
+                self.status = "LIVE"
+                backoff = 1.0
+
+            if not self.cap.grab():
+                self.status = "RECONNECTING"
+                self.cap.release()
+                self.cap = None
+                continue
+
+            if self._request.is_set():
+                self._request.clear()
+                ret, frame = self.cap.retrieve()
+                if ret and not is_corrupted(frame):
+                    self._store(frame)
+
+        if self.cap is not None:
+            self.cap.release()
+
+    def _store(self, frame):
+        now = datetime.now()
+        with self._lock:
+            self._frame = frame
+            self._frame_time = now
+            self._seq += 1
+        if time.time() - self._last_save >= self.save_interval:
+            self._last_save = time.time()
+            self._save(frame, now)
+
+    def _save(self, frame, now):
+        try:
+            # image/snap_image_{factory}/ch{i}/{date_folder}
+            # date_folder = 04_01_2026
+            date_folder = now.strftime('%d_%m_%Y')
+            save_dir = os.path.join("image", f"snap_image_{self.factory}", f"ch{self.channel}", date_folder)
+            os.makedirs(save_dir, exist_ok=True)
+
+            # {factory}_{channel}_{datetime}.jpg
+            filename = f"{self.factory}_{self.channel}_{now.strftime('%Y%m%d_%H%M%S')}.jpg"
+            cv2.imwrite(os.path.join(save_dir, filename), frame)
+        except Exception as e:
+            print(f"[ch{self.channel}] Save Error: {e}")
+
+    def stop(self):
+        self.running = False
+
+
+class SnapshotGrid:
+    """
+    Concurrent 4x4 NVR grid: one persistent grabber per channel, snapshots
+    requested from all channels at once, and the grid assembled from whatever
+    arrived by the deadline (older frames are kept and marked stale).
+    """
+    def __init__(self, nvr_ip, nvr_user, nvr_pass, factory, total_channels=16, grid_cols=4,
+                 target_width=1920, target_height=1080, open_timeout_ms=5000, save_interval=20.0):
+        self.total_channels = total_channels
+        self.grid_cols = grid_cols
+        grid_rows = (total_channels + grid_cols - 1) // grid_cols
+        self.cell_w = target_width // grid_cols
+        self.cell_h = target_height // grid_rows
+        self.canvas = np.zeros((self.cell_h * grid_rows, self.cell_w * grid_cols, 3), dtype=np.uint8)
+        self.grabbers = []
+        for i in range(1, total_channels + 1):
+            channel_id = f"{i}01"
+            rtsp_url = f"rtsp://{nvr_user}:{nvr_pass}@{nvr_ip}:554/Streaming/Channels/{channel_id}"
+            self.grabbers.append(ChannelGrabber(i, rtsp_url, factory, open_timeout_ms=open_timeout_ms,
+                                                save_interval=save_interval))
+        self._drawn_seq = [-1] * total_channels
+
+    def start(self):
+        for g in self.grabbers:
+            g.start()
+
+    def stop(self):
+        for g in self.grabbers:
+            g.stop()
+        for g in self.grabbers:
+            g.join(timeout=2.0)
+
+    def capture(self, deadline_seconds=3.0):
+        """Request a snapshot from every channel and return the grid at the deadline."""
+        before = [g.latest()[2] for g in self.grabbers]
+        for g in self.grabbers:
+            g.request_snapshot()
+
+        deadline = time.time() + deadline_seconds
+        while time.time() < deadline:
+            if all(g.latest()[2] != seq for g, seq in zip(self.grabbers, before)): break
+            time.sleep(0.05)
+
+        fresh = 0
+        for idx, g in enumerate(self.grabbers):
+            frame, frame_time, seq = g.latest()
+            is_fresh = seq != before[idx]
+            fresh += is_fresh
+            self._draw_cell(idx, g, frame, frame_time, seq, stale=not is_fresh)
+
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Grid: {fresh}/{self.total_channels} channels refreshed")
+        return self.canvas
+
+    def _draw_cell(self, idx, grabber, frame, frame_time, seq, stale):
+        r, c = divmod(idx, self.grid_cols)
+        cell = self.canvas[r * self.cell_h:(r + 1) * self.cell_h, c * self.cell_w:(c + 1) * self.cell_w]
+
+        if frame is None:
+            cell[:] = 0
+            cv2.putText(cell, f"CH {grabber.channel} {grabber.status}", (10, self.cell_h // 2),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-        
+        elif seq != self._drawn_seq[idx]:
+            # Resize straight into the grid (no per-cycle stitching)
+            cv2.resize(frame, (self.cell_w, self.cell_h), dst=cell, interpolation=cv2.INTER_AREA)
+        self._drawn_seq[idx] = seq
+
         # Draw White Border (Grid Line)
-        cv2.rectangle(frame_to_store, (0, 0), (cell_w-1, cell_h-1), (255, 255, 255), 2)
-        
-        # Draw Timestamp
-        text_size = cv2.getTextSize(capture_time_str, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0]
-        text_x = cell_w - text_size[0] - 10
-        text_y = cell_h - 10
-        # Background block for text compatibility
-        cv2.rectangle(frame_to_store, (text_x - 5, text_y - 20), (text_x + text_size[0] + 5, text_y + 5), (0,0,0), -1)
-        cv2.putText(frame_to_store, capture_time_str, (text_x, text_y), 
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
-
-        collected_frames.append(frame_to_store)
-
-    # Stitching
-    rows = []
-    current_row = []
-    
-    for frame in collected_frames:
-        current_row.append(frame)
-        if len(current_row) == 4:
-            rows.append(np.hstack(current_row))
-            current_row = []
-            
-    final_grid = np.vstack(rows)
-    final_grid = cv2.resize(final_grid, (target_width, target_height))
-    
-    return final_grid
+        cv2.rectangle(cell, (0, 0), (self.cell_w - 1, self.cell_h - 1), (255, 255, 255), 2)
+
+        # Draw Timestamp (red when the channel missed this cycle)
+        if frame_time is not None:
+            capture_time_str = frame_time.strftime("%Y-%m-%d %H:%M:%S")
+            text_size = cv2.getTextSize(capture_time_str, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)[0]
+            text_x = self.cell_w - text_size[0] - 10
+            text_y = self.cell_h - 10
+            # Background block for text compatibility
+            cv2.rectangle(cell, (text_x - 5, text_y - 20), (text_x + text_size[0] + 5, text_y + 5), (0, 0, 0), -1)
+            cv2.putText(cell, capture_time_str, (text_x, text_y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255) if stale else (0, 255, 255), 1)
 
 def main():
     # Force OpenCV to use TCP for RTSP to reduce artifacts
@@ -140,32 +241,39 @@ def main():
     
     if not nvr_ip: return
 
+    refresh = config.getfloat('SNAP_GRID', 'refresh_seconds', fallback=5.0)
+    deadline = config.getfloat('SNAP_GRID', 'deadline_seconds', fallback=3.0)
+    grid = SnapshotGrid(nvr_ip, nvr_user, nvr_pass, factory,
+                        total_channels=config.getint('SNAP_GRID', 'channels', fallback=16),
+                        open_timeout_ms=config.getint('SNAP_GRID', 'open_timeout_ms', fallback=5000),
+                        save_interval=config.getfloat('SNAP_GRID', 'save_interval', fallback=20.0))
+
     print(f"Target NVR: {nvr_ip}")
     print("Press 'ESC' or 'q' in the window to Stop.")
-    
-    while True:
-        start_time = time.time()
-        
-        # Capture and Create Grid
-        grid_image = capture_and_create_grid(nvr_ip, nvr_user, nvr_pass, factory)
-        
-        # Show Image
-        window_name = "MDC NVR Field Monitoring (Update every 20s)"
-        cv2.imshow(window_name, grid_image)
-        
-        # Wait logic (Wait 20 seconds, checking for key press every 100ms)
-        elapsed = time.time() - start_time
-        wait_time = max(0, 20 - elapsed)
-        print(f"Waiting {wait_time:.1f} seconds for next cycle...")
-        
-        # Loop for the wait duration to keep UI responsive
-        end_wait = time.time() + wait_time
-        while time.time() < end_wait:
-            key = cv2.waitKey(100)
-            if key == 27 or key == ord('q'): # ESC or q
-                print("Exiting...")
-                cv2.destroyAllWindows()
-                return
+    grid.start()
+    window_name = f"MDC NVR Field Monitoring (Update every {refresh:g}s)"
+
+    try:
+        while True:
+            start_time = time.time()
+
+            # Capture and Create Grid
+            grid_image = grid.capture(deadline_seconds=deadline)
+
+            # Show Image
+            cv2.imshow(window_name, grid_image)
+
+            # Loop for the wait duration to keep UI responsive
+            end_wait = start_time + refresh
+            while True:
+                key = cv2.waitKey(max(1, min(100, int((end_wait - time.time()) * 1000))))
+                if key == 27 or key == ord('q'): # ESC or q
+                    print("Exiting...")
+                    return
+                if time.time() >= end_wait: break
+    finally:
+        grid.stop()
+        cv2.destroyAllWindows()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,57 @@
+import itertools
+import threading
+from typing import Callable, Optional, Dict
+
+
+class StationStateHub:
+    """
+    Push-based station state stream.
+
+    DumpProcessors publish their full state dict; the hub keeps the latest
+    snapshot per dump_id and notifies subscribers with only the fields that
+    changed. Subscribers register for one dump_id (or None for all stations),
+    so a view pays only for what it displays. Callbacks run on the publishing
+    thread and must be cheap (e.g. QtStateBridge just records dirty fields).
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[str, dict] = {}
+        self._subs: Dict[Optional[str], Dict[int, Callable]] = {}
+        self._tokens = itertools.count(1)
+        self._token_keys = {}
+
+    def subscribe(self, callback: Callable[[str, dict], None], dump_id: Optional[str] = None) -> int:
+        """callback(dump_id, changed_fields). Returns a token for unsubscribe()."""
+        with self._lock:
+            token = next(self._tokens)
+            self._subs.setdefault(dump_id, {})[token] = callback
+            self._token_keys[token] = dump_id
+            return token
+
+    def unsubscribe(self, token: int):
+        with self._lock:
+            key = self._token_keys.pop(token, None)
+            subs = self._subs.get(key)
+            if subs:
+                subs.pop(token, None)
+
+    def publish(self, dump_id: str, state: dict):
+        with self._lock:
+            prev = self._states.get(dump_id)
+            if prev is None:
+                changes = dict(state)
+            else:
+                changes = {k: v for k, v in state.items() if prev.get(k) != v}
+            if not changes: return
+            self._states[dump_id] = dict(state)
+            callbacks = list(self._subs.get(dump_id, {}).values()) + list(self._subs.get(None, {}).values())
+        for cb in callbacks:
+            cb(dump_id, changes)
+
+    def get(self, dump_id: str) -> dict:
+        with self._lock:
+            return dict(self._states.get(dump_id, {}))
+
+    def all(self) -> Dict[str, dict]:
+        with self._lock:
+            return {k: dict(v) for k, v in self._states.items()}
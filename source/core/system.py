@@ -1,10 +1,17 @@
 import os
+import time
 import logging
 import configparser
 from source.database import DatabaseManager
-from source.orchestration.lpr_engine import LPREngine
-from source.orchestration.classification_engine import ClassificationEngine
+from source.services.event_log import EventLogWriter
+from source.services.image_store import ImageWriter
+from source.services.thumbnail_cache import ThumbnailCache
+from source.services.retention import RetentionManager, RetentionArea, TIER_SUPERSEDED, TIER_UPLOADED, TIER_PENDING
+from source.orchestration.session_buffer import ImageMemoryBudget
+from source.orchestration.engine_loader import EngineLoader
+from source.orchestration.engine_cache import EngineArtifactCache
 from source.orchestration.dump_processor import DumpProcessor
+from source.core.state_hub import StationStateHub
 
 class SugarcaneSystem:
     def __init__(self):
@@ -81,16 +88,62 @@ class SugarcaneSystem:
             nvr_pass=nvr_pass
         )
         
+        # Async session/state/image logging (keeps disk I/O off the analysis loop)
+        self.event_log = EventLogWriter(
+            self.db,
+            spill_path=self.config.get("EVENT_LOG", "spill_path", fallback="event_log.spill"),
+            batch_size=self.config.getint("EVENT_LOG", "batch_size", fallback=200),
+            flush_interval=self.config.getfloat("EVENT_LOG", "flush_interval", fallback=1.0),
+            max_pending=self.config.getint("EVENT_LOG", "max_pending", fallback=20000),
+            logger=self.log
+        )
+        self.event_log.start()
+        
+        # Shared JPEG encode/write pool for captures, snaps and merged images
+        self.image_writer = ImageWriter.from_config(self.config, logger=self.log)
+
+        # Disk budget / age policy for local images (index fed by the writer, no repeated walks)
+        factory = self.config['DEFAULT'].get('factory', 'MDC')
+        self.retention = RetentionManager.from_config(self.config, [
+            RetentionArea("ok_images", os.path.join("ai_snap", "image", f"ok_image_{factory}"), TIER_SUPERSEDED),
+            RetentionArea("originals", self.config.get("UPLOAD_TRANSFORM", "originals_dir", fallback="originals"),
+                          TIER_SUPERSEDED),
+            RetentionArea("results", "results", TIER_UPLOADED),
+            RetentionArea("raw_images", os.path.join("images", factory, "raw_images"), TIER_PENDING),
+        ], logger=self.log)
+        self.image_writer.add_listener(self.retention.track)
+        self.retention.start()
+
+        # Small previews for the session detail view (captures/merged built as they are written)
+        self.thumbnails = ThumbnailCache.from_config(self.config, logger=self.log)
+        self.image_writer.add_listener(self.thumbnails.on_written, with_data=True)
+        
+        # Memory cap for buffered session captures across all processors
+        budget_mb = self.config.getint("MEMORY", "session_image_budget_mb", fallback=256)
+        self.image_budget = ImageMemoryBudget(budget_mb * 1024 * 1024)
+        
         import threading
         self.ai_lock = threading.Lock()
         
-        # Load Models
-        self.log.info("Initializing AI Models...")
-        self.lpr_engine = LPREngine(model_path="models/classification.pt", logger=self.log, global_lock=self.ai_lock)
-        self.cls_engine = ClassificationEngine(model_path="models/objectdetection.pt", logger=self.log, global_lock=self.ai_lock)
+        # Load Models in the background: UI and camera streams start right away,
+        # processors run snap-only until both engines are ready
+        self.log.info("Initializing AI Models (background)...")
+        self.lpr_engine = None
+        self.cls_engine = None
+        self._proc_lock = threading.Lock()
+        self.engine_cache = EngineArtifactCache.from_config(self.config, logger=self.log)
+        self.engines = EngineLoader(lpr_model="models/classification.pt", cls_model="models/objectdetection.pt",
+                                    global_lock=self.ai_lock, cache=self.engine_cache,
+                                    warmup=self.config.getboolean("ENGINE_CACHE", "warmup", fallback=True),
+                                    logger=self.log)
+        self.engines.on_ready(self._on_engines_ready)
+        self.engines.start()
         
         self.processors = []
+        self.processor_map = {} # dump_id -> DumpProcessor
         self.dumps = []
+        # Processors push state changes here; views subscribe per dump_id
+        self.state_hub = StationStateHub()
 
     def get_system_info(self):
         """Returns factory_name and milling_process."""
@@ -105,39 +158,66 @@ class SugarcaneSystem:
         self.dumps = self.db.get_active_dumps()
         self.log.info(f"Starting {len(self.dumps)} processors... (Testing Mode: {testing_mode})")
         for d in self.dumps:
-            p = DumpProcessor(d['dump_id'], self.db, self.lpr_engine, self.cls_engine, logger=self.log, testing_mode=testing_mode)
+            with self._proc_lock: # Engines may become ready while processors are created
+                p = DumpProcessor(d['dump_id'], self.db, self.lpr_engine, self.cls_engine, logger=self.log,
+                                  testing_mode=testing_mode, event_log=self.event_log,
+                                  image_writer=self.image_writer, image_budget=self.image_budget,
+                                  state_hub=self.state_hub, capture_config=self.config)
+                self.processors.append(p)
+                self.processor_map[p.dump_id] = p
             p.start()
-            self.processors.append(p)
+
+    def _on_engines_ready(self, lpr_engine, cls_engine):
+        # Loader thread: hand the engines to processors that started snap-only
+        with self._proc_lock:
+            self.lpr_engine = lpr_engine
+            self.cls_engine = cls_engine
+            for p in self.processors:
+                p.set_engines(lpr_engine, cls_engine)
+
+    def get_startup_status(self):
+        """Model loading progress for the UI: {'ready': bool, 'engines': {name: state}, 'errors': {...}}."""
+        return {'ready': self.engines.ready, 'engines': dict(self.engines.status), 'errors': dict(self.engines.errors)}
 
     def stop_processors(self):
         self.log.info("Stopping all processors...")
         for p in self.processors:
             p.running = False
+        # Let in-flight cycles (captures, session finalize) submit their last writes
+        deadline = time.time() + 10.0
+        for p in self.processors:
+            if p.is_alive():
+                p.join(max(0.0, deadline - time.time()))
+            if p.is_alive():
+                self.log.warning(f"Processor {p.dump_id} did not stop in time")
+        # Finish queued image writes (their callbacks emit events), then flush events
+        self.image_writer.shutdown(wait=True)
+        self.thumbnails.shutdown() # Pending previews are rebuilt on demand
+        self.event_log.stop()
+        self.retention.stop()
 
     def set_ai_enabled(self, enabled: bool):
         self.log.info(f"System AI Enabled: {enabled}")
         for p in self.processors:
             p.ai_enabled = enabled
 
+    def get_processor(self, dump_id):
+        return self.processor_map.get(dump_id)
+
     def get_processor_states(self):
-        """Returns a list of state dictionaries for the UI with real AI data."""
-        states = []
+        """Returns a list of state dictionaries for the UI with real AI data (polling fallback)."""
         from datetime import datetime
-        for p in self.processors:
-            states.append({
-                'dump_id': p.dump_id,
-                'status': 'RUNNING' if p.is_alive() else 'STOPPED',
-                'state': p.sm.state.name,
-                'lpr': p.plate_number if p.plate_number else "-",
-                'trash_pct': p.latest_cls_res.get('cane_percentage', 0), # Real AI value
-                'transaction_id': p.session_uuid[-8:] if p.session_uuid else "-",
-                'timestamp': datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-            })
-        return states
+        now_str = datetime.now().strftime("%d-%m-%Y %H:%M:%S") # One timestamp per poll
+        return [p.get_state(now_str) for p in self.processors]
+
+    def get_stream_health(self, dump_id):
+        """Detailed per-camera health for one station ({} if unknown)."""
+        p = self.processor_map.get(dump_id)
+        return p.get_stream_health() if p else {}
 
     def get_latest_frames(self, dump_id):
         """Returns the latest frames for a specific dump processor."""
-        p = next((p for p in self.processors if p.dump_id == dump_id), None)
+        p = self.processor_map.get(dump_id)
         if p:
             return p.latest_frames
         return {}
@@ -150,6 +230,15 @@ class SugarcaneSystem:
     def get_recent_transactions(self, limit=50):
         return self.db.get_recent_transactions(limit)
 
+    def get_transactions_page(self, after=None, limit=200, dump_id=None, plate=None, status=None):
+        return self.db.get_transactions_page(after, limit, dump_id=dump_id, plate=plate, status=status)
+
+    def get_session_detail(self, session_uuid):
+        return self.db.get_session_detail(session_uuid)
+
+    def get_thumbnail(self, path):
+        return self.thumbnails.get(path)
+
     def get_dashboard_charts_data(self):
         return self.db.get_dashboard_charts_data()
 
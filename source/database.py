@@ -113,6 +113,10 @@ class DatabaseManager:
                     )
                 """)
                 
+                # 9. Indexes (transaction paging / per-session image lookups)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_session_start ON dump_session (start_time, session_uuid)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_images_session ON dump_images (session_uuid)")
+                
                 conn.commit()
                 self.logger.info(f"Production Database initialized at {self.db_path}")
         except Exception as e:
@@ -208,6 +212,63 @@ class DatabaseManager:
         except Exception as e:
             self.logger.error(f"Failed to log image: {e}")
 
+    def apply_events(self, events):
+        """
+        Commit a batch of LogEvents (see services/event_log.py) in one transaction.
+        Inserts are grouped per table and written with executemany; session updates
+        keep their original order. Idempotent so a spill file can be replayed safely.
+        Raises on failure so the caller can keep the batch.
+        """
+        opened, images, transitions, updates = [], [], [], []
+        for ev in events:
+            t = getattr(ev.event_type, 'value', ev.event_type)
+            p = ev.payload
+            if t == 'SESSION_OPENED':
+                opened.append((ev.session_uuid, p.get('dump_id'), ev.ts, 'INCOMPLETE'))
+            elif t == 'IMAGE_CAPTURED':
+                images.append((ev.session_uuid, p.get('image_type'), p.get('image_path'), ev.ts,
+                               ev.session_uuid, p.get('image_path')))
+            elif t == 'STATE_TRANSITION':
+                transitions.append((ev.session_uuid, p.get('state_from'), p.get('state_to'), ev.ts,
+                                    ev.session_uuid, p.get('state_to'), ev.ts))
+            elif t == 'SESSION_UPDATED' and p:
+                updates.append((ev.session_uuid, p))
+
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            if opened:
+                cursor.executemany("""
+                    INSERT OR IGNORE INTO dump_session (session_uuid, dump_id, start_time, status)
+                    VALUES (?, ?, ?, ?)
+                """, opened)
+            if images:
+                cursor.executemany("""
+                    INSERT INTO dump_images (session_uuid, image_type, image_path, captured_at)
+                    SELECT ?, ?, ?, ?
+                    WHERE NOT EXISTS (SELECT 1 FROM dump_images WHERE session_uuid = ? AND image_path = ?)
+                """, images)
+            if transitions:
+                cursor.executemany("""
+                    INSERT INTO dump_state_log (session_uuid, state_from, state_to, changed_at)
+                    SELECT ?, ?, ?, ?
+                    WHERE NOT EXISTS (SELECT 1 FROM dump_state_log
+                                      WHERE session_uuid = ? AND state_to = ? AND changed_at = ?)
+                """, transitions)
+
+            # Updates: consecutive runs with the same column set share one executemany
+            i = 0
+            while i < len(updates):
+                keys = tuple(updates[i][1].keys())
+                run = []
+                while i < len(updates) and tuple(updates[i][1].keys()) == keys:
+                    s_uuid, p = updates[i]
+                    run.append([p[k] for k in keys] + [s_uuid])
+                    i += 1
+                cols = ", ".join([f"{k} = ?" for k in keys])
+                cursor.executemany(f"UPDATE dump_session SET {cols} WHERE session_uuid = ?", run)
+
+            conn.commit()
+
     def log_system_event(self, level, module, message):
         # We can keep a simplified system log if needed, or reuse state_log for major events
         pass
@@ -315,10 +376,34 @@ class DatabaseManager:
 
     def get_recent_transactions(self, limit=50) -> List[Dict[str, Any]]:
         """Fetch recent sessions for Transaction Tab."""
+        return self.get_transactions_page(limit=limit)
+
+    def get_transactions_page(self, after=None, limit=200, dump_id=None, plate=None,
+                              status=None) -> List[Dict[str, Any]]:
+        """
+        One page of sessions, newest first, using keyset pagination on
+        (start_time, session_uuid). Pass the last row's (start_time, session_uuid)
+        as `after` to get the next page; no OFFSET scan, so deep pages cost the
+        same as the first one.
+        """
+        where, params = [], []
+        if after:
+            where.append("(s.start_time < ? OR (s.start_time = ? AND s.session_uuid < ?))")
+            params += [after[0], after[0], after[1]]
+        if dump_id:
+            where.append("s.dump_id = ?")
+            params.append(dump_id)
+        if plate:
+            where.append("s.plate_number LIKE ?")
+            params.append(f"%{plate}%")
+        if status:
+            where.append("s.status = ?")
+            params.append(status)
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
         try:
             with self._get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("""
+                cursor.execute(f"""
                     SELECT 
                         s.session_uuid,
                         s.dump_id,
@@ -328,13 +413,34 @@ class DatabaseManager:
                         s.status,
                         (SELECT COUNT(*) FROM dump_images i WHERE i.session_uuid = s.session_uuid) as img_count
                     FROM dump_session s
-                    ORDER BY s.start_time DESC
+                    {where_sql}
+                    ORDER BY s.start_time DESC, s.session_uuid DESC
                     LIMIT ?
-                """, (limit,))
+                """, params + [limit])
                 return [dict(row) for row in cursor.fetchall()]
-        except:
+        except Exception as e:
+            self.logger.error(f"Failed to fetch transactions page: {e}")
             return []
 
+    def get_session_detail(self, session_uuid: str) -> Dict[str, Any]:
+        """Session row plus its captured images (for the session detail view)."""
+        try:
+            with self._get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT * FROM dump_session WHERE session_uuid = ?", (session_uuid,))
+                row = cursor.fetchone()
+                if not row: return {}
+                detail = dict(row)
+                cursor.execute("""
+                    SELECT image_type, image_path, captured_at FROM dump_images
+                    WHERE session_uuid = ? ORDER BY image_type, captured_at
+                """, (session_uuid,))
+                detail['images'] = [dict(r) for r in cursor.fetchall()]
+                return detail
+        except Exception as e:
+            self.logger.error(f"Failed to fetch session {session_uuid}: {e}")
+            return {}
+
     def get_24h_stats(self) -> Dict[str, Any]:
         """Fetch stats for the last 24 hours."""
         try:
@@ -389,9 +495,9 @@ class DatabaseManager:
                         s.status,
                         s.merged_image_path
                     FROM dump_session s
-                    WHERE date(s.start_time) = ?
+                    WHERE s.start_time >= ? AND s.start_time < date(?, '+1 day')
                     ORDER BY s.start_time DESC
-                """, (date_str,))
+                """, (date_str, date_str))
                 return [dict(row) for row in cursor.fetchall()]
         except:
             return []
@@ -0,0 +1,175 @@
+import logging
+from dataclasses import dataclass
+from typing import Optional
+
+import cv2
+
+try:
+    import av
+except ImportError:
+    av = None
+
+
+@dataclass
+class CaptureOptions:
+    """
+    Per-camera decode settings ([CAPTURE], overridden by [CAPTURE:<channel>]
+    and [CAPTURE:<dump_id>:<channel>] in config.txt).
+
+    decode: "full" converts every frame; "on_demand" keeps grabbing (the stream
+    stays current) but only retrieves (colour-converts) decode_fps frames/s.
+    idle_keyframe_only: while the station is IDLE only keyframes are decoded
+    (PyAV; with OpenCV the rate drops to idle_fps instead).
+    width: output width (0 = native); PyAV scales during colour conversion.
+    hw_accel: OpenCV backend only (CAP_PROP_HW_ACCELERATION).
+    """
+    backend: str = "opencv"   # opencv | pyav
+    decode: str = "on_demand" # full | on_demand
+    decode_fps: float = 5.0
+    idle_fps: float = 1.0
+    idle_keyframe_only: bool = False
+    width: int = 0
+    hw_accel: bool = False
+
+    @classmethod
+    def for_camera(cls, config, dump_id, channel):
+        opts = cls()
+        if config is None: return opts
+        for section in ("CAPTURE", f"CAPTURE:{channel}", f"CAPTURE:{dump_id}:{channel}"):
+            if not config.has_section(section): continue
+            opts.backend = config.get(section, "backend", fallback=opts.backend).strip().lower()
+            opts.decode = config.get(section, "decode", fallback=opts.decode).strip().lower()
+            opts.decode_fps = config.getfloat(section, "decode_fps", fallback=opts.decode_fps)
+            opts.idle_fps = config.getfloat(section, "idle_fps", fallback=opts.idle_fps)
+            opts.idle_keyframe_only = config.getboolean(section, "idle_keyframe_only", fallback=opts.idle_keyframe_only)
+            opts.width = config.getint(section, "width", fallback=opts.width)
+            opts.hw_accel = config.getboolean(section, "hw_accel", fallback=opts.hw_accel)
+        return opts
+
+
+class OpenCVCapture:
+    """
+    cv2.VideoCapture behind the grab()/retrieve() interface used by CameraStream.
+    With the FFmpeg backend grab() still decodes (reference frames are needed);
+    retrieve() is the colour conversion + copy that on_demand mode skips for
+    frames nobody looks at.
+    """
+    def __init__(self, cap, is_file=False, width=0):
+        self.cap = cap
+        self.is_file = is_file
+        self.width = width
+
+    @classmethod
+    def open_rtsp(cls, url, options: CaptureOptions, timeout_ms=5000):
+        # Bounded open/read so a dead camera fails fast and the supervisor backs off
+        params = [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms, cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms]
+        if options.hw_accel:
+            params += [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG, params)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        # BUFFER OPTIMIZATION: larger buffer = smoother image, more delay
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 10)
+        return cls(cap, is_file=False, width=options.width)
+
+    @classmethod
+    def open_file(cls, path, options: CaptureOptions):
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        return cls(cap, is_file=True, width=options.width)
+
+    def fps(self):
+        return self.cap.get(cv2.CAP_PROP_FPS)
+
+    def grab(self):
+        if self.cap.grab(): return True
+        if self.is_file:
+            # End of file: rewind (only meaningful for files)
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            return self.cap.grab()
+        return False
+
+    def retrieve(self):
+        ret, frame = self.cap.retrieve()
+        if ret and self.width and frame.shape[1] > self.width:
+            h, w = frame.shape[:2]
+            frame = cv2.resize(frame, (self.width, int(h * self.width / w)), interpolation=cv2.INTER_AREA)
+        return ret, frame
+
+    def set_idle(self, idle):
+        return False # No keyframe selection through cv2; CameraStream lowers the rate instead
+
+    def release(self):
+        self.cap.release()
+
+
+class PyAVCapture:
+    """
+    FFmpeg through PyAV (optional dependency).
+
+    grab() demuxes and decodes the next frame without converting it;
+    retrieve() converts the last decoded frame to BGR, scaled to `width`
+    inside the same swscale pass (no full-size BGR intermediate).
+    set_idle(True) sets skip_frame=NONKEY so only keyframes are decoded.
+    """
+    def __init__(self, container, width=0, logger: Optional[logging.Logger] = None):
+        self.log = logger or logging.getLogger("PyAVCapture")
+        self.container = container
+        self.stream = container.streams.video[0]
+        self.stream.thread_type = "AUTO"
+        self.is_file = False
+        self.width = width
+        self._frames = self._decode()
+        self._last = None
+
+    @classmethod
+    def open_rtsp(cls, url, options: CaptureOptions, timeout_s=5.0, logger=None):
+        if av is None: return None
+        # No 'nobuffer' here: it caused h264 errors with these cameras (see run_realtime.py)
+        av_options = {'rtsp_transport': 'tcp', 'flags': 'low_delay'}
+        try:
+            container = av.open(url, options=av_options, timeout=timeout_s)
+        except Exception:
+            return None
+        if not container.streams.video:
+            container.close()
+            return None
+        return cls(container, width=options.width, logger=logger)
+
+    def _decode(self):
+        for packet in self.container.demux(self.stream):
+            for frame in packet.decode():
+                yield frame
+
+    def fps(self):
+        rate = self.stream.average_rate
+        return float(rate) if rate else 0.0
+
+    def grab(self):
+        try:
+            self._last = next(self._frames)
+            return True
+        except Exception: # End of stream / network error
+            self._last = None
+            return False
+
+    def retrieve(self):
+        frame = self._last
+        if frame is None: return False, None
+        if self.width and frame.width > self.width:
+            height = int(frame.height * self.width / frame.width) // 2 * 2
+            frame = frame.reformat(width=self.width, height=height, format="bgr24")
+        return True, frame.to_ndarray(format="bgr24")
+
+    def set_idle(self, idle):
+        self.stream.codec_context.skip_frame = "NONKEY" if idle else "DEFAULT"
+        return True
+
+    def release(self):
+        try:
+            self.container.close()
+        except Exception:
+            pass
@@ -8,12 +8,19 @@ from typing import Optional, Dict, Any
 import threading
 
 class ClassificationEngine:
-    def __init__(self, model_path: str, logger: Optional[logging.Logger] = None, use_gpu: bool = False, global_lock: Optional[threading.Lock] = None):
+    def __init__(self, model_path: str, logger: Optional[logging.Logger] = None, use_gpu: bool = False, global_lock: Optional[threading.Lock] = None,
+                 task: Optional[str] = None):
         self.log = logger or logging.getLogger("ClassificationEngine")
         self._lock = global_lock if global_lock else threading.Lock()
         self.log.info(f"Loading Classification model: {model_path}")
-        self.model = YOLO(model_path)
+        # model_path may be a cached export (see EngineArtifactCache); exports need the task
+        self.model = YOLO(model_path, task=task) if task else YOLO(model_path)
         self.device = 0 if use_gpu and torch.cuda.is_available() else "cpu"
+
+    def warmup(self, imgsz: int = 640):
+        """One inference on a blank frame so the first real frame is not slow."""
+        with self._lock:
+            self.model(np.zeros((imgsz, imgsz, 3), dtype=np.uint8), verbose=False, device=self.device)
         
     def analyze(self, frame_bgr: np.ndarray) -> Dict[str, Any]:
         """
@@ -6,35 +6,50 @@ import os
 from datetime import datetime
 from source.orchestration.dump_state_manager import StateManager, DumpState
 from source.utils.image_merger import merge_production_images
+from source.services.image_store import ImageWriter
+from source.orchestration.session_buffer import SessionImageBuffer
+from source.services.snap_watcher import get_snap_notifier
+from source.utils.image_quality import assess_image
+from source.utils.image_hash import hash_image
+from source.orchestration.stream_supervisor import StreamSupervisor
+from source.orchestration.capture_backends import CaptureOptions, OpenCVCapture, PyAVCapture, av
 
 class DumpProcessor(threading.Thread):
-    def __init__(self, dump_id, db, lpr_engine, cls_engine, logger=None, testing_mode=False):
+    def __init__(self, dump_id, db, lpr_engine, cls_engine, logger=None, testing_mode=False, event_log=None,
+                 image_writer=None, image_budget=None, state_hub=None, capture_config=None):
         super().__init__(name=f"Processor_{dump_id}", daemon=True)
         self.dump_id = dump_id
         self.db = db
+        self.log = logger or logging.getLogger(f"DumpProcessor_{dump_id}")
+        # Session/state/image writes go through the async event log when available
+        self.events = event_log or db
+        # JPEG encoding/writing happens on the shared writer pool, not on this thread
+        self.image_writer = image_writer or ImageWriter(max_workers=1, logger=self.log)
         self.lpr_engine = lpr_engine
         self.cls_engine = cls_engine
-        self.log = logger or logging.getLogger(f"DumpProcessor_{dump_id}")
         self.testing_mode = testing_mode
         
         self.sm = StateManager(dump_id, logger=self.log)
         self.running = True
-        self.caps = {'CH101': None, 'CH201': None}
+        # Cameras are read and reconnected by the supervisor's threads
+        self.streams = StreamSupervisor(logger=self.log)
         self.urls = self.db.get_cameras_for_dump(dump_id)
+        # Per-camera decode settings ([CAPTURE] sections of config.txt)
+        self.capture_options = {ch: CaptureOptions.for_camera(capture_config, dump_id, ch) for ch in self.urls}
+        # Static site metadata, read once instead of per snap/session
+        self.factory_info = self.db.get_factory_info()
         
-        # Local session image buffer
-        self.session_images = {
-            'IMAGE_1': None, 
-            'IMAGE_2': None, 
-            'IMAGE_3': None, 
-            'IMAGE_4': None
-        }
+        # Local session image buffer (encoded JPEG bytes, decoded lazily at merge)
+        self.session_images = SessionImageBuffer(budget=image_budget, logger=self.log)
         self.plate_number = "UNKNOWN"
         self.session_uuid = None
         self.latest_frames = {} 
+        self.frame_seq = 0 # Bumped whenever latest_frames is replaced (UI skips unchanged frames)
         self.latest_cls_res = {} # Store real AI results
         self.ai_enabled = True # Default
         self.last_snap_time = 0
+        # Push-based UI state (StationStateHub); None = UI polls get_state()
+        self.state_hub = state_hub
 
     def run(self):
         self.log.info(f"Starting processor for {self.dump_id}")
@@ -43,17 +58,11 @@ class DumpProcessor(threading.Thread):
         last_analysis = 0
         while self.running:
             try:
-                # 1. Grab Frames
-                frames = {}
-                for ch, cap in self.caps.items():
-                    if cap and cap.isOpened():
-                        ret, frame = cap.read()
-                        if not ret:
-                            # If video file, loop back to start
-                            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                            ret, frame = cap.read()
-                        
-                        if ret: frames[ch] = frame
+                # 1. Wait for new frames (no polling: dead cameras cost nothing here)
+                frames = self.streams.wait_frames(timeout=0.5)
+                if frames is None:
+                    self._publish_state() # Camera status may have changed
+                    continue
                 
                 # Update latest_frames for UI consumption with STANDARDIZED KEYS
                 # Sort keys to ensure consistency: 1st key = LPR, 2nd key = AI (Top)
@@ -62,72 +71,102 @@ class DumpProcessor(threading.Thread):
                 if len(sorted_keys) > 0: normalized_frames['LPR'] = frames[sorted_keys[0]]
                 if len(sorted_keys) > 1: normalized_frames['AI'] = frames[sorted_keys[1]]
                 
-                self.latest_frames = normalized_frames
+                self._publish_frames(normalized_frames)
                 
                 # 2. Analyze at ~2 FPS (Optimized for CPU stability)
                 now = time.time()
                 if now - last_analysis > 0.5:
                     last_analysis = now
-                    # Pass raw frames to processing or adapted ones?
-                    # The internal processing also uses hardcoded CH101/CH201. We should fix that too.
-                    self._process_cycle(frames)
-                
-                time.sleep(0.01)
+                    # Copies: the cycle draws on its frames, the streams keep theirs
+                    self._process_cycle({ch: f.copy() for ch, f in frames.items()})
+                    self._publish_state()
             except Exception as e:
                 self.log.error(f"Error in main loop: {e}")
                 time.sleep(1)
+        self.streams.stop()
+        self._publish_state(status='STOPPED')
+
+    def set_engines(self, lpr_engine, cls_engine):
+        """Engines finished loading in the background (see EngineLoader)."""
+        self.lpr_engine = lpr_engine
+        self.cls_engine = cls_engine
+        self.log.info(f"[{self.dump_id}] AI engines attached")
 
     def _init_streams(self):
         for ch, url in self.urls.items():
-            try:
-                connected = False
-                
-                # 0. Check Testing Mode
-                if self.testing_mode:
-                    self.log.info(f"{ch}: Testing Mode=ON. Skipping RTSP, using fallback VDO.")
-                else:
-                    # 1. Try RTSP (Priority)
-                    if url and url.strip():
-                        self.log.info(f"Opening RTSP {ch}: {url}")
-                        try:
-                            # Attempt to set a lower timeout (backend dependent, often doesn't work directly in cv2 props)
-                            # but we can try opening with API preference if needed.
-                            # For now, we rely on standard open but log clearly.
-                            cap = cv2.VideoCapture(url)
-                            if cap.isOpened():
-                                # BUFFER OPTIMIZATION: larger buffer = smoother image, more delay
-                                cap.set(cv2.CAP_PROP_BUFFERSIZE, 10) 
-                                self.caps[ch] = cap
-                                connected = True
-                                self.log.info(f"Connected to RTSP {ch}")
-                            else:
-                                self.log.warning(f"RTSP failed to open {ch}")
-                        except Exception as e:
-                            self.log.error(f"RTSP Exception {ch}: {e}")
+            self.streams.add(ch, self._make_opener(ch, url), options=self.capture_options[ch])
 
-                # 2. Key Fallback: If not connected (or Testing Mode), try Testing VDO
-                if not connected:
-                    if not self.testing_mode:
-                        self.log.info(f"Camera not connected for {ch}. Searching for fallback VDO...")
-                    vdo_path = self._find_fallback_vdo(ch)
-                    if vdo_path:
-                        self.log.info(f"Checking fallback VDO: {vdo_path}")
-                        if os.path.exists(vdo_path):
-                            self.caps[ch] = cv2.VideoCapture(vdo_path)
-                            if self.caps[ch].isOpened():
-                                connected = True
-                                self.log.info(f"Successfully opened fallback VDO: {vdo_path}")
-                            else:
-                                self.log.error(f"Failed to open video file: {vdo_path}")
-                        else:
-                            self.log.error(f"Video file path does not exist: {vdo_path}")
-                    else:
-                        self.log.error(f"No fallback VDO found for pattern {ch}")
+    def _make_opener(self, ch, url):
+        """
+        open_fn for the stream supervisor. The first call picks the source (RTSP,
+        else fallback VDO); reconnects reopen the same source so a dropped
+        camera is never silently replaced by test video.
+        """
+        chosen = {}
 
-                if not connected:
-                    self.log.error(f"Failed to initialize {ch} (No VDO and No RTSP)")
-            except Exception as e:
-                self.log.error(f"Failed to initialize {ch}: {e}")
+        def open_source():
+            if chosen.get('kind') == 'file':
+                return self._open_file(ch, chosen['path']), True
+            if chosen.get('kind') == 'rtsp':
+                return self._open_rtsp(ch, url), False
+
+            # 0. Check Testing Mode
+            if self.testing_mode:
+                self.log.info(f"{ch}: Testing Mode=ON. Skipping RTSP, using fallback VDO.")
+            elif url and url.strip():
+                # 1. Try RTSP (Priority)
+                cap = self._open_rtsp(ch, url)
+                if cap is not None:
+                    chosen['kind'] = 'rtsp'
+                    return cap, False
+
+            # 2. Key Fallback: If not connected (or Testing Mode), try Testing VDO
+            if not self.testing_mode:
+                self.log.info(f"Camera not connected for {ch}. Searching for fallback VDO...")
+            vdo_path = self._find_fallback_vdo(ch)
+            if vdo_path and os.path.exists(vdo_path):
+                cap = self._open_file(ch, vdo_path)
+                if cap is not None:
+                    chosen.update(kind='file', path=vdo_path)
+                    self.log.info(f"Successfully opened fallback VDO: {vdo_path}")
+                    return cap, True
+            elif not vdo_path:
+                self.log.error(f"No fallback VDO found for pattern {ch}")
+
+            if url and url.strip() and not self.testing_mode:
+                chosen['kind'] = 'rtsp' # Keep retrying the camera (with backoff)
+            self.log.error(f"Failed to initialize {ch} (No VDO and No RTSP)")
+            return None, False
+
+        return open_source
+
+    def _open_rtsp(self, ch, url):
+        options = self.capture_options[ch]
+        self.log.info(f"Opening RTSP {ch}: {url} ({options.backend}, decode={options.decode})")
+        try:
+            if options.backend == "pyav" and av is not None:
+                cap = PyAVCapture.open_rtsp(url, options, logger=self.log)
+            else:
+                if options.backend == "pyav":
+                    self.log.warning(f"{ch}: PyAV not installed, using OpenCV capture")
+                cap = OpenCVCapture.open_rtsp(url, options)
+            if cap is not None:
+                self.log.info(f"Connected to RTSP {ch}")
+                return cap
+            self.log.warning(f"RTSP failed to open {ch}")
+        except Exception as e:
+            self.log.error(f"RTSP Exception {ch}: {e}")
+        return None
+
+    def _open_file(self, ch, path):
+        cap = OpenCVCapture.open_file(path, self.capture_options[ch])
+        if cap is None:
+            self.log.error(f"Failed to open video file: {path}")
+        return cap
+
+    def get_stream_health(self):
+        """Per-camera health (state, frame age, read latency, failures, reconnects)."""
+        return self.streams.health()
 
     def _find_fallback_vdo(self, ch_prefix):
         """Finds a speed-optimized file in testing/outcome/ or local vdo."""
@@ -173,15 +212,17 @@ class DumpProcessor(threading.Thread):
 
         # Initialize normalized container for UI updates
         normalized_frames = {'LPR': f_frame, 'AI': t_frame}
-        self.latest_frames = normalized_frames
+        self._publish_frames(normalized_frames)
 
         # --- AI TOGGLE LOGIC ---
-        if not self.ai_enabled:
+        # Also snap-only while the engines are still loading at startup
+        if not self.ai_enabled or self.lpr_engine is None or self.cls_engine is None:
             # Fallback Snap Logic (10s interval)
             now = time.time()
             if now - self.last_snap_time > 10:
                 self.last_snap_time = now
-                self.log.info("AI OFF: Executing Fallback Snap...")
+                reason = "AI OFF" if not self.ai_enabled else "Models loading"
+                self.log.info(f"{reason}: Executing Fallback Snap...")
                 self._save_snap_image(f_frame, "LPR", f_key)
                 self._save_snap_image(t_frame, "TopView", t_key)
             return
@@ -212,9 +253,7 @@ class DumpProcessor(threading.Thread):
             cv2.rectangle(t_frame, (x1, y1), (x2, y2), (0, 165, 255), 2) # Orange
             
         # Update Results for UI consumption (Annotated)
-        normalized_frames['LPR'] = f_frame
-        normalized_frames['AI'] = t_frame
-        self.latest_frames = normalized_frames
+        self._publish_frames({'LPR': f_frame, 'AI': t_frame})
         
         # 2. Update FSM
         # Mapping model results to FSM inputs
@@ -233,17 +272,19 @@ class DumpProcessor(threading.Thread):
             elif y1 < 250: front_data['lifting'] = True
             
         state_changed = self.sm.update(front_data, cls_res)
+        # Empty station: cameras decode at idle rate / keyframes only
+        self.streams.set_idle(self.sm.state == DumpState.EMPTY_IDLE)
         
         if state_changed:
             self.log.info(f"State: {self.sm.state.name}")
             if self.session_uuid:
-                self.db.log_state_transition(self.session_uuid, "PREV", self.sm.state.name)
+                self.events.log_state_transition(self.session_uuid, "PREV", self.sm.state.name)
             
             # Start Session at TRUCK_IN
             if self.sm.state == DumpState.TRUCK_IN and not self.session_uuid:
-                self.session_uuid = self.db.create_session(self.dump_id)
+                self.session_uuid = self.events.create_session(self.dump_id)
                 self.log.info(f"New Session: {self.session_uuid}")
-                self.session_images = {k: None for k in self.session_images}
+                self.session_images.clear()
                 self.plate_number = "UNKNOWN"
             
             # End Session at EMPTY_RESET
@@ -256,31 +297,39 @@ class DumpProcessor(threading.Thread):
         if trigger and self.session_uuid:
             self._perform_capture(trigger, f_frame, t_frame)
 
+    def _publish_frames(self, frames):
+        self.latest_frames = frames
+        self.frame_seq += 1
+        self._publish_state()
+
+    def get_state(self, timestamp=None, status=None):
+        """State dictionary shown by the UI for this station."""
+        return {
+            'dump_id': self.dump_id,
+            'status': status or ('RUNNING' if self.is_alive() else 'STOPPED'),
+            'state': self.sm.state.name,
+            'lpr': self.plate_number if self.plate_number else "-",
+            'trash_pct': self.latest_cls_res.get('cane_percentage', 0), # Real AI value
+            'transaction_id': self.session_uuid[-8:] if self.session_uuid else "-",
+            'timestamp': timestamp or datetime.now().strftime("%d-%m-%Y %H:%M:%S"),
+            'frame_seq': self.frame_seq,
+            'cameras': self.streams.states()
+        }
+
+    def _publish_state(self, status=None):
+        # The hub diffs against the last snapshot and only notifies on changes
+        if self.state_hub:
+            self.state_hub.publish(self.dump_id, self.get_state(status=status))
+
     def _save_snap_image(self, frame, view_type, ch_name):
         try:
-            # 1. Corruption Check (Simple Gray/Green Check)
-            # Gray screen usually means std dev is very low or mean is exactly 127/128 everywhere, 
-            # or it's just empty.
+            # 1. Corruption Check (gray screen / White-Pink-Green blocks) on a small view
             if frame is None or frame.size == 0: return
-
-            # Basic Check: If image is mostly one color (Gray artifact)
-            # A completely gray image (decoding error) has low variance.
-            # Using the same logic as cloud_sync for consistency would be best, 
-            # but let's implement a quick variance check or the same color check.
-            
-            # Let's import numpy locally to avoid scope issues if not imported
-            import numpy as np
-            
-            # Check 1: Low Standard Deviation (Flat color)
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            std_dev = cv2.meanStdDev(gray)[1][0][0]
-            if std_dev < 5: # Very flat image (gray screen)
-                self.log.warning(f"Skipping corrupted snap (Low StdDev): {ch_name}")
+            verdict = assess_image(frame)
+            if verdict.corrupted:
+                self.log.warning(f"Skipping corrupted snap ({verdict.reason}): {ch_name}")
                 return
 
-            # Check 2: Specific Color Artifacts (Green/Pink) - simplified from cloud_sync
-            # (Optional: can add if needed, but StdDev is good for gray screens)
-
             # Calculate Real Channel Number based on Dump ID
             # Dump 1 -> ch1 (LPR), ch2 (Top)
             # Dump 2 -> ch3 (LPR), ch4 (Top)
@@ -297,19 +346,30 @@ class DumpProcessor(threading.Thread):
             formatted_ch = f"ch{real_ch_num}"
             
             # Path: ./images/{factory}/raw_images/{view_type}/{formatted_ch}/{Date}/filename
-            factory_info = self.db.get_factory_info()
-            factory = factory_info.get('factory_id', 'MDC')
+            factory = self.factory_info.get('factory_id', 'MDC')
             
             date_folder = datetime.now().strftime("%Y%m%d")
             base_dir = os.path.join("images", factory, "raw_images", view_type, formatted_ch, date_folder)
-            os.makedirs(base_dir, exist_ok=True)
             
             ts_str = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"{factory}_{formatted_ch}_{ts_str}.jpg"
             save_path = os.path.join(base_dir, filename)
             
-            # Save Raw Image
-            cv2.imwrite(save_path, frame)
+            # Capture context, embedded in the uploaded image by the upload transform
+            capture_meta = {'dump_id': self.dump_id, 'plate': self.plate_number, 'state': self.sm.state.name,
+                            'view': view_type, 'channel': formatted_ch, 'captured_at': datetime.now().isoformat()}
+            # Lake dedup hash from the frame in memory (the uploader does not decode the file again)
+            dhash = hash_image(frame)
+
+            # Save Raw Image (best effort: dropped if the writer is backed up),
+            # then announce it to cloud sync as soon as the file is complete
+            notifier = get_snap_notifier()
+            notifier.claim(save_path) # The watcher's event for this file is redundant
+            future = self.image_writer.submit(frame, save_path, drop_if_busy=True,
+                                              on_done=lambda p, _data: notifier.publish(p, quality=verdict.label, dhash=dhash,
+                                                                                    **capture_meta))
+            if future is None:
+                notifier.release(save_path)
         except Exception as e:
             self.log.error(f"Failed to save snap: {e}")
 
@@ -322,7 +382,7 @@ class DumpProcessor(threading.Thread):
             lpr_full = self.lpr_engine.detect(f_frame, skip_ocr=False)
             if lpr_full and lpr_full.text:
                 self.plate_number = lpr_full.text
-                self.db.update_session(self.session_uuid, plate_number=self.plate_number)
+                self.events.update_session(self.session_uuid, plate_number=self.plate_number)
             img_to_save = f_frame
         else:
             img_to_save = t_frame # Image 2, 3, 4 are TOP view
@@ -332,42 +392,51 @@ class DumpProcessor(threading.Thread):
             ts_str = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
             filename = f"{self.dump_id}_{self.session_uuid[:8]}_{trigger}_{ts_str}.jpg"
             path = os.path.join("results", filename)
-            os.makedirs("results", exist_ok=True)
-            cv2.imwrite(path, img_to_save)
             
-            # Log To DB
-            self.db.log_image(self.session_uuid, trigger, path)
-            self.session_images[trigger] = img_to_save
+            # Encode/write in background; once on disk, keep the JPEG bytes
+            # in the session buffer (raw frame released) and log to DB
+            session_uuid = self.session_uuid
+            generation = self.session_images.put(trigger, img_to_save)
+            
+            def _on_written(p, data):
+                self.session_images.on_encoded(trigger, p, data, generation)
+                self.events.log_image(session_uuid, trigger, p)
+            
+            self.image_writer.submit(img_to_save, path, on_done=_on_written)
             self.sm.mark_captured(trigger)
 
     def _finalize_session(self):
         self.log.info(f"Finalizing session {self.session_uuid}")
         
         # Check if all images exist
-        all_captured = all(v is not None for v in self.session_images.values())
+        all_captured = self.session_images.all_captured()
         status = 'COMPLETE' if all_captured else 'INCOMPLETE'
         
         # Merge
-        factory_info = self.db.get_factory_info()
         meta = {
             'datetime': datetime.now().strftime("%d%m%Y-%H:%M:%S"),
-            'factory': factory_info.get('factory_id', 'NA'),
-            'milling': factory_info.get('milling_process', 'NA'),
+            'factory': self.factory_info.get('factory_id', 'NA'),
+            'milling': self.factory_info.get('milling_process', 'NA'),
             'dump': self.dump_id,
             'lpr': self.plate_number
         }
         
-        merged_img = merge_production_images(list(self.session_images.values()), meta)
+        merged_img = merge_production_images(self.session_images.decode_all(), meta)
+        self.session_images.clear() # Release buffered JPEGs now, not at the next session
         
         # Save merged
         merged_filename = f"MERGED_{self.dump_id}_{self.session_uuid[:8]}.jpg"
         merged_path = os.path.join("results", merged_filename)
-        cv2.imwrite(merged_path, merged_img)
         
-        # Update Session in DB
-        self.db.update_session(self.session_uuid, 
-                              end_time=datetime.now(),
-                              merged_image_path=merged_path,
-                              status=status)
+        # Update Session in DB (merged path recorded once the file is written)
+        session_uuid = self.session_uuid
+        self.events.update_session(session_uuid, end_time=datetime.now(), status=status)
+        notifier = get_snap_notifier()
+
+        def _on_merged(p, _data):
+            self.events.update_session(session_uuid, merged_image_path=p)
+            notifier.publish(p, kind='result') # Uploaded ahead of raw snaps
+
+        self.image_writer.submit(merged_img, merged_path, on_done=_on_merged)
         
-        self.log.info(f"Session {status}. Merged saved to {merged_path}")
+        self.log.info(f"Session {status}. Merged queued to {merged_path}")
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Optional, Tuple
+
+
+class EngineArtifactCache:
+    """
+    On-disk cache of exported model graphs, keyed by model file hash, runtime
+    and input size (engine_cache/<key>/).
+
+    resolve() returns the artefact to load (plus the YOLO task, which exported
+    graphs do not carry) when one exists for the current .pt file, otherwise the
+    .pt itself. Exports never delay going live: EngineLoader calls export() from
+    a background thread after the engines are up, so the next start
+    loads the ready graph. A failed export is remembered per key (the runtime may
+    be missing), so it is not retried on every launch. meta.json also records the
+    warm-up latency of the last start for the logs.
+    """
+    def __init__(self, cache_dir="engine_cache", export_format="onnx", imgsz=640, enabled=True,
+                 logger: Optional[logging.Logger] = None):
+        self.log = logger or logging.getLogger("EngineArtifactCache")
+        self.cache_dir = cache_dir
+        self.export_format = export_format
+        self.imgsz = imgsz
+        self.enabled = enabled
+        self._lock = threading.Lock() # One export at a time (CPU heavy)
+        self._hashes = {}
+
+    @classmethod
+    def from_config(cls, config, logger=None):
+        return cls(
+            cache_dir=config.get("ENGINE_CACHE", "cache_dir", fallback="engine_cache"),
+            export_format=config.get("ENGINE_CACHE", "format", fallback="onnx"),
+            imgsz=config.getint("ENGINE_CACHE", "imgsz", fallback=640),
+            enabled=config.getboolean("ENGINE_CACHE", "enabled", fallback=True),
+            logger=logger
+        )
+
+    @property
+    def ocr_dir(self):
+        """Persistent EasyOCR model storage (no download checks after the first start)."""
+        return os.path.join(self.cache_dir, "easyocr")
+
+    # --- Keys ---
+
+    def _file_hash(self, path):
+        st = os.stat(path)
+        cached = self._hashes.get(path)
+        if cached and cached[0] == (st.st_size, st.st_mtime):
+            return cached[1]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(chunk)
+        digest = h.hexdigest()
+        self._hashes[path] = ((st.st_size, st.st_mtime), digest)
+        return digest
+
+    def _runtime(self):
+        try:
+            import ultralytics
+            version = ultralytics.__version__
+        except Exception:
+            version = "unknown"
+        return f"{self.export_format}-ultralytics{version}-cpu"
+
+    def key(self, model_path):
+        raw = f"{self._file_hash(model_path)}|{self._runtime()}|{self.imgsz}"
+        return f"{os.path.splitext(os.path.basename(model_path))[0]}-{hashlib.sha1(raw.encode()).hexdigest()[:16]}"
+
+    def _entry_dir(self, model_path):
+        return os.path.join(self.cache_dir, self.key(model_path))
+
+    def _read_meta(self, entry_dir):
+        try:
+            with open(os.path.join(entry_dir, "meta.json"), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, entry_dir, meta):
+        os.makedirs(entry_dir, exist_ok=True)
+        tmp = os.path.join(entry_dir, "meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, os.path.join(entry_dir, "meta.json"))
+
+    # --- API ---
+
+    def resolve(self, model_path) -> Tuple[str, Optional[str]]:
+        """(path_to_load, task). Falls back to the .pt when no usable artefact exists."""
+        if not self.enabled or not os.path.exists(model_path):
+            return model_path, None
+        try:
+            entry = self._entry_dir(model_path)
+            meta = self._read_meta(entry)
+        except OSError as e:
+            self.log.warning(f"Engine cache lookup failed for {model_path}: {e}")
+            return model_path, None
+        if meta and meta.get('status') == 'READY':
+            artefact = os.path.join(entry, meta['artefact'])
+            if os.path.exists(artefact):
+                self.log.info(f"Engine cache hit: {model_path} -> {artefact}")
+                return artefact, meta.get('task')
+        return model_path, None
+
+    def needs_export(self, model_path) -> bool:
+        if not self.enabled or not os.path.exists(model_path): return False
+        meta = self._read_meta(self._entry_dir(model_path))
+        return meta is None # READY or FAILED entries are final for this key
+
+    def record_warmup(self, model_path, warmup_ms):
+        if not self.enabled or not os.path.exists(model_path): return
+        entry = self._entry_dir(model_path)
+        meta = self._read_meta(entry)
+        if meta is None: return
+        meta['last_warmup_ms'] = round(warmup_ms, 1)
+        self._write_meta(entry, meta)
+
+    def export(self, model_path):
+        """Export model_path for the configured runtime into the cache (blocking)."""
+        with self._lock:
+            if not self.needs_export(model_path): return
+            entry = self._entry_dir(model_path)
+            t0 = time.time()
+            self.log.info(f"Exporting {model_path} ({self.export_format}, imgsz={self.imgsz}) for the next start...")
+            try:
+                from ultralytics import YOLO
+                model = YOLO(model_path)
+                exported = model.export(format=self.export_format, imgsz=self.imgsz, verbose=False)
+                os.makedirs(entry, exist_ok=True)
+                name = os.path.basename(str(exported).rstrip("/\\"))
+                target = os.path.join(entry, name)
+                if os.path.exists(target):
+                    shutil.rmtree(target) if os.path.isdir(target) else os.remove(target)
+                shutil.move(str(exported), target)
+                self._write_meta(entry, {
+                    'status': 'READY', 'artefact': name, 'task': model.task, 'source': model_path,
+                    'runtime': self._runtime(), 'imgsz': self.imgsz,
+                    'exported_at': time.strftime("%Y-%m-%d %H:%M:%S"), 'export_s': round(time.time() - t0, 1)
+                })
+                self.log.info(f"Engine artefact ready: {target} ({time.time() - t0:.1f}s)")
+            except Exception as e:
+                self.log.warning(f"Engine export failed for {model_path}, keeping .pt: {e}")
+                self._write_meta(entry, {'status': 'FAILED', 'error': str(e), 'source': model_path,
+                                         'runtime': self._runtime(), 'imgsz': self.imgsz})
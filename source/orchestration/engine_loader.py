@@ -0,0 +1,141 @@
+import time
+import logging
+import threading
+from typing import Optional, Callable, Dict
+
+# Load states reported to the UI
+LOAD_PENDING = "PENDING"
+LOAD_LOADING = "LOADING"
+LOAD_READY = "READY"
+LOAD_FAILED = "FAILED"
+
+
+class EngineLoader:
+    """
+    Loads the AI engines in background threads so startup does not wait for them.
+
+    The LPR engine (YOLO + EasyOCR) and the classification engine load
+    concurrently; their modules (ultralytics / torch / easyocr) are only
+    imported inside the loader threads. With an EngineArtifactCache, cached
+    exports are loaded instead of the .pt files, each engine does one warm-up
+    inference before it is reported READY, and missing artefacts are exported
+    in the background once both engines are live. Until both are READY, processors run
+    without AI (capture + fallback snaps). Listeners are called as
+    fn(name, state, elapsed_s) from the loader threads; on_ready(lpr, cls) is
+    called once when both engines are available.
+    """
+    def __init__(self, lpr_model="models/classification.pt", cls_model="models/objectdetection.pt",
+                 global_lock: Optional[threading.Lock] = None, cache=None, warmup=True,
+                 logger: Optional[logging.Logger] = None):
+        self.log = logger or logging.getLogger("EngineLoader")
+        self.cache = cache # EngineArtifactCache or None
+        self.warmup = warmup
+        self.lpr_model = lpr_model
+        self.cls_model = cls_model
+        self.global_lock = global_lock
+        self.lpr_engine = None
+        self.cls_engine = None
+        self.status: Dict[str, str] = {'LPR': LOAD_PENDING, 'CLS': LOAD_PENDING}
+        self.errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._listeners = []
+        self._on_ready = []
+        self._t0 = None
+
+    def add_listener(self, fn: Callable[[str, str, float], None]):
+        self._listeners.append(fn)
+
+    def on_ready(self, fn: Callable):
+        """fn(lpr_engine, cls_engine); called immediately if the engines are already loaded."""
+        with self._lock:
+            if not self._ready.is_set():
+                self._on_ready.append(fn)
+                return
+        fn(self.lpr_engine, self.cls_engine)
+
+    def start(self):
+        self._t0 = time.time()
+        for name, target in (('LPR', self._load_lpr), ('CLS', self._load_cls)):
+            threading.Thread(target=self._run, args=(name, target), name=f"EngineLoader_{name}", daemon=True).start()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait(self, timeout=None) -> bool:
+        return self._ready.wait(timeout)
+
+    def _resolve(self, model_path):
+        return self.cache.resolve(model_path) if self.cache else (model_path, None)
+
+    def _warmup(self, name, engine, model_path):
+        if not self.warmup: return
+        t0 = time.time()
+        try:
+            engine.warmup(self.cache.imgsz if self.cache else 640)
+        except Exception as e:
+            self.log.warning(f"{name} warm-up failed: {e}")
+            return
+        warmup_ms = (time.time() - t0) * 1000
+        self.log.info(f"{name} warm-up inference: {warmup_ms:.0f} ms")
+        if self.cache:
+            self.cache.record_warmup(model_path, warmup_ms)
+
+    def _load_lpr(self):
+        from source.orchestration.lpr_engine import LPREngine
+        path, task = self._resolve(self.lpr_model)
+        engine = LPREngine(model_path=path, logger=self.log, global_lock=self.global_lock, task=task,
+                           ocr_storage_dir=self.cache.ocr_dir if self.cache else None)
+        self._warmup('LPR', engine, self.lpr_model)
+        self.lpr_engine = engine
+
+    def _load_cls(self):
+        from source.orchestration.classification_engine import ClassificationEngine
+        path, task = self._resolve(self.cls_model)
+        engine = ClassificationEngine(model_path=path, logger=self.log, global_lock=self.global_lock, task=task)
+        self._warmup('CLS', engine, self.cls_model)
+        self.cls_engine = engine
+
+    def _export_missing(self):
+        # After go-live: build artefacts for the next start (one at a time, background)
+        for model_path in (self.lpr_model, self.cls_model):
+            try:
+                self.cache.export(model_path)
+            except Exception as e:
+                self.log.warning(f"Engine export skipped for {model_path}: {e}")
+
+    def _run(self, name, target):
+        self._set_status(name, LOAD_LOADING)
+        try:
+            target()
+        except Exception as e:
+            self.errors[name] = str(e)
+            self.log.error(f"Failed to load {name} engine: {e}")
+            self._set_status(name, LOAD_FAILED)
+            return
+        self.log.info(f"{name} engine loaded in {time.time() - self._t0:.1f}s")
+        self._set_status(name, LOAD_READY)
+
+        with self._lock:
+            if self.lpr_engine is None or self.cls_engine is None or self._ready.is_set():
+                return
+            self._ready.set()
+            callbacks, self._on_ready = self._on_ready, []
+        self.log.info(f"AI engines ready after {time.time() - self._t0:.1f}s")
+        for fn in callbacks:
+            try:
+                fn(self.lpr_engine, self.cls_engine)
+            except Exception as e:
+                self.log.error(f"Engine ready callback failed: {e}")
+        if self.cache and any(self.cache.needs_export(m) for m in (self.lpr_model, self.cls_model)):
+            threading.Thread(target=self._export_missing, name="EngineExport", daemon=True).start()
+
+    def _set_status(self, name, state):
+        self.status[name] = state
+        elapsed = time.time() - self._t0 if self._t0 else 0.0
+        for fn in self._listeners:
+            try:
+                fn(name, state, elapsed)
+            except Exception as e:
+                self.log.error(f"Engine loader listener failed: {e}")
@@ -9,6 +9,7 @@ lpr_engine.py
 from __future__ import annotations
 
 import logging
+import os
 import re
 from dataclasses import dataclass
 from typing import Optional, Tuple
@@ -38,18 +39,25 @@ class LPREngine:
         logger: Optional[logging.Logger] = None,
         ocr_lang: str = "en",
         use_gpu: bool = False,
-        global_lock: Optional[threading.Lock] = None
+        global_lock: Optional[threading.Lock] = None,
+        task: Optional[str] = None,
+        ocr_storage_dir: Optional[str] = None
     ):
         self.log = logger or logging.getLogger("run_realtime.lpr")
         self.conf_th = float(conf_th)
         self._lock = global_lock if global_lock else threading.Lock()
 
+        # model_path may be a cached export (see EngineArtifactCache); exports need the task
         self.log.info("Loading YOLO model: %s", model_path)
-        self.model = YOLO(model_path)
+        self.model = YOLO(model_path, task=task) if task else YOLO(model_path)
 
         self.log.info("Loading EasyOCR (lang=%s, gpu=%s) ...", ocr_lang, use_gpu)
         # gpu=False for compatibility, can be True if CUDA available
-        self.reader = easyocr.Reader([ocr_lang], gpu=use_gpu)
+        ocr_kwargs = {}
+        if ocr_storage_dir:
+            os.makedirs(ocr_storage_dir, exist_ok=True)
+            ocr_kwargs['model_storage_directory'] = ocr_storage_dir
+        self.reader = easyocr.Reader([ocr_lang], gpu=use_gpu, **ocr_kwargs)
         
         # Determine device for YOLO
         self.device = 0 if use_gpu else "cpu"
@@ -117,6 +125,13 @@ class LPREngine:
         plate_text = self._ocr_plate(frame_bgr, (x1, y1, x2, y2))
         return LPRResult(bbox=(x1, y1, x2, y2), text=plate_text, conf=conf)
 
+    def warmup(self, imgsz: int = 640):
+        """One YOLO + one OCR pass on blank input so the first real frame is not slow."""
+        blank = np.zeros((imgsz, imgsz, 3), dtype=np.uint8)
+        with self._lock:
+            self.model(blank, verbose=False, device=self.device)
+            self.reader.readtext(blank[:64, :256], detail=0)
+
     def _ocr_plate(self, frame_bgr: np.ndarray, bbox: BBox) -> Optional[str]:
         x1, y1, x2, y2 = bbox
         try:
@@ -0,0 +1,126 @@
+import cv2
+import threading
+import logging
+import numpy as np
+from typing import Optional, List
+
+SESSION_SLOTS = ['IMAGE_1', 'IMAGE_2', 'IMAGE_3', 'IMAGE_4']
+
+
+class ImageMemoryBudget:
+    """Byte budget for encoded session images, shared by all DumpProcessors."""
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, n: int) -> bool:
+        with self._lock:
+            if self.used + n > self.max_bytes:
+                return False
+            self.used += n
+            return True
+
+    def release(self, n: int):
+        with self._lock:
+            self.used = max(0, self.used - n)
+
+
+class SessionImageBuffer:
+    """
+    Per-session capture buffer that keeps encoded JPEG bytes instead of raw frames.
+    A raw frame is only held between capture and the end of its background encode;
+    after that the slot keeps the JPEG bytes (if the shared budget allows) or just
+    the file path plus a small thumbnail. Frames are decoded lazily in decode_all()
+    when the merged image is composed.
+    """
+    def __init__(self, budget: Optional[ImageMemoryBudget] = None, thumb_width=160,
+                 logger: Optional[logging.Logger] = None):
+        self.budget = budget
+        self.thumb_width = thumb_width
+        self.log = logger or logging.getLogger("SessionImageBuffer")
+        self._slots = {k: None for k in SESSION_SLOTS}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def put(self, slot: str, frame) -> int:
+        """Store a raw frame until it is encoded. Returns the session generation for on_encoded()."""
+        with self._lock:
+            self._release(self._slots.get(slot))
+            self._slots[slot] = {'frame': frame, 'data': None, 'path': None, 'thumb': None}
+            return self._generation
+
+    def on_encoded(self, slot: str, path: str, data: bytes, generation: int):
+        """ImageWriter callback (worker thread): swap the raw frame for bytes/path."""
+        with self._lock:
+            entry = self._slots.get(slot)
+            if generation != self._generation or entry is None or entry['frame'] is None:
+                return # Session already finalized/reset
+            frame = entry['frame']
+
+        thumb = self._make_thumb(frame)
+        keep_bytes = self.budget.reserve(len(data)) if self.budget else True
+        if not keep_bytes:
+            self.log.warning(f"Session image budget full. {slot} kept on disk only: {path}")
+
+        with self._lock:
+            if generation != self._generation or self._slots.get(slot) is not entry:
+                if keep_bytes and self.budget: self.budget.release(len(data))
+                return
+            entry['data'] = data if keep_bytes else None
+            entry['path'] = path
+            entry['thumb'] = thumb
+            entry['frame'] = None
+
+    def has(self, slot: str) -> bool:
+        return self._slots.get(slot) is not None
+
+    def all_captured(self) -> bool:
+        return all(self._slots[k] is not None for k in SESSION_SLOTS)
+
+    def decode_all(self) -> List[Optional[np.ndarray]]:
+        """Decode every slot (in SESSION_SLOTS order) for merging. Missing slots are None."""
+        with self._lock:
+            entries = [dict(self._slots[k]) if self._slots[k] else None for k in SESSION_SLOTS]
+        return [self._decode(e) for e in entries]
+
+    def clear(self):
+        """Drop all slots and release their budget. Late encode callbacks are ignored."""
+        with self._lock:
+            for k in SESSION_SLOTS:
+                self._release(self._slots[k])
+                self._slots[k] = None
+            self._generation += 1
+
+    def memory_bytes(self) -> int:
+        total = 0
+        for e in list(self._slots.values()):
+            if not e: continue
+            if e['frame'] is not None: total += e['frame'].nbytes
+            if e['data']: total += len(e['data'])
+            if e['thumb'] is not None: total += e['thumb'].nbytes
+        return total
+
+    def _release(self, entry):
+        if entry and entry['data'] and self.budget:
+            self.budget.release(len(entry['data']))
+
+    def _make_thumb(self, frame):
+        try:
+            h, w = frame.shape[:2]
+            tw = min(self.thumb_width, w)
+            return cv2.resize(frame, (tw, max(1, int(h * tw / w))), interpolation=cv2.INTER_AREA)
+        except Exception:
+            return None
+
+    def _decode(self, entry):
+        if entry is None: return None
+        if entry['frame'] is not None:
+            return entry['frame'] # Encode still in flight
+        if entry['data']:
+            img = cv2.imdecode(np.frombuffer(entry['data'], dtype=np.uint8), cv2.IMREAD_COLOR)
+            if img is not None: return img
+        if entry['path']:
+            img = cv2.imread(entry['path'], cv2.IMREAD_COLOR)
+            if img is not None: return img
+        return entry['thumb']
@@ -0,0 +1,238 @@
+import time
+import random
+import logging
+import threading
+from typing import Callable, Optional, Dict, Tuple
+
+from source.orchestration.capture_backends import CaptureOptions
+
+# Stream states (shown in the UI)
+STREAM_CONNECTING = "CONNECTING"
+STREAM_LIVE = "LIVE"
+STREAM_RECONNECTING = "RECONNECTING"
+STREAM_OFF = "OFF"
+
+
+class CameraStream(threading.Thread):
+    """
+    Owns one capture and reads it on its own thread.
+
+    The newest frame is kept (frame, seq, time) and `frame_event` is set on
+    every new frame, so the processor waits on that instead of polling read().
+    Read failures on a live stream release the capture and reconnect with
+    exponential backoff (plus jitter); the wait between attempts is an Event
+    wait, so a dead camera costs no CPU. Video files (testing / fallback) are
+    paced to their own FPS (the capture rewinds them at the end).
+
+    Frames are grabbed continuously but only retrieved (converted to BGR) as
+    `options` allow: every frame ("full"), or decode_fps / idle_fps per second
+    ("on_demand"); set_idle() also switches backends that support it to
+    keyframe-only decoding.
+
+    open_fn() -> (capture, is_file) or (None, False), capture being an
+    OpenCVCapture / PyAVCapture; it decides RTSP vs fallback VDO.
+    """
+    def __init__(self, name, open_fn: Callable[[], Tuple[Optional[object], bool]], frame_event: threading.Event,
+                 options: Optional[CaptureOptions] = None, backoff_initial=1.0, backoff_max=60.0,
+                 stale_after=5.0, stable_after=10.0, logger: Optional[logging.Logger] = None):
+        super().__init__(name=f"Stream_{name}", daemon=True)
+        self.cam_name = name
+        self.open_fn = open_fn
+        self.options = options or CaptureOptions()
+        self.frame_event = frame_event
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stale_after = stale_after
+        self.stable_after = stable_after # Live this long before the backoff resets (flapping cameras)
+        self.log = logger or logging.getLogger(f"CameraStream_{name}")
+
+        self.state = STREAM_CONNECTING
+        self.is_file = False
+        self.idle = False
+        self.keyframe_only = False # Backend currently skips non-key frames
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._frame = None
+        self._seq = 0
+        self._frame_time = 0.0
+
+        # Health counters
+        self.read_latency_ms = 0.0 # EWMA of grab (+ retrieve)
+        self.failures = 0          # Consecutive failed connects/reads
+        self.reconnects = 0
+        self.next_retry = 0.0
+        self.fps = 0.0             # Grabbed frames/s
+        self.decode_fps = 0.0      # Retrieved (converted) frames/s
+        self._connected_at = 0.0
+
+    def latest(self):
+        """(frame, seq, capture time)."""
+        with self._lock:
+            return self._frame, self._seq, self._frame_time
+
+    def health(self) -> Dict:
+        now = time.time()
+        age = now - self._frame_time if self._frame_time else None
+        state = self.state
+        if state == STREAM_LIVE and age is not None and age > self.stale_after:
+            state = "STALE"
+        return {
+            'state': state,
+            'source': 'FILE' if self.is_file else 'RTSP',
+            'frame_age_s': round(age, 1) if age is not None else None,
+            'read_latency_ms': round(self.read_latency_ms, 1),
+            'fps': round(self.fps, 1),
+            'decode_fps': round(self.decode_fps, 1),
+            'mode': 'KEYFRAME' if self.keyframe_only else self.options.decode.upper(),
+            'failures': self.failures,
+            'reconnects': self.reconnects,
+            'retry_in_s': round(max(0.0, self.next_retry - now), 1) if self.state != STREAM_LIVE else 0.0,
+        }
+
+    def stop(self):
+        self._stop_event.set()
+
+    def set_idle(self, idle: bool):
+        """Station idle: decode less (applied by the stream thread)."""
+        self.idle = idle
+
+    def _retrieve_interval(self):
+        if self.options.decode == "full" or self.keyframe_only:
+            return 0.0 # Every grabbed frame (keyframe mode only yields keyframes)
+        fps = self.options.idle_fps if self.idle else self.options.decode_fps
+        return 1.0 / fps if fps > 0 else 0.0
+
+    def _wait_backoff(self):
+        delay = min(self.backoff_max, self.backoff_initial * (2 ** min(self.failures - 1, 10)))
+        delay *= random.uniform(0.8, 1.2) # Jitter: cameras on one NVR do not retry in lockstep
+        self.next_retry = time.time() + delay
+        self.log.warning(f"{self.cam_name}: {self.state}, retry in {delay:.1f}s (failures={self.failures})")
+        self._stop_event.wait(delay)
+
+    def run(self):
+        cap = None
+        frame_interval = 0.0
+        last_retrieve = 0.0
+        last_fps_t, fps_frames, fps_decoded = time.time(), 0, 0
+        while not self._stop_event.is_set():
+            # 1. (Re)connect
+            if cap is None:
+                try:
+                    cap, self.is_file = self.open_fn()
+                except Exception as e:
+                    self.log.error(f"{self.cam_name}: open failed: {e}")
+                    cap = None
+                if cap is None:
+                    self.failures += 1
+                    self.state = STREAM_OFF if self._seq == 0 else STREAM_RECONNECTING
+                    self._wait_backoff()
+                    continue
+                if self._seq:
+                    self.reconnects += 1
+                self.state = STREAM_LIVE
+                self._connected_at = time.time()
+                self.keyframe_only = False
+                src_fps = cap.fps() if self.is_file else 0
+                frame_interval = 1.0 / src_fps if src_fps and src_fps > 0 else (0.04 if self.is_file else 0.0)
+
+            # Keyframe-only decoding while the station is idle (if the backend supports it)
+            want_keyframes = self.idle and self.options.idle_keyframe_only
+            if want_keyframes != self.keyframe_only:
+                self.keyframe_only = cap.set_idle(want_keyframes) and want_keyframes
+
+            # 2. Grab (blocks on the network for RTSP), retrieve only when due
+            t0 = time.time()
+            ok = cap.grab()
+            frame = None
+            if ok and t0 - last_retrieve >= self._retrieve_interval():
+                ok, frame = cap.retrieve()
+                ok = ok and frame is not None
+                last_retrieve = t0
+            elapsed = time.time() - t0
+
+            if not ok:
+                self.failures += 1
+                self.state = STREAM_RECONNECTING
+                cap.release()
+                cap = None
+                self._wait_backoff()
+                continue
+
+            if self.failures and t0 - self._connected_at > self.stable_after:
+                self.failures = 0
+            self.read_latency_ms = 0.8 * self.read_latency_ms + 0.2 * elapsed * 1000
+            if frame is not None:
+                with self._lock:
+                    self._frame = frame
+                    self._seq += 1
+                    self._frame_time = time.time()
+                self.frame_event.set()
+                fps_decoded += 1
+
+            fps_frames += 1
+            if t0 - last_fps_t >= 2.0:
+                self.fps = fps_frames / (t0 - last_fps_t)
+                self.decode_fps = fps_decoded / (t0 - last_fps_t)
+                last_fps_t, fps_frames, fps_decoded = t0, 0, 0
+
+            # 3. Files play at their own speed instead of as fast as they decode
+            if frame_interval and elapsed < frame_interval:
+                self._stop_event.wait(frame_interval - elapsed)
+
+        if cap is not None:
+            cap.release()
+        self.state = STREAM_OFF
+
+
+class StreamSupervisor:
+    """
+    The camera streams of one DumpProcessor.
+
+    wait_frames(timeout) blocks until at least one stream has a frame the caller
+    has not seen and returns {channel: frame} with the newest frame of every
+    stream (new or not, but not older than stale_after, so a dead camera's last
+    frame is not analysed forever), so the processor loop sleeps while cameras are silent.
+    """
+    def __init__(self, logger: Optional[logging.Logger] = None, **stream_kwargs):
+        self.log = logger or logging.getLogger("StreamSupervisor")
+        self.frame_event = threading.Event()
+        self.streams: Dict[str, CameraStream] = {}
+        self._stream_kwargs = stream_kwargs
+        self._seen = {}
+
+    def add(self, channel, open_fn, options: Optional[CaptureOptions] = None):
+        s = CameraStream(channel, open_fn, self.frame_event, options=options, logger=self.log, **self._stream_kwargs)
+        self.streams[channel] = s
+        s.start()
+        return s
+
+    def wait_frames(self, timeout=0.5):
+        """{channel: frame} when something new arrived within timeout, else None."""
+        if not self.frame_event.wait(timeout):
+            return None
+        self.frame_event.clear()
+        frames, fresh = {}, False
+        now = time.time()
+        for ch, s in self.streams.items():
+            frame, seq, frame_time = s.latest()
+            if frame is None or now - frame_time > s.stale_after: continue
+            frames[ch] = frame
+            if seq != self._seen.get(ch):
+                self._seen[ch] = seq
+                fresh = True
+        return frames if fresh else None
+
+    def states(self) -> Dict[str, str]:
+        """Coarse per-channel state (changes rarely; suitable for the state hub)."""
+        return {ch: s.health()['state'] for ch, s in self.streams.items()}
+
+    def health(self) -> Dict[str, Dict]:
+        return {ch: s.health() for ch, s in self.streams.items()}
+
+    def set_idle(self, idle: bool):
+        for s in self.streams.values():
+            s.set_idle(idle)
+
+    def stop(self):
+        for s in self.streams.values():
+            s.stop()
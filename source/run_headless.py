@@ -0,0 +1,46 @@
+import os
+import sys
+import logging
+import threading
+
+# Same capture options as the Qt entry point (run_realtime.py)
+os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = "rtsp_transport;tcp|flags;low_delay|max_delay;500000|fflags;genpts|reorder_queue_size;100"
+
+# Add project root to path for absolute imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ssl
+ssl._create_default_https_context = ssl._create_unverified_context
+
+from source.core.system import SugarcaneSystem
+from source.services.web_dashboard import WebDashboard
+from source.services.cloud_sync import CloudSyncWorker
+
+if __name__ == "__main__":
+    # Headless edge box: no QApplication / QtMainWindow, monitoring over HTTP
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    log = logging.getLogger("Headless")
+
+    # 1. Initialize Core System
+    system = SugarcaneSystem()
+    system.start_processors()
+
+    # 2. Cloud Sync in a plain thread (no Qt event loop; signals call the log directly)
+    cloud_worker = None
+    if system.config.getboolean("WEB", "cloud_sync", fallback=True):
+        cloud_worker = CloudSyncWorker()
+        cloud_worker.status_updated.connect(lambda msg: log.info(f"Cloud Agent: {msg}"))
+        cloud_worker.progress_updated.connect(lambda up, dl: log.info(f"Cloud Agent: Up {up}, Del {dl}"))
+        cloud_worker.error_occurred.connect(lambda err: log.error(f"Cloud Agent: {err}"))
+        cloud_thread = threading.Thread(target=cloud_worker.run, name="CloudSync", daemon=True)
+        cloud_thread.start()
+
+    # 3. Web dashboard (blocks until Ctrl+C / SIGTERM)
+    dashboard = WebDashboard.from_config(system.config, system, logger=log)
+    try:
+        dashboard.run()
+    finally:
+        log.info("Shutting down...")
+        if cloud_worker:
+            cloud_worker.stop()
+        system.stop_processors()
@@ -13,16 +13,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import ssl
 ssl._create_default_https_context = ssl._create_unverified_context
 
-from source.core.system import SugarcaneSystem
-from source.ui.qt_main import QtMainWindow
 from PySide6.QtWidgets import QApplication
 
 if __name__ == "__main__":
-    # 1. Initialize Core System
-    system = SugarcaneSystem()
-    system.start_processors()
-    
-    # 2. Launch GUI (Qt)
+    # Staged startup: window and camera streams first, AI models load in the background
+    # (ultralytics / torch / easyocr are only imported by the EngineLoader threads)
     app = QApplication(sys.argv)
     
     # Apply global stylesheet if needed (e.g. font)
@@ -30,6 +25,14 @@ if __name__ == "__main__":
     font.setFamily("Segoe UI")
     app.setFont(font)
     
+    from source.core.system import SugarcaneSystem
+    from source.ui.qt_main import QtMainWindow
+    
+    # 1. Initialize Core System (returns before the models are loaded)
+    system = SugarcaneSystem()
+    system.start_processors()
+    
+    # 2. Launch GUI (Qt)
     window = QtMainWindow(system)
     window.show()
     
@@ -1,14 +1,18 @@
 import os
+import sys
 import time
-import shutil
 import logging
-import boto3
-import cv2
-import json
-import numpy as np
 import configparser
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
+
+# Allow running as a standalone script (project root on path)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from source.services.s3_uploader import S3UploadEngine
+from source.services.aws_clients import get_aws_provider
+# Shared corruption check (re-exported for existing importers)
+from source.utils.image_quality import is_corrupted, assess_jpeg, QUALITY_OK
+from source.services.upload_scheduler import PRIORITY_RESULT
+from source.utils.hash_index import PerceptualHashIndex, LakeDeduplicator
 
 # ==============================================================================
 # CONFIGURATION (DYNAMIC)
@@ -71,48 +75,12 @@ def load_config(config_path="config.txt", secrets_path="secrets.ini"):
     logging.error("Could not find config.txt!")
     return None
 
-def get_s3_client():
-    config = load_config()
-    aws_access_key = None
-    aws_secret_key = None
-    region = AWS_REGION
-
-    if config and 'AWS' in config:
-        aws_access_key = config['AWS'].get('access_key_id', '').strip()
-        aws_secret_key = config['AWS'].get('secret_access_key', '').strip()
-        region = config['AWS'].get('region', AWS_REGION).strip()
-
-    if aws_access_key and aws_secret_key:
-        return boto3.client(
-            's3',
-            region_name=region,
-            aws_access_key_id=aws_access_key,
-            aws_secret_access_key=aws_secret_key
-        )
-    
-    # Fallback to env vars or profile (standard boto3 behavior)
-    return boto3.client('s3', region_name=AWS_REGION)
-
-# ==============================================================================
-# FILTERING LOGIC (Reused)
-# ==============================================================================
-def is_corrupted(image, threshold=0.05):
-    """Checks for image corruption (White/Pink/Green blocks)."""
-    if image is None: return True
-    
-    # 1. White
-    white_mask = np.all(image > 225, axis=-1)
-    if (np.sum(white_mask) / white_mask.size) > threshold: return True
-    
-    # 2. Pink (High R, High B, Low G)
-    pink_mask = (image[:,:,2] > 200) & (image[:,:,0] > 200) & (image[:,:,1] < 100)
-    if (np.sum(pink_mask) / pink_mask.size) > threshold: return True
-        
-    # 3. Green (High G)
-    green_mask = (image[:,:,1] > 200) & (image[:,:,2] < 100) & (image[:,:,0] < 100)
-    if (np.sum(green_mask) / green_mask.size) > threshold: return True
-        
-    return False
+def get_s3_client(max_pool_connections=10):
+    """
+    Shared S3 client (config parsed once, client reused across batches and
+    threads; rebuilt only when the [AWS] settings change).
+    """
+    return get_aws_provider().client('s3', max_pool_connections=max_pool_connections)
 
 # ==============================================================================
 # CORE LOGIC: SYNCHRONIZATION & UPLOAD
@@ -132,23 +100,16 @@ def parse_timestamp(filename):
         pass
     return None
 
-def process_batch(factory, milling_process, source_root):
-    logging.info(f"Starting Batch Process for {factory}...")
-    
-    try:
-        s3 = get_s3_client()
-    except Exception as e:
-        logging.error(f"AWS Failed: {e}")
-        return
-
-    # 1. Scan ViewTypes (LPR, TopView)
+def iter_snap_files(factory, source_root):
+    """
+    Walks images/{factory}/raw_images/{ViewType}/ch{N}/{Date}/filename.
+    Yields (local_path, s3_key) for every snapshot on disk.
+    """
     if not os.path.exists(source_root): return
     
+    # 1. Scan ViewTypes (LPR, TopView)
     view_types = [d for d in os.listdir(source_root) if os.path.isdir(os.path.join(source_root, d))]
     
-    total_uploaded = 0
-    total_deleted = 0
-    
     for view_type in view_types:
         view_path = os.path.join(source_root, view_type)
         
@@ -163,29 +124,73 @@ def process_batch(factory, milling_process, source_root):
             
             for date_folder in dates:
                 date_path = os.path.join(ch_path, date_folder)
-                files = [f for f in os.listdir(date_path) if f.endswith('.jpg')]
-                
-                for filename in files:
-                    local_path = os.path.join(date_path, filename)
-                    
+                for filename in os.listdir(date_path):
+                    if not filename.endswith('.jpg'): continue
                     # S3 Key: images/{factory}/raw_images/{view_type}/{ch}/{date}/{filename}
                     s3_key = f"images/{factory}/raw_images/{view_type}/{ch}/{date_folder}/{filename}"
-                    
-                    try:
-                        # Quality Check
-                        img = cv2.imread(local_path, cv2.IMREAD_REDUCED_COLOR_2)
-                        if is_corrupted(img):
-                            os.remove(local_path)
-                            total_deleted += 1
-                            continue
-                            
-                        # Upload
-                        s3.upload_file(local_path, S3_BUCKET, s3_key)
-                        os.remove(local_path)
-                        total_uploaded += 1
-                        
-                    except Exception as e:
-                        logging.error(f"Upload/Check Failed {filename}: {e}")
+                    yield os.path.join(date_path, filename), s3_key
+
+def snap_s3_key(factory, source_root, local_path):
+    """S3 key for a snapshot under source_root (None if the path is elsewhere)."""
+    rel = os.path.relpath(os.path.abspath(local_path), os.path.abspath(source_root))
+    if rel.startswith(".."): return None
+    return f"images/{factory}/raw_images/" + rel.replace(os.sep, "/")
+
+def result_s3_key(factory, local_path):
+    """S3 key for a merged session image: images/{factory}/results/{YYYYMMDD}/{filename}"""
+    date_folder = datetime.fromtimestamp(os.path.getmtime(local_path)).strftime("%Y%m%d")
+    return f"images/{factory}/results/{date_folder}/{os.path.basename(local_path)}"
+
+def iter_result_files(factory, results_dir):
+    """
+    Yields (local_path, s3_key, quality, priority) for merged session images.
+    They are kept locally (the UI shows them), so only the manifest prevents re-uploads.
+    """
+    if not os.path.isdir(results_dir): return
+    for entry in os.scandir(results_dir):
+        if entry.name.startswith("MERGED_") and entry.name.endswith(".jpg"):
+            yield entry.path, result_s3_key(factory, entry.path), QUALITY_OK, PRIORITY_RESULT
+
+def passes_quality_check(local_path):
+    """
+    Pre-upload check for files without a stored capture-time verdict:
+    False if the snapshot is corrupted (deleted instead of uploaded).
+    Uses the 1/8 reduced JPEG decode.
+    """
+    return not assess_jpeg(local_path, flat_std=None).corrupted
+
+def build_upload_engine(config, logger=None):
+    workers = config.getint("UPLOAD", "workers", fallback=8) if config else 8
+    s3 = get_s3_client(max_pool_connections=workers * 2)
+    if config is None:
+        config = configparser.ConfigParser()
+    engine = S3UploadEngine.from_config(config, s3, S3_BUCKET, logger=logger)
+
+    # Skip snaps already represented in the data lake (idle stations repeat the same frame)
+    if config.getboolean("DEDUP", "enabled", fallback=True):
+        index = PerceptualHashIndex(config.get("DEDUP", "index_path", fallback="hash_index.db"),
+                                    max_age_days=config.getint("DEDUP", "max_age_days", fallback=30),
+                                    logger=logger)
+        engine.dedup = LakeDeduplicator(index, radius=config.getint("DEDUP", "lake_radius", fallback=4))
+    return engine
+
+def process_batch(factory, milling_process, source_root, engine=None):
+    logging.info(f"Starting Batch Process for {factory}...")
+    
+    try:
+        if engine is None:
+            engine = build_upload_engine(get_aws_provider().get_config())
+        else:
+            # Same cached client unless the AWS settings changed since the last batch
+            engine.client = get_s3_client(max_pool_connections=engine.max_workers * 2)
+    except Exception as e:
+        logging.error(f"AWS Failed: {e}")
+        return
+
+    total_uploaded, total_deleted = engine.upload_all(
+        iter_snap_files(factory, source_root),
+        pre_check=passes_quality_check
+    )
 
     logging.info(f"Batch Complete. Uploaded: {total_uploaded}, Cleaned/Deleted: {total_deleted}")
 
@@ -206,10 +211,12 @@ def main():
     logging.info(f"Service Started. Monitoring {source_root}")
     logging.info(f"Sync Logic: Recursive Path Scan. Batch Interval: {BATCH_INTERVAL_SECONDS}s")
 
+    engine = build_upload_engine(config)
+
     while True:
         try:
             start_time = time.time()
-            process_batch(factory, None, source_root)
+            process_batch(factory, None, source_root, engine=engine)
             
             elapsed = time.time() - start_time
             sleep_time = max(0, BATCH_INTERVAL_SECONDS - elapsed)
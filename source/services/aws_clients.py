@@ -0,0 +1,113 @@
+import os
+import time
+import logging
+import threading
+import configparser
+from typing import Optional, List
+
+import boto3
+from botocore.config import Config as BotoConfig
+
+DEFAULT_REGION = "ap-southeast-1"
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class AwsClientProvider:
+    """
+    Process-wide source of boto3 clients.
+
+    config.txt / secrets.ini are parsed once and only re-read when their
+    modification time changes (checked at most every `check_interval` seconds).
+    Clients are cached per (service, pool size) and shared across threads
+    (boto3 clients are thread-safe), so connections and TLS sessions are reused
+    between batches. A change to the [AWS] section rebuilds the clients.
+    """
+    def __init__(self, config_paths: Optional[List[str]] = None, check_interval=30.0,
+                 logger: Optional[logging.Logger] = None):
+        self.config_paths = config_paths or [os.path.join(PROJECT_ROOT, "config.txt"),
+                                             os.path.join(PROJECT_ROOT, "secrets.ini")]
+        self.check_interval = check_interval
+        self.log = logger or logging.getLogger("AwsClientProvider")
+        self._lock = threading.Lock()
+        self._config = None
+        self._mtimes = None
+        self._aws_signature = None
+        self._last_check = 0.0
+        self._clients = {}
+
+    def _stat(self):
+        return tuple(os.path.getmtime(p) if os.path.exists(p) else None for p in self.config_paths)
+
+    def _refresh(self, force=False):
+        """Re-read config if the files changed. Caller holds the lock."""
+        now = time.time()
+        if not force and self._config is not None and now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        mtimes = self._stat()
+        if self._config is not None and mtimes == self._mtimes:
+            return
+
+        config = configparser.ConfigParser()
+        config.read([p for p in self.config_paths if os.path.exists(p)], encoding='utf-8')
+        self._config = config
+        self._mtimes = mtimes
+
+        signature = tuple(sorted(config['AWS'].items())) if 'AWS' in config else ()
+        if signature != self._aws_signature:
+            if self._aws_signature is not None:
+                self.log.info("AWS settings changed, rebuilding clients")
+            self._aws_signature = signature
+            self._clients.clear()
+
+    def get_config(self) -> configparser.ConfigParser:
+        with self._lock:
+            self._refresh()
+            return self._config
+
+    def client(self, service="s3", max_pool_connections=10):
+        with self._lock:
+            self._refresh()
+            key = (service, max_pool_connections)
+            client = self._clients.get(key)
+            if client is None:
+                client = self._build(service, max_pool_connections)
+                self._clients[key] = client
+            return client
+
+    def _build(self, service, max_pool_connections):
+        aws = self._config['AWS'] if 'AWS' in self._config else {}
+        access_key = aws.get('access_key_id', '').strip()
+        secret_key = aws.get('secret_access_key', '').strip()
+        region = aws.get('region', DEFAULT_REGION).strip() or DEFAULT_REGION
+        # Optional: local S3 stand-in (MinIO / moto server) for testing
+        endpoint_url = (aws.get('endpoint_url', '').strip() or None) if service == 's3' else None
+
+        boto_cfg = BotoConfig(
+            max_pool_connections=max_pool_connections,
+            retries={
+                'max_attempts': int(aws.get('max_attempts', 5)),
+                'mode': aws.get('retry_mode', 'standard').strip()
+            },
+            connect_timeout=float(aws.get('connect_timeout', 10)),
+            read_timeout=float(aws.get('read_timeout', 60)),
+            tcp_keepalive=True
+        )
+
+        kwargs = dict(region_name=region, endpoint_url=endpoint_url, config=boto_cfg)
+        if access_key and secret_key:
+            kwargs.update(aws_access_key_id=access_key, aws_secret_access_key=secret_key)
+        # Otherwise: env vars or profile (standard boto3 behavior)
+        self.log.info(f"Creating {service} client (region={region}, pool={max_pool_connections})")
+        return boto3.client(service, **kwargs)
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+def get_aws_provider() -> AwsClientProvider:
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = AwsClientProvider()
+        return _provider
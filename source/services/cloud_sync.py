@@ -1,16 +1,13 @@
 import os
 import time
-import logging
-import boto3
-import cv2
-import json
-import numpy as np
-import configparser
-from datetime import datetime
 from PySide6.QtCore import QObject, Signal, QThread
 
 # Reuse existing Logic from ai_batch_processor (adapted for Class)
-from source.services.ai_batch_processor import load_config, is_corrupted, parse_timestamp, get_s3_client
+from source.services.ai_batch_processor import (load_config, get_s3_client, iter_snap_files, passes_quality_check,
+                                                build_upload_engine, snap_s3_key, iter_result_files, result_s3_key)
+from source.services.upload_scheduler import PRIORITY_RESULT, PRIORITY_SNAP
+from source.utils.image_quality import QUALITY_OK
+from source.services.snap_watcher import get_snap_notifier, start_snap_watcher
 
 class CloudSyncWorker(QObject):
     """
@@ -33,6 +30,7 @@ class CloudSyncWorker(QObject):
         root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         # New Requirement: ./images/{factory}/raw_images
         self.source_root = os.path.join(root, "images", self.factory, "raw_images")
+        self.results_dir = os.path.join(root, "results") # Merged session images (DumpProcessor)
         
         # Fallback support for old path (optional, but good to keep for safety)
         if not os.path.exists(self.source_root):
@@ -41,12 +39,19 @@ class CloudSyncWorker(QObject):
         else:
              self.source_root_legacy = None
         
+        # Full-tree scan is only a reconciliation sweep; new snaps arrive via the notifier
         self.batch_interval = 3600 # 1 Hour
+        self.engine = None # Parallel S3 uploader, built lazily (needs AWS)
+        self.notifier = get_snap_notifier()
+        self.watch_mode = self.config.get('CLOUD_SYNC', 'watch_mode', fallback='auto')
+        self.poll_interval = self.config.getfloat('CLOUD_SYNC', 'poll_interval', fallback=5.0)
+        self.watcher = None
 
     def run(self):
         """Main Loop running in QThread."""
         self.status_updated.emit(f"Service Started. Monitoring: {self.source_root}")
         
+        next_sweep = 0
         while self._is_running:
             try:
                 if not os.path.exists(self.source_root):
@@ -57,92 +62,95 @@ class CloudSyncWorker(QObject):
                         time.sleep(10)
                         continue
 
-                self.status_updated.emit("Starting Batch Sync...")
-                start_time = time.time()
-                
-                # Run the Processor
-                self._process_batch()
-                
-                elapsed = time.time() - start_time
-                sleep_time = max(0, self.batch_interval - elapsed)
-                
-                # Sleep Loop (responsive to stop)
-                wake_time = time.time() + sleep_time
-                while time.time() < wake_time and self._is_running:
-                    remaining = int((wake_time - time.time()) / 60)
-                    self.status_updated.emit(f"Sync Complete. Next run in {remaining} min.")
-                    QThread.msleep(1000) # Sleep 1 sec
+                if self.watcher is None:
+                    self.watcher = start_snap_watcher(self.source_root, self.notifier, mode=self.watch_mode,
+                                                      poll_interval=self.poll_interval)
+
+                # 1. Reconciliation sweep (startup + hourly): catches anything the watcher missed
+                if time.time() >= next_sweep:
+                    self.status_updated.emit("Starting Reconciliation Sync...")
+                    self._process_batch()
+                    next_sweep = time.time() + self.batch_interval
+                    self.status_updated.emit(f"Sync Complete. Live sync active (next sweep in {self.batch_interval // 60} min).")
+
+                # 2. Near-real-time delivery of newly written snaps
+                self._process_notified()
                     
             except Exception as e:
                 self.error_occurred.emit(str(e))
                 self.status_updated.emit("Error. Retrying in 1 min.")
                 QThread.sleep(60)
 
+        if self.watcher:
+            self.watcher.stop()
+        if self.engine and self.engine.transform:
+            self.engine.transform.shutdown()
+
+    def _process_notified(self):
+        """Upload snaps announced by DumpProcessor or the filesystem watcher."""
+        events = self.notifier.drain(timeout=1.0)
+        if not events: return
+
+        # One entry per file; a bare watcher event never replaces the processor's meta
+        merged = {}
+        for path, meta in events:
+            merged.setdefault(path, {}).update(meta)
+
+        items = {}
+        for path, meta in merged.items():
+            if meta.get('kind') == 'result':
+                if os.path.exists(path):
+                    items[path] = (path, result_s3_key(self.factory, path), QUALITY_OK, PRIORITY_RESULT)
+                continue
+            key = snap_s3_key(self.factory, self.source_root, path)
+            if key and os.path.exists(path):
+                # Capture-time quality verdict is persisted in the manifest,
+                # so these files are never decoded again before upload
+                items[path] = (path, key, meta.get('quality'), PRIORITY_SNAP,
+                               {k: v for k, v in meta.items() if k != 'quality'})
+        if not items or self.engine is None: return
+
+        uploaded, deleted = self.engine.upload_all(
+            items.values(),
+            pre_check=passes_quality_check,
+            should_continue=lambda: self._is_running,
+            retry_failed=False, # Failed uploads and the held-back backlog wait for the hourly sweep
+            only_items=True
+        )
+        self.progress_updated.emit(uploaded, deleted)
+
     def stop(self):
         self._is_running = False
 
     def _process_batch(self):
         """
         New Structure: images/{factory}/raw_images/{ViewType}/ch{N}/{Date}/filename
-        Recursively scan and upload.
+        Recursively scan and upload in parallel (resumable via the upload manifest).
         """
-        factory = self.factory
-        source_root = self.source_root
-        
         try:
-            s3 = get_s3_client()
+            if self.engine is None:
+                self.engine = build_upload_engine(self.config)
+            else:
+                # Cached client; only replaced if the AWS settings changed
+                self.engine.client = get_s3_client(max_pool_connections=self.engine.max_workers * 2)
         except Exception as e:
             self.error_occurred.emit(f"AWS Connection Failed: {e}")
             return
 
-        total_uploaded = 0
-        total_deleted = 0
-        
-        # 1. Scan ViewTypes (LPR, TopView)
-        if not os.path.exists(source_root): return
-        
-        view_types = [d for d in os.listdir(source_root) if os.path.isdir(os.path.join(source_root, d))]
-        
-        for view_type in view_types:
-            view_path = os.path.join(source_root, view_type)
-            
-            # 2. Scan Channels (ch101, ch201...)
-            channels = [d for d in os.listdir(view_path) if os.path.isdir(os.path.join(view_path, d))]
-            
-            for ch in channels:
-                ch_path = os.path.join(view_path, ch)
-                
-                # 3. Scan Date Folders
-                dates = [d for d in os.listdir(ch_path) if os.path.isdir(os.path.join(ch_path, d))]
-                
-                for date_folder in dates:
-                    if not self._is_running: return
-                    
-                    date_path = os.path.join(ch_path, date_folder)
-                    files = [f for f in os.listdir(date_path) if f.endswith('.jpg')]
-                    
-                    for filename in files:
-                        if not self._is_running: return
-                        
-                        local_path = os.path.join(date_path, filename)
-                        
-                        # S3 Key: images/{factory}/raw_images/{view_type}/{ch}/{date}/{filename}
-                        s3_key = f"images/{factory}/raw_images/{view_type}/{ch}/{date_folder}/{filename}"
-                        
-                        try:
-                            # Quality Check
-                            img = cv2.imread(local_path, cv2.IMREAD_REDUCED_COLOR_2)
-                            if is_corrupted(img):
-                                os.remove(local_path)
-                                total_deleted += 1
-                                continue
-                                
-                            # Upload
-                            s3.upload_file(local_path, "mitrphol-ai-sugarcane-data-lake", s3_key)
-                            os.remove(local_path)
-                            total_uploaded += 1
-                            
-                        except Exception as e:
-                            logging.error(f"Upload/Check Failed {filename}: {e}")
-
-        self.progress_updated.emit(total_uploaded, total_deleted)
+        # Merged results first (scheduler priority), then raw snaps
+        self.engine.upload_all(
+            iter_result_files(self.factory, self.results_dir),
+            should_continue=lambda: self._is_running
+        )
+
+        if self.engine.transform:
+            self.engine.transform.purge_originals()
+
+        if not os.path.exists(self.source_root): return
+
+        self.engine.upload_all(
+            iter_snap_files(self.factory, self.source_root),
+            pre_check=passes_quality_check,
+            progress=self.progress_updated.emit,
+            should_continue=lambda: self._is_running
+        )
@@ -0,0 +1,168 @@
+import io
+import gzip
+import json
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime
+from typing import Optional, Dict, List
+
+from source.services.upload_scheduler import PRIORITY_RECORD
+
+# Optional: Parquet output (falls back to NDJSON.gz when pyarrow is missing)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+class DataLakeRecordBatcher:
+    """
+    Accumulates data-lake log records and writes them as few, larger objects
+    instead of one tiny JSON file per image.
+
+    Records are grouped by partition (factory / capture date) and flushed when a
+    partition reaches `max_records` / `max_bytes`, or is older than `max_age`
+    seconds. Objects land under
+        tables/{table}/site={factory}/dt={YYYY-MM-DD}/part-....json.gz
+    which the existing OpenX JSON SerDe table reads as-is (gzip is detected from
+    the extension). fmt="parquet" writes to a separate `{table}_parquet` prefix,
+    since Parquet files cannot share a location with the JSON table.
+    """
+    def __init__(self, client, bucket: str, table: str, fmt="ndjson", max_records=5000,
+                 max_bytes=8 * 1024 * 1024, max_age=60.0, scheduler=None, logger: Optional[logging.Logger] = None):
+        self.client = client
+        self.bucket = bucket
+        self.table = table
+        self.log = logger or logging.getLogger("DataLakeRecordBatcher")
+        if fmt == "parquet" and pa is None:
+            self.log.warning("pyarrow not installed, writing NDJSON.gz instead of Parquet")
+            fmt = "ndjson"
+        self.fmt = fmt
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.scheduler = scheduler # Optional UploadScheduler (records share the bandwidth cap)
+
+        self._lock = threading.Lock()
+        self._buffers: Dict[tuple, dict] = {} # (factory, date) -> {'lines', 'bytes', 'since'}
+        self._timer = None
+        self._running = False
+
+    @classmethod
+    def from_config(cls, config, client, bucket, table, scheduler=None, logger=None):
+        return cls(
+            client, bucket, table,
+            fmt=config.get("DATALAKE", "record_format", fallback="ndjson"),
+            max_records=config.getint("DATALAKE", "max_records", fallback=5000),
+            max_bytes=config.getint("DATALAKE", "max_object_mb", fallback=8) * 1024 * 1024,
+            max_age=config.getfloat("DATALAKE", "max_age_seconds", fallback=60.0),
+            scheduler=scheduler,
+            logger=logger
+        )
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+    def add(self, record: dict):
+        key = (record.get("factory", "unknown"), self._partition_date(record))
+        line = json.dumps(record, separators=(",", ":"))
+        ready = None
+        with self._lock:
+            buf = self._buffers.get(key)
+            if buf is None:
+                buf = self._buffers[key] = {'lines': [], 'bytes': 0, 'since': time.time()}
+            buf['lines'].append(line)
+            buf['bytes'] += len(line) + 1
+            if len(buf['lines']) >= self.max_records or buf['bytes'] >= self.max_bytes:
+                ready = (key, self._buffers.pop(key))
+        if ready:
+            self._write(*ready)
+
+    def flush(self, force=True):
+        """Write out buffered partitions (only those older than max_age unless force)."""
+        now = time.time()
+        with self._lock:
+            due = [k for k, b in self._buffers.items() if force or now - b['since'] >= self.max_age]
+            batches = [(k, self._buffers.pop(k)) for k in due]
+        for key, buf in batches:
+            self._write(key, buf)
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(len(b['lines']) for b in self._buffers.values())
+
+    # ------------------------------------------------------------------
+    # Time-based flushing (long-running callers)
+    # ------------------------------------------------------------------
+    def start(self):
+        self._running = True
+        self._schedule()
+        return self
+
+    def _schedule(self):
+        if not self._running: return
+        self._timer = threading.Timer(max(1.0, self.max_age / 4), self._tick)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _tick(self):
+        try:
+            self.flush(force=False)
+        except Exception as e:
+            self.log.error(f"Periodic record flush failed: {e}")
+        self._schedule()
+
+    def close(self):
+        self._running = False
+        if self._timer: self._timer.cancel()
+        self.flush(force=True)
+
+    # ------------------------------------------------------------------
+    # Object writing
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _partition_date(record) -> str:
+        ts = record.get("captured_at") or ""
+        try:
+            return datetime.fromisoformat(ts.rstrip("Z")).strftime("%Y-%m-%d")
+        except ValueError:
+            return datetime.now().strftime("%Y-%m-%d")
+
+    def _object_key(self, factory, date, ext):
+        name = f"part-{datetime.now().strftime('%Y%m%d_%H%M%S')}-{uuid.uuid4().hex[:8]}.{ext}"
+        table = self.table if self.fmt == "ndjson" else f"{self.table}_parquet"
+        return f"tables/{table}/site={factory}/dt={date}/{name}"
+
+    def _encode(self, lines: List[str]):
+        if self.fmt == "parquet":
+            table = pa.Table.from_pylist([json.loads(l) for l in lines])
+            out = io.BytesIO()
+            pq.write_table(table, out, compression="snappy")
+            return out.getvalue(), "parquet", "application/octet-stream"
+        body = gzip.compress(("\n".join(lines) + "\n").encode("utf-8"), compresslevel=6)
+        return body, "json.gz", "application/json"
+
+    def _write(self, key, buf):
+        factory, date = key
+        try:
+            body, ext, content_type = self._encode(buf['lines'])
+            if self.scheduler and not self.scheduler.acquire(PRIORITY_RECORD, len(body)):
+                raise RuntimeError("held back by upload scheduler")
+            s3_key = self._object_key(factory, date, ext)
+            self.client.put_object(Bucket=self.bucket, Key=s3_key, Body=body, ContentType=content_type)
+            self.log.info(f"Data lake records: {len(buf['lines'])} -> s3://{self.bucket}/{s3_key} ({len(body)} bytes)")
+        except Exception as e:
+            self.log.error(f"Record flush failed for {factory}/{date} ({len(buf['lines'])} records): {e}")
+            # Put back so the next flush retries them
+            with self._lock:
+                cur = self._buffers.get(key)
+                if cur is None:
+                    self._buffers[key] = buf
+                else:
+                    cur['lines'][:0] = buf['lines']
+                    cur['bytes'] += buf['bytes']
+                    cur['since'] = min(cur['since'], buf['since'])
@@ -0,0 +1,207 @@
+import os
+import json
+import uuid
+import time
+import queue
+import threading
+import logging
+from enum import Enum
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+
+class EventType(str, Enum):
+    SESSION_OPENED = "SESSION_OPENED"
+    SESSION_UPDATED = "SESSION_UPDATED"
+    STATE_TRANSITION = "STATE_TRANSITION"
+    IMAGE_CAPTURED = "IMAGE_CAPTURED"
+
+
+@dataclass
+class LogEvent:
+    event_type: EventType
+    session_uuid: str
+    payload: Dict[str, Any] = field(default_factory=dict)
+    ts: str = field(default_factory=lambda: datetime.now().isoformat(" "))
+
+    def to_json(self) -> str:
+        d = asdict(self)
+        d['event_type'] = self.event_type.value
+        return json.dumps(d, default=str)
+
+    @staticmethod
+    def from_json(line: str) -> "LogEvent":
+        d = json.loads(line)
+        return LogEvent(EventType(d['event_type']), d['session_uuid'], d.get('payload', {}), d['ts'])
+
+
+class EventLogWriter(threading.Thread):
+    """
+    Asynchronous, batched writer for session/state/image logging.
+    Processors enqueue typed events (never touching disk), the writer drains
+    the queue in batches, appends them to a spill file for crash safety and
+    commits them with executemany in a single transaction.
+
+    Exposes the same methods as DatabaseManager (create_session, update_session,
+    log_state_transition, log_image) so it can be passed wherever the DB was.
+    """
+    def __init__(self, db, spill_path="event_log.spill", batch_size=200, flush_interval=1.0, max_pending=20000,
+                 logger=None):
+        super().__init__(name="EventLogWriter", daemon=True)
+        self.db = db
+        self.spill_path = spill_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.log = logger or logging.getLogger("EventLogWriter")
+
+        self._queue = queue.Queue()
+        self._pending = [] # Spilled but not yet committed (previous flush failed)
+        # Long DB outage: beyond max_pending uncommitted events are kept only in the
+        # spill file, which is then replayed as a whole (apply_events is idempotent)
+        self.max_pending = max_pending
+        self._spill_only = False
+        self._retry_at = 0.0
+        self._retry_delay = 0.0
+        self._running = True
+        self._stopped = threading.Event()
+
+    # --- Producer API (called from processor threads, non-blocking) ---
+
+    def create_session(self, dump_id: str) -> str:
+        session_uuid = str(uuid.uuid4())
+        self._queue.put(LogEvent(EventType.SESSION_OPENED, session_uuid, {'dump_id': dump_id}))
+        return session_uuid
+
+    def update_session(self, session_uuid: str, **kwargs):
+        if not kwargs: return
+        payload = {k: (v.isoformat(" ") if isinstance(v, datetime) else v) for k, v in kwargs.items()}
+        self._queue.put(LogEvent(EventType.SESSION_UPDATED, session_uuid, payload))
+
+    def log_state_transition(self, session_uuid: str, state_from: str, state_to: str):
+        self._queue.put(LogEvent(EventType.STATE_TRANSITION, session_uuid,
+                                 {'state_from': state_from, 'state_to': state_to}))
+
+    def log_image(self, session_uuid: str, image_type: str, image_path: str):
+        self._queue.put(LogEvent(EventType.IMAGE_CAPTURED, session_uuid,
+                                 {'image_type': image_type, 'image_path': image_path}))
+
+    def __getattr__(self, name):
+        # Reads (get_factory_info, get_cameras_for_dump...) go straight to the DB
+        if name.startswith('_') or name == 'db':
+            raise AttributeError(name)
+        return getattr(self.db, name)
+
+    # --- Writer Thread ---
+
+    def run(self):
+        self._replay_spill()
+        while self._running or not self._queue.empty():
+            batch = self._drain()
+            # Uncommitted events are retried on their own once the backoff expires
+            if batch or ((self._pending or self._spill_only) and time.time() >= self._retry_at):
+                self._flush(batch)
+        self._stopped.set()
+
+    def stop(self, timeout=5.0):
+        """Stops the writer after flushing everything still queued."""
+        self._running = False
+        self._stopped.wait(timeout)
+
+    def _drain(self) -> List[LogEvent]:
+        batch = []
+        try:
+            batch.append(self._queue.get(timeout=self.flush_interval))
+            while len(batch) < self.batch_size:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _flush(self, batch: List[LogEvent]):
+        # 1. Durable spill first, so a crash before commit can be replayed
+        self._append_spill(batch)
+        self._keep_pending(batch)
+
+        # 2. Commit everything uncommitted (no attempt while backing off from a failure)
+        if time.time() < self._retry_at: return
+        events = self._read_spill() if self._spill_only else self._pending
+        if events is None: return
+        try:
+            self.db.apply_events(events)
+        except Exception as e:
+            # Keep the spill file; retried after a backoff or replayed on next start
+            self._retry_delay = min(30.0, max(self.flush_interval, self._retry_delay * 2))
+            self._retry_at = time.time() + self._retry_delay
+            self.log.error(f"Event log flush failed ({len(events)} events kept in spill, "
+                           f"retry in {self._retry_delay:.1f}s): {e}")
+            return
+
+        # 3. Committed, spill no longer needed
+        self._pending = []
+        self._spill_only = False
+        self._retry_delay = 0.0
+        self._retry_at = 0.0
+        self._clear_spill()
+
+    def _keep_pending(self, events: List[LogEvent]):
+        if self._spill_only: return
+        self._pending += events
+        if len(self._pending) > self.max_pending:
+            self.log.warning(f"Event log: {len(self._pending)} uncommitted events, keeping them in the spill file only")
+            self._pending = []
+            self._spill_only = True
+
+    def _append_spill(self, batch: List[LogEvent]):
+        if not batch: return
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for ev in batch:
+                    f.write(ev.to_json() + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            self.log.error(f"Failed to write event spill: {e}")
+
+    def _clear_spill(self):
+        try:
+            if os.path.exists(self.spill_path):
+                os.remove(self.spill_path)
+        except Exception as e:
+            self.log.error(f"Failed to clear event spill: {e}")
+
+    def _read_spill(self) -> Optional[List[LogEvent]]:
+        if not os.path.exists(self.spill_path): return []
+        events = []
+        try:
+            with open(self.spill_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line: continue
+                    try:
+                        events.append(LogEvent.from_json(line))
+                    except Exception:
+                        # Torn last line from a crash mid-write
+                        pass
+        except Exception as e:
+            self.log.error(f"Failed to read event spill: {e}")
+            return None
+        return events
+
+    def _replay_spill(self):
+        if not os.path.exists(self.spill_path): return
+        events = self._read_spill()
+        if events is None: return
+
+        if not events:
+            self._clear_spill()
+            return
+
+        self.log.warning(f"Replaying {len(events)} events from spill file {self.spill_path}")
+        try:
+            self.db.apply_events(events)
+            self._clear_spill()
+        except Exception as e:
+            # Still in the spill file; retried with the next batch (cleared only once committed)
+            self._keep_pending(events)
+            self.log.error(f"Spill replay failed, retrying with next flush: {e}")
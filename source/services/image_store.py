@@ -0,0 +1,128 @@
+import os
+import cv2
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Optional, Callable
+
+
+class ImageWriter:
+    """
+    Background JPEG persistence service.
+    Frames are encoded and written on a worker pool so the processor thread
+    never pays for cv2.imwrite. Writes are atomic (temp file + rename), so
+    readers (cloud sync, UI) never see half-written JPEGs.
+
+    on_done(path, jpeg_bytes) is called from the worker thread once the file
+    is on disk (e.g. to log the image through the event log). Listeners added
+    with add_listener(fn(path, nbytes)) see every written file (disk accounting);
+    with_data=True passes the JPEG bytes instead of their size. Listeners run on
+    the writer thread, so they must only hand work off.
+    """
+    def __init__(self, max_workers=2, jpeg_quality=95, progressive=False, optimize=False,
+                 max_pending=64, logger: Optional[logging.Logger] = None):
+        self.log = logger or logging.getLogger("ImageWriter")
+        self.params = [
+            int(cv2.IMWRITE_JPEG_QUALITY), int(jpeg_quality),
+            int(cv2.IMWRITE_JPEG_PROGRESSIVE), 1 if progressive else 0,
+            int(cv2.IMWRITE_JPEG_OPTIMIZE), 1 if optimize else 0,
+        ]
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ImageWriter")
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._known_dirs = set()
+        self._listeners = []
+
+    def add_listener(self, fn: Callable, with_data: bool = False):
+        self._listeners.append((fn, with_data))
+
+    @classmethod
+    def from_config(cls, config, logger=None):
+        return cls(
+            max_workers=config.getint("IMAGE_WRITER", "workers", fallback=2),
+            jpeg_quality=config.getint("IMAGE_WRITER", "jpeg_quality", fallback=95),
+            progressive=config.getboolean("IMAGE_WRITER", "progressive", fallback=False),
+            optimize=config.getboolean("IMAGE_WRITER", "optimize", fallback=False),
+            max_pending=config.getint("IMAGE_WRITER", "max_pending", fallback=64),
+            logger=logger
+        )
+
+    def submit(self, frame, path: str, copy: bool = False,
+               on_done: Optional[Callable[[str, bytes], None]] = None,
+               drop_if_busy: bool = False) -> Optional[Future]:
+        """
+        Queue a frame for encoding. With copy=False the caller hands off ownership
+        and must not modify the frame afterwards.
+        drop_if_busy: skip (return None) when the queue is full instead of growing
+        it further - meant for best-effort snaps, never for session captures.
+        """
+        if frame is None: return None
+        with self._lock:
+            if drop_if_busy and self._pending >= self.max_pending:
+                self.log.warning(f"ImageWriter busy ({self._pending} pending). Dropping {os.path.basename(path)}")
+                return None
+            self._pending += 1
+
+        if copy:
+            frame = frame.copy()
+        try:
+            return self._executor.submit(self._write, frame, path, on_done)
+        except RuntimeError: # Shut down (processor outlived stop_processors' join)
+            with self._lock:
+                self._pending -= 1
+            self.log.warning(f"ImageWriter stopped. Dropping {os.path.basename(path)}")
+            return None
+
+    def pending(self) -> int:
+        return self._pending
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def _ensure_dir(self, directory):
+        if not directory or directory in self._known_dirs: return
+        os.makedirs(directory, exist_ok=True)
+        self._known_dirs.add(directory)
+
+    def _write(self, frame, path, on_done):
+        try:
+            ok, buf = cv2.imencode(".jpg", frame, self.params)
+            if not ok:
+                self.log.error(f"JPEG encode failed: {path}")
+                return None
+
+            data = buf.tobytes()
+            self._ensure_dir(os.path.dirname(path))
+
+            # Atomic write: readers only ever see complete files
+            tmp_path = path + ".tmp"
+            try:
+                f = open(tmp_path, "wb")
+            except FileNotFoundError:
+                # Directory removed since it was cached (e.g. cleanup)
+                self._known_dirs.discard(os.path.dirname(path))
+                self._ensure_dir(os.path.dirname(path))
+                f = open(tmp_path, "wb")
+            with f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+            for listener, with_data in self._listeners:
+                try:
+                    listener(path, data if with_data else len(data))
+                except Exception as e:
+                    self.log.error(f"ImageWriter listener failed for {path}: {e}")
+
+            if on_done:
+                try:
+                    on_done(path, data)
+                except Exception as e:
+                    self.log.error(f"ImageWriter callback failed for {path}: {e}")
+            return path
+        except Exception as e:
+            self.log.error(f"Failed to write image {path}: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._pending -= 1
@@ -0,0 +1,287 @@
+import os
+import time
+import queue
+import shutil
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional, List
+
+# Deletion tiers (lower tiers are removed first under budget pressure)
+TIER_SUPERSEDED = 0 # Local copies of data that already lives elsewhere (ok_image_*, kept originals)
+TIER_UPLOADED = 1   # Kept after upload (merged results) or past min_keep_days (session captures)
+TIER_PENDING = 2    # Raw snaps not uploaded yet: only deleted when the disk is nearly full
+
+# Manifest states after which the local raw snap is gone or no longer needed
+_DONE_STATES = ("UPLOADED", "REJECTED", "DUPLICATE", "MISSING")
+
+
+@dataclass
+class RetentionArea:
+    name: str
+    root: str
+    tier: int
+
+
+class RetentionManager(threading.Thread):
+    """
+    Keeps local image directories within a byte budget and age policy.
+
+    Disk usage is tracked in a SQLite index (retention_index.db): files written
+    by this process are reported through track() (ImageWriter listener, queued so
+    the capture path never blocks), and a full directory scan only runs at
+    startup and every `reconcile_interval` to pick up files written by other
+    processes (ai_image_filter, upload transform originals).
+
+    Each cycle:
+      1. drops index rows for raw snaps the uploader already removed,
+      2. deletes tier 0/1 files older than max_age_days,
+      3. deletes tier 0/1 files oldest-first while usage exceeds the budget,
+      4. if free disk space falls below emergency_free_mb, deletes the oldest
+         pending raw snaps as a last resort (logged as warnings).
+    Tier 1 files are only eligible once the upload manifest says UPLOADED, or
+    (for files never queued for upload, e.g. session captures) after min_keep_days.
+    """
+    def __init__(self, areas: List[RetentionArea], db_path="retention_index.db",
+                 manifest_path="upload_manifest.db", budget_gb=50.0, max_age_days=30, min_keep_days=7,
+                 emergency_free_mb=2048, interval=300, reconcile_interval=6 * 3600,
+                 logger: Optional[logging.Logger] = None):
+        super().__init__(name="RetentionManager", daemon=True)
+        self.areas = {a.name: RetentionArea(a.name, os.path.abspath(a.root), a.tier) for a in areas}
+        self.db_path = db_path
+        self.manifest_path = os.path.abspath(manifest_path)
+        self.budget_bytes = int(budget_gb * 1024 ** 3)
+        self.max_age_days = max_age_days
+        self.min_keep_days = min_keep_days
+        self.emergency_free_bytes = emergency_free_mb * 1024 * 1024
+        self.interval = interval
+        self.reconcile_interval = reconcile_interval
+        self.log = logger or logging.getLogger("RetentionManager")
+
+        self.running = True
+        self._wake = threading.Event()
+        self._queue = queue.Queue()
+        self._init_db()
+
+    @classmethod
+    def from_config(cls, config, areas, logger=None):
+        return cls(
+            areas,
+            db_path=config.get("RETENTION", "index_path", fallback="retention_index.db"),
+            manifest_path=config.get("UPLOAD", "manifest_path", fallback="upload_manifest.db"),
+            budget_gb=config.getfloat("RETENTION", "budget_gb", fallback=50.0),
+            max_age_days=config.getint("RETENTION", "max_age_days", fallback=30),
+            min_keep_days=config.getint("RETENTION", "min_keep_days", fallback=7),
+            emergency_free_mb=config.getint("RETENTION", "emergency_free_mb", fallback=2048),
+            interval=config.getint("RETENTION", "interval", fallback=300),
+            reconcile_interval=config.getint("RETENTION", "reconcile_hours", fallback=6) * 3600,
+            logger=logger
+        )
+
+    def _get_connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        with self._get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS retention_files (
+                    path TEXT PRIMARY KEY,
+                    area TEXT,
+                    tier INTEGER,
+                    size INTEGER,
+                    mtime REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_retention_order ON retention_files(tier, mtime)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_retention_area ON retention_files(area)")
+            conn.commit()
+
+    # ------------------------------------------------------------------
+    # Producer side (never blocks)
+    # ------------------------------------------------------------------
+    def track(self, path: str, nbytes: int):
+        """ImageWriter listener: record a newly written file."""
+        self._queue.put((os.path.abspath(path), nbytes, time.time()))
+
+    def _area_for(self, path):
+        for area in self.areas.values():
+            if path.startswith(area.root + os.sep):
+                return area
+        return None
+
+    def _drain(self, conn):
+        rows = []
+        while True:
+            try:
+                path, nbytes, mtime = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            area = self._area_for(path)
+            if area:
+                rows.append((path, area.name, area.tier, nbytes, mtime))
+        if rows:
+            conn.executemany("INSERT OR REPLACE INTO retention_files VALUES (?, ?, ?, ?, ?)", rows)
+            conn.commit()
+
+    # ------------------------------------------------------------------
+    # Service loop
+    # ------------------------------------------------------------------
+    def run(self):
+        self.log.info(f"Retention started (budget {self.budget_bytes / 1024 ** 3:.1f} GB, "
+                      f"max age {self.max_age_days} days)")
+        next_reconcile = 0
+        while self.running:
+            try:
+                if time.time() >= next_reconcile:
+                    self.reconcile()
+                    next_reconcile = time.time() + self.reconcile_interval
+                self.enforce()
+            except Exception as e:
+                self.log.error(f"Retention cycle failed: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+
+    def reconcile(self):
+        """Rebuild the index for every area from one directory scan."""
+        for area in self.areas.values():
+            rows = []
+            if os.path.isdir(area.root):
+                stack = [area.root]
+                while stack:
+                    for entry in os.scandir(stack.pop()):
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif not entry.name.endswith(".tmp"):
+                            st = entry.stat()
+                            rows.append((entry.path, area.name, area.tier, st.st_size, st.st_mtime))
+            with self._get_connection() as conn:
+                conn.execute("DELETE FROM retention_files WHERE area = ?", (area.name,))
+                conn.executemany("INSERT OR REPLACE INTO retention_files VALUES (?, ?, ?, ?, ?)", rows)
+                conn.commit()
+        self.log.info(f"Retention index reconciled: {self.usage() / 1024 ** 2:.0f} MB tracked")
+
+    def usage(self, area: str = None) -> int:
+        with self._get_connection() as conn:
+            if area:
+                row = conn.execute("SELECT COALESCE(SUM(size), 0) FROM retention_files WHERE area = ?", (area,)).fetchone()
+            else:
+                row = conn.execute("SELECT COALESCE(SUM(size), 0) FROM retention_files").fetchone()
+            return row[0]
+
+    def _eligible_sql(self, has_manifest=True):
+        """Rows (tier 0/1) that may be deleted, oldest first."""
+        if not has_manifest:
+            # Uploader not set up yet: tier 1 only after min_keep_days
+            return f"""
+                SELECT r.path, r.size FROM retention_files r
+                WHERE (r.tier = {TIER_SUPERSEDED} OR (r.tier = {TIER_UPLOADED} AND r.mtime < ?))
+            """
+        return f"""
+            SELECT r.path, r.size FROM retention_files r
+            LEFT JOIN m.upload_manifest u ON u.local_path = r.path
+            WHERE (r.tier = {TIER_SUPERSEDED}
+                   OR (r.tier = {TIER_UPLOADED}
+                       AND (u.status = 'UPLOADED' OR (u.status IS NULL AND r.mtime < ?))))
+        """
+
+    def enforce(self):
+        with self._get_connection() as conn:
+            self._drain(conn)
+            conn.execute("ATTACH DATABASE ? AS m", (self.manifest_path,))
+            # Read-only use of the manifest: its schema belongs to UploadManifest, which
+            # may not have created it yet (fresh install, cloud sync not started)
+            has_manifest = conn.execute(
+                "SELECT 1 FROM m.sqlite_master WHERE type = 'table' AND name = 'upload_manifest'").fetchone() is not None
+
+            # 1. Raw snaps already handled by the uploader are gone (or moved)
+            if has_manifest:
+                marks = ",".join("?" * len(_DONE_STATES))
+                conn.execute(f"""
+                    DELETE FROM retention_files WHERE tier = {TIER_PENDING} AND path IN
+                        (SELECT local_path FROM m.upload_manifest WHERE status IN ({marks}))
+                """, _DONE_STATES)
+                conn.commit()
+
+            now = time.time()
+            min_keep = now - self.min_keep_days * 86400
+
+            # 2. Age policy
+            removed, freed = 0, 0
+            if self.max_age_days:
+                cutoff = now - self.max_age_days * 86400
+                rows = conn.execute(self._eligible_sql(has_manifest) + " AND r.mtime < ? ORDER BY r.mtime",
+                                    (min_keep, cutoff)).fetchall()
+                r, f = self._delete(conn, rows)
+                removed += r
+                freed += f
+
+            # 3. Byte budget, oldest first (superseded copies before uploaded files)
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM retention_files").fetchone()[0]
+            if total > self.budget_bytes:
+                excess = total - self.budget_bytes
+                rows = conn.execute(self._eligible_sql(has_manifest) + " ORDER BY r.tier, r.mtime", (min_keep,)).fetchall()
+                r, f = self._delete(conn, rows, limit_bytes=excess)
+                removed += r
+                freed += f
+                if f < excess:
+                    self.log.warning(f"Retention budget exceeded by {(excess - f) / 1024 ** 2:.0f} MB "
+                                     f"with nothing left that is safe to delete")
+
+            # 4. Emergency: disk nearly full -> oldest pending raw snaps
+            emergency_root = next((a.root for a in self.areas.values() if a.tier == TIER_PENDING), None)
+            if emergency_root and os.path.isdir(emergency_root):
+                free = shutil.disk_usage(emergency_root).free
+                if free < self.emergency_free_bytes:
+                    rows = conn.execute(f"""
+                        SELECT path, size FROM retention_files WHERE tier = {TIER_PENDING} ORDER BY mtime
+                    """).fetchall()
+                    r, f = self._delete(conn, rows, limit_bytes=self.emergency_free_bytes - free)
+                    self.log.warning(f"Disk nearly full ({free / 1024 ** 2:.0f} MB free): "
+                                     f"deleted {r} pending raw snaps ({f / 1024 ** 2:.0f} MB)")
+                    removed += r
+                    freed += f
+
+            conn.execute("DETACH DATABASE m")
+
+        if removed:
+            self.log.info(f"Retention: removed {removed} files ({freed / 1024 ** 2:.1f} MB)")
+        return removed, freed
+
+    def _delete(self, conn, rows, limit_bytes=None):
+        removed, freed = 0, 0
+        gone = []
+        for row in rows:
+            if limit_bytes is not None and freed >= limit_bytes: break
+            path, size = row['path'], row['size']
+            try:
+                os.remove(path)
+                removed += 1
+                freed += size
+            except FileNotFoundError:
+                freed += size # Index was stale; the space is already free
+            except OSError as e:
+                self.log.error(f"Retention could not delete {path}: {e}")
+                continue
+            gone.append((path,))
+            self._prune_dir(os.path.dirname(path))
+        if gone:
+            conn.executemany("DELETE FROM retention_files WHERE path = ?", gone)
+            conn.commit()
+        return removed, freed
+
+    def _prune_dir(self, directory):
+        """Remove empty date folders below an area root (writers recreate them on demand)."""
+        roots = {a.root for a in self.areas.values()}
+        while directory not in roots and os.path.dirname(directory) != directory:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return
+            directory = os.path.dirname(directory)
@@ -0,0 +1,318 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Callable, Iterable, Tuple, List
+
+from boto3.s3.transfer import TransferConfig
+from source.utils.image_quality import QUALITY_OK, QUALITY_CORRUPT
+from source.services.upload_scheduler import UploadScheduler, PRIORITY_SNAP
+from source.services.upload_transform import UploadTransformer
+
+
+class UploadManifest:
+    """
+    Persistent record of upload state per local file (SQLite), so a restart
+    resumes pending/failed uploads instead of rescanning and re-trying blindly.
+    """
+    PENDING = 'PENDING'
+    UPLOADED = 'UPLOADED'
+    FAILED = 'FAILED'
+    REJECTED = 'REJECTED' # Failed quality check, deleted locally
+    DUPLICATE = 'DUPLICATE' # Near-duplicate of an image already in the lake, deleted locally
+    MISSING = 'MISSING' # Gone locally before it was uploaded (nothing in S3)
+
+    def __init__(self, db_path="upload_manifest.db", logger: Optional[logging.Logger] = None):
+        self.db_path = db_path
+        self.log = logger or logging.getLogger("UploadManifest")
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _get_connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        with self._get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS upload_manifest (
+                    local_path TEXT PRIMARY KEY,
+                    s3_key TEXT,
+                    status TEXT,
+                    attempts INTEGER DEFAULT 0,
+                    last_error TEXT,
+                    quality TEXT, -- capture-time verdict ('OK'/'CORRUPT'), NULL = unchecked
+                    priority INTEGER DEFAULT 2, -- upload_scheduler class (0 result, 1 record, 2 snap)
+                    meta TEXT, -- JSON capture metadata (dump/plate/state) for the upload transform
+                    updated_at DATETIME
+                )
+            """)
+            cols = [r['name'] for r in conn.execute("PRAGMA table_info(upload_manifest)").fetchall()]
+            if 'quality' not in cols:
+                conn.execute("ALTER TABLE upload_manifest ADD COLUMN quality TEXT")
+            if 'priority' not in cols:
+                conn.execute(f"ALTER TABLE upload_manifest ADD COLUMN priority INTEGER DEFAULT {PRIORITY_SNAP}")
+            if 'meta' not in cols:
+                conn.execute("ALTER TABLE upload_manifest ADD COLUMN meta TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_manifest_status ON upload_manifest(status)")
+            conn.commit()
+
+    def add_pending(self, items: Iterable[tuple]):
+        """
+        Register (local_path, s3_key[, quality[, priority[, meta]]]) items; already-known
+        files keep their state, but a newly supplied quality verdict / metadata is recorded.
+        """
+        now = datetime.now()
+        rows = [(os.path.abspath(it[0]), it[1], self.PENDING, it[2] if len(it) > 2 else None,
+                 it[3] if len(it) > 3 else PRIORITY_SNAP,
+                 json.dumps(it[4], default=str) if len(it) > 4 and it[4] else None, now) for it in items]
+        if not rows: return
+        with self._lock, self._get_connection() as conn:
+            conn.executemany("""
+                INSERT INTO upload_manifest (local_path, s3_key, status, quality, priority, meta, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(local_path) DO UPDATE SET quality = COALESCE(excluded.quality, quality),
+                                                      meta = COALESCE(excluded.meta, meta)
+            """, rows)
+            conn.commit()
+
+    def mark(self, local_path: str, status: str, error: str = None, quality: str = None):
+        with self._lock, self._get_connection() as conn:
+            conn.execute("""
+                UPDATE upload_manifest
+                SET status = ?, last_error = ?, attempts = attempts + ?,
+                    quality = COALESCE(?, quality), updated_at = ?
+                WHERE local_path = ?
+            """, (status, error, 1 if status == self.FAILED else 0, quality, datetime.now(), local_path))
+            conn.commit()
+
+    def pending(self, include_failed=True, max_attempts=10,
+                paths: Optional[List[str]] = None) -> List[Tuple[str, str, Optional[str], int, Optional[dict]]]:
+        """
+        Files still to upload as (path, key, quality, priority, meta), highest
+        priority first. Failed files are included (if include_failed) until they
+        have failed max_attempts batches; after that they stay FAILED for inspection.
+        paths: restrict to these files (live delivery of just-notified snaps).
+        """
+        query = """
+            SELECT local_path, s3_key, quality, priority, meta, updated_at FROM upload_manifest
+            WHERE (status = ? OR (? AND status = ? AND attempts < ?))
+        """
+        params = (self.PENDING, include_failed, self.FAILED, max_attempts)
+        with self._get_connection() as conn:
+            if paths is None:
+                rows = conn.execute(query + " ORDER BY priority, updated_at", params).fetchall()
+            else:
+                paths = [os.path.abspath(p) for p in paths]
+                rows = []
+                for i in range(0, len(paths), 500):
+                    chunk = paths[i:i + 500]
+                    rows += conn.execute(query + f" AND local_path IN ({','.join('?' * len(chunk))})",
+                                         params + tuple(chunk)).fetchall()
+                rows.sort(key=lambda r: (PRIORITY_SNAP if r['priority'] is None else r['priority'], str(r['updated_at'])))
+            return [(r['local_path'], r['s3_key'], r['quality'],
+                     PRIORITY_SNAP if r['priority'] is None else r['priority'],
+                     json.loads(r['meta']) if r['meta'] else None) for r in rows]
+
+    def count_pending(self, priority=PRIORITY_SNAP) -> int:
+        """PENDING files of one class (scheduler backpressure)."""
+        with self._get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM upload_manifest WHERE status = ? AND priority = ?",
+                                (self.PENDING, priority)).fetchone()[0]
+
+
+class S3UploadEngine:
+    """
+    Parallel uploader: a bounded thread pool sharing one S3 client (boto3 clients
+    are thread-safe), multipart tuning for large files, retry with exponential
+    backoff, and a persistent manifest so interrupted batches resume.
+
+    The client only needs upload_file(), so a local S3 stand-in (MinIO, moto
+    server via [AWS] endpoint_url) or a test double can be passed in.
+    """
+    def __init__(self, client, bucket: str, manifest: UploadManifest, max_workers=8, max_retries=4,
+                 max_attempts=10, backoff_base=1.0, multipart_threshold_mb=16, multipart_chunk_mb=8,
+                 delete_after_upload=True, dedup=None, scheduler=None, transform=None,
+                 logger: Optional[logging.Logger] = None):
+        self.client = client
+        self.bucket = bucket
+        self.manifest = manifest
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.max_attempts = max_attempts # Failed batches before a file is no longer retried
+        self.backoff_base = backoff_base
+        self.delete_after_upload = delete_after_upload
+        # Optional near-duplicate hook (is_duplicate(path) / mark_uploaded(path, key) / forget(path))
+        self.dedup = dedup
+        # Optional UploadScheduler (bandwidth cap, priority classes, peak-hour pause)
+        self.scheduler = scheduler
+        # Optional UploadTransformer (downscale / re-encode raw snaps before upload)
+        self.transform = transform
+        self.log = logger or logging.getLogger("S3UploadEngine")
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold_mb * 1024 * 1024,
+            multipart_chunksize=multipart_chunk_mb * 1024 * 1024,
+            max_concurrency=2,
+            use_threads=True
+        )
+
+    @classmethod
+    def from_config(cls, config, client, bucket, logger=None):
+        return cls(
+            client, bucket,
+            UploadManifest(config.get("UPLOAD", "manifest_path", fallback="upload_manifest.db"), logger=logger),
+            max_workers=config.getint("UPLOAD", "workers", fallback=8),
+            max_retries=config.getint("UPLOAD", "max_retries", fallback=4),
+            max_attempts=config.getint("UPLOAD", "max_attempts", fallback=10),
+            multipart_threshold_mb=config.getint("UPLOAD", "multipart_threshold_mb", fallback=16),
+            multipart_chunk_mb=config.getint("UPLOAD", "multipart_chunk_mb", fallback=8),
+            scheduler=UploadScheduler.from_config(config, logger=logger),
+            transform=UploadTransformer.from_config(config, logger=logger),
+            logger=logger
+        )
+
+    def upload_all(self, items: Iterable[tuple],
+                   pre_check: Optional[Callable[[str], bool]] = None,
+                   progress: Optional[Callable[[int, int], None]] = None,
+                   should_continue: Optional[Callable[[], bool]] = None,
+                   retry_failed=True, only_items=False) -> Tuple[int, int]:
+        """
+        Upload (local_path, s3_key[, quality[, priority[, meta]]]) items plus anything left
+        pending in the manifest, highest priority first. FAILED files are only retried
+        when retry_failed (the reconciliation sweep), so live delivery does not queue
+        new snaps behind an outage backlog. With only_items the pending backlog is
+        left to the sweep as well (held-back snaps are not re-visited every notify batch). Only raw snaps (PRIORITY_SNAP) go
+        through pre_check / dedup / transform and are deleted locally after upload.
+        pre_check(local_path) -> False deletes the file instead of uploading it. It is
+        skipped for files whose quality verdict ('OK') was already stored at capture time.
+        Items held back by the scheduler stay pending for a later pass.
+        progress(uploaded, deleted) is called as files complete.
+        Returns (uploaded, deleted).
+        """
+        items = list(items)
+        self.manifest.add_pending(items)
+        work = self.manifest.pending(include_failed=retry_failed, max_attempts=self.max_attempts,
+                                     paths=[it[0] for it in items] if only_items else None)
+        if not work: return 0, 0
+        if self.scheduler:
+            # Backpressure counts every waiting snap, not just this batch
+            self.scheduler.set_backlog(self.manifest.count_pending(PRIORITY_SNAP))
+
+        uploaded = 0
+        deleted = 0
+        last_report = 0.0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="S3Upload") as pool:
+            futures = [pool.submit(self._upload_one, p, k, q, pre_check, should_continue, prio, meta)
+                       for p, k, q, prio, meta in work]
+            for fut in as_completed(futures):
+                result = fut.result()
+                if result == UploadManifest.UPLOADED: uploaded += 1
+                elif result in (UploadManifest.REJECTED, UploadManifest.DUPLICATE): deleted += 1
+
+                now = time.time()
+                if progress and now - last_report > 1.0:
+                    last_report = now
+                    progress(uploaded, deleted)
+
+                if should_continue and not should_continue():
+                    for f in futures: f.cancel()
+                    break
+
+        if progress: progress(uploaded, deleted)
+        return uploaded, deleted
+
+    def _upload_one(self, local_path, s3_key, quality, pre_check, should_continue, priority=PRIORITY_SNAP,
+                    meta=None):
+        # Paused class first: no quality check / hash / transform for a file that cannot go now
+        if self.scheduler and self.scheduler.is_paused(priority):
+            return None # Stays pending (e.g. raw snaps during peak hours)
+        if should_continue and not should_continue():
+            return None
+        is_snap = priority == PRIORITY_SNAP
+
+        if not os.path.exists(local_path):
+            # Deleted (retention emergency delete) or lost before upload: never claim it is in S3
+            self.manifest.mark(local_path, UploadManifest.MISSING, "missing locally")
+            return None
+
+        try:
+            if is_snap and pre_check and quality != QUALITY_OK:
+                if not pre_check(local_path):
+                    os.remove(local_path)
+                    self.manifest.mark(local_path, UploadManifest.REJECTED, quality=QUALITY_CORRUPT)
+                    return UploadManifest.REJECTED
+                quality = QUALITY_OK
+        except Exception as e:
+            self.log.error(f"Pre-upload check failed {local_path}: {e}")
+
+        try:
+            if is_snap and self.dedup and self.dedup.is_duplicate(local_path, (meta or {}).get('dhash')):
+                self.dedup.forget(local_path)
+                os.remove(local_path)
+                self.manifest.mark(local_path, UploadManifest.DUPLICATE, quality=quality)
+                return UploadManifest.DUPLICATE
+        except Exception as e:
+            self.log.error(f"Duplicate check failed {local_path}: {e}")
+
+        # Downscale / re-encode (process pool); falls back to the original on error
+        upload_path, upload_key = local_path, s3_key
+        if is_snap and self.transform:
+            try:
+                capture_meta = {k: v for k, v in meta.items() if k != 'dhash'} if meta else meta
+                upload_path, upload_key = self.transform.prepare(local_path, s3_key, capture_meta)
+            except Exception as e:
+                self.log.error(f"Upload transform failed {local_path}: {e}")
+
+        if self.scheduler:
+            try:
+                size = os.path.getsize(upload_path)
+            except OSError:
+                size = 0
+            if not self.scheduler.acquire(priority, size, should_continue):
+                if self.dedup: self.dedup.forget(local_path)
+                if self.transform: self.transform.discard(local_path, upload_path)
+                return None
+
+        # Only the transfer is retried: once the object is in S3 it is never re-sent or marked FAILED
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.client.upload_file(upload_path, self.bucket, upload_key, Config=self.transfer_config)
+                break
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    if self.dedup: self.dedup.forget(local_path)
+                    if self.transform: self.transform.discard(local_path, upload_path)
+                    self.log.error(f"Upload failed after {attempt + 1} attempts {local_path}: {e}")
+                    self.manifest.mark(local_path, UploadManifest.FAILED, str(e))
+                    return UploadManifest.FAILED
+                # Exponential backoff with jitter, capped at 60s
+                delay = min(60.0, self.backoff_base * (2 ** attempt)) * (0.5 + random.random() / 2)
+                self.log.warning(f"Upload retry {attempt + 1}/{self.max_retries} for {local_path} in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+        # Bookkeeping after the upload (each step on its own: a locked file must not undo the others)
+        try:
+            self.manifest.mark(local_path, UploadManifest.UPLOADED, quality=quality)
+        except Exception as e:
+            self.log.error(f"Uploaded {local_path} but could not record it in the manifest: {e}")
+        if is_snap and self.dedup:
+            try:
+                self.dedup.mark_uploaded(local_path, upload_key)
+            except Exception as e:
+                self.log.error(f"Uploaded {local_path} but could not index its hash: {e}")
+        delete = is_snap and self.delete_after_upload
+        try:
+            if is_snap and self.transform:
+                self.transform.finish(local_path, upload_path, s3_key, delete)
+            elif delete:
+                os.remove(local_path)
+        except OSError as e:
+            self.log.error(f"Uploaded {local_path} but local cleanup failed: {e}")
+        return UploadManifest.UPLOADED
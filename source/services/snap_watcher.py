@@ -0,0 +1,251 @@
+import os
+import sys
+import time
+import queue
+import struct
+import select
+import ctypes
+import logging
+import threading
+from typing import Optional
+
+# inotify(7) event masks
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class SnapNotifier:
+    """
+    Process-wide queue of newly written snapshots.
+    Producers: DumpProcessor (after the atomic write) and the filesystem watchers.
+    Consumer: CloudSyncWorker.
+
+    Paths are absolute, so one file has one manifest row. DumpProcessor claims
+    its paths before writing; watcher events for claimed paths are dropped
+    (the processor's own event carries quality + capture meta).
+
+    The queue is bounded: with no consumer (cloud sync off, or waiting for its
+    source directory) the oldest events are dropped; the hourly reconciliation
+    sweep uploads those files anyway.
+    """
+    CLAIM_TTL = 120.0 # Seconds a claim suppresses watcher events (covers inotify / polling lag)
+
+    def __init__(self, maxsize=5000):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self._claims = {} # abs path -> claim time
+        self._lock = threading.Lock()
+
+    def claim(self, path: str):
+        now = time.time()
+        with self._lock:
+            if len(self._claims) > 1000:
+                self._claims = {p: t for p, t in self._claims.items() if now - t < self.CLAIM_TTL}
+            self._claims[os.path.abspath(path)] = now
+
+    def release(self, path: str):
+        """Claimed write did not happen (e.g. dropped by a busy writer)."""
+        with self._lock:
+            self._claims.pop(os.path.abspath(path), None)
+
+    def _put(self, item):
+        while True:
+            try:
+                self.queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait() # Drop the oldest
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def publish(self, path: str, **meta):
+        self._put((os.path.abspath(path), meta))
+
+    def publish_external(self, path: str):
+        """Watcher event: ignored for files announced by this process."""
+        path = os.path.abspath(path)
+        with self._lock:
+            claimed = self._claims.get(path)
+        if claimed is not None and time.time() - claimed < self.CLAIM_TTL:
+            return
+        self._put((path, {}))
+
+    def drain(self, timeout=1.0, max_items=500, window=2.0):
+        """Block up to `timeout` for the first item, then collect more for up to `window` seconds."""
+        items = []
+        try:
+            items.append(self.queue.get(timeout=timeout))
+            deadline = time.time() + window
+            while len(items) < max_items:
+                remaining = deadline - time.time()
+                if remaining <= 0: break
+                items.append(self.queue.get(timeout=remaining))
+        except queue.Empty:
+            pass
+        return items
+
+
+_notifier = None
+_notifier_lock = threading.Lock()
+
+def get_snap_notifier() -> SnapNotifier:
+    global _notifier
+    with _notifier_lock:
+        if _notifier is None:
+            _notifier = SnapNotifier()
+        return _notifier
+
+
+class InotifyWatcher(threading.Thread):
+    """Linux change notifications (recursive) for snapshots written by other processes."""
+    def __init__(self, root, notifier: SnapNotifier, logger: Optional[logging.Logger] = None):
+        super().__init__(name="InotifyWatcher", daemon=True)
+        self.root = root
+        self.notifier = notifier
+        self.log = logger or logging.getLogger("InotifyWatcher")
+        self.running = True
+        self._libc = ctypes.CDLL("libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(0)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._wd_paths = {}
+
+    @staticmethod
+    def available():
+        if not sys.platform.startswith("linux"): return False
+        try:
+            ctypes.CDLL("libc.so.6").inotify_init1
+            return True
+        except Exception:
+            return False
+
+    def _add_watch(self, path):
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd >= 0:
+            self._wd_paths[wd] = path
+        else:
+            self.log.warning(f"inotify_add_watch failed for {path} (errno {ctypes.get_errno()})")
+
+    def _add_tree(self, path, publish_existing=False):
+        for dirpath, _dirs, files in os.walk(path):
+            self._add_watch(dirpath)
+            if publish_existing:
+                # Files created before the watch was in place
+                for f in files:
+                    if f.endswith('.jpg'):
+                        self.notifier.publish_external(os.path.join(dirpath, f))
+
+    def run(self):
+        self._add_tree(self.root)
+        self.log.info(f"Watching {self.root} via inotify ({len(self._wd_paths)} dirs)")
+        while self.running:
+            try:
+                ready, _, _ = select.select([self._fd], [], [], 1.0)
+                if not ready: continue
+                buf = os.read(self._fd, 64 * 1024)
+                self._handle(buf)
+            except Exception as e:
+                self.log.error(f"inotify watcher error: {e}")
+                time.sleep(1)
+        os.close(self._fd)
+
+    def _handle(self, buf):
+        off = 0
+        while off + _EVENT_HEADER.size <= len(buf):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buf, off)
+            off += _EVENT_HEADER.size
+            name = buf[off:off + length].rstrip(b"\0").decode(errors="replace")
+            off += length
+
+            if mask & IN_IGNORED:
+                self._wd_paths.pop(wd, None)
+                continue
+            parent = self._wd_paths.get(wd)
+            if not parent or not name: continue
+            path = os.path.join(parent, name)
+
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_tree(path, publish_existing=True)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and name.endswith('.jpg'):
+                self.notifier.publish_external(path)
+
+    def stop(self):
+        self.running = False
+
+
+class PollingWatcher(threading.Thread):
+    """
+    Fallback for platforms without inotify (Windows dump PCs).
+    Only lists the two most recent date folders of each channel, so the cost
+    does not grow with old files left behind.
+    """
+    def __init__(self, root, notifier: SnapNotifier, interval=5.0, logger: Optional[logging.Logger] = None):
+        super().__init__(name="PollingWatcher", daemon=True)
+        self.root = root
+        self.notifier = notifier
+        self.interval = interval
+        self.log = logger or logging.getLogger("PollingWatcher")
+        self.running = True
+        self._seen = {} # date_dir -> set(filenames)
+
+    def run(self):
+        self.log.info(f"Watching {self.root} via polling every {self.interval}s")
+        first = True
+        while self.running:
+            try:
+                self._poll(publish=not first)
+                first = False # Initial listing is left to the reconciliation sweep
+            except Exception as e:
+                self.log.error(f"Polling watcher error: {e}")
+            time.sleep(self.interval)
+
+    def _recent_date_dirs(self):
+        if not os.path.isdir(self.root): return []
+        out = []
+        for view in os.scandir(self.root):
+            if not view.is_dir(): continue
+            for ch in os.scandir(view.path):
+                if not ch.is_dir(): continue
+                dates = sorted(d.name for d in os.scandir(ch.path) if d.is_dir())
+                out.extend(os.path.join(ch.path, d) for d in dates[-2:])
+        return out
+
+    def _poll(self, publish=True):
+        recent = self._recent_date_dirs()
+        for date_dir in recent:
+            seen = self._seen.setdefault(date_dir, set())
+            for entry in os.scandir(date_dir):
+                if entry.name in seen or not entry.name.endswith('.jpg'): continue
+                seen.add(entry.name)
+                if publish:
+                    self.notifier.publish_external(entry.path)
+        # Forget folders that rolled out of the window
+        for d in list(self._seen):
+            if d not in recent:
+                del self._seen[d]
+
+    def stop(self):
+        self.running = False
+
+
+def start_snap_watcher(root, notifier: SnapNotifier, mode="auto", poll_interval=5.0, logger=None):
+    """mode: auto | inotify | polling | off. Returns the started watcher (or None)."""
+    if mode == "off": return None
+    watcher = None
+    if mode in ("auto", "inotify") and InotifyWatcher.available():
+        try:
+            watcher = InotifyWatcher(root, notifier, logger=logger)
+        except Exception as e:
+            (logger or logging).warning(f"inotify unavailable ({e}), falling back to polling")
+    if watcher is None:
+        watcher = PollingWatcher(root, notifier, interval=poll_interval, logger=logger)
+    watcher.start()
+    return watcher
@@ -0,0 +1,248 @@
+import os
+import time
+import hashlib
+import tempfile
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+class ThumbnailCache:
+    """
+    Small JPEG previews for captured / merged images.
+
+    Thumbnails are content-addressed on disk (cache_dir/ab/<sha1>.jpg, keyed by
+    the source file's bytes), so identical images share one file and a preview
+    survives after the full-size JPEG was uploaded or cleaned up. A SQLite
+    index maps source paths (with size/mtime) to digests, and an in-memory LRU
+    keeps the most recently shown previews.
+
+    Previews are made eagerly for files under `eager_dirs` (ImageWriter
+    listener; built on the cache's own thread from the bytes just written, so
+    the writer pool is not held up) and lazily on the first get() otherwise.
+    Eager builds are skipped while `max_pending` are queued (get() builds them).
+    The source is decoded at reduced resolution (IMREAD_REDUCED_COLOR_*), so a
+    miss never pays for a full-size decode.
+    """
+    def __init__(self, cache_dir="thumbnails", max_size=(320, 240), jpeg_quality=80, memory_items=256,
+                 max_disk_mb=512, eager_dirs=("results",), max_pending=32, logger: Optional[logging.Logger] = None):
+        self.log = logger or logging.getLogger("ThumbnailCache")
+        self.cache_dir = cache_dir
+        self.db_path = os.path.join(cache_dir, "index.db")
+        self.max_w, self.max_h = max_size
+        self.params = [int(cv2.IMWRITE_JPEG_QUALITY), int(jpeg_quality)]
+        self.memory_items = memory_items
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.eager_dirs = [os.path.abspath(d) + os.sep for d in eager_dirs]
+        self._memory = OrderedDict() # path -> jpeg bytes
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self.max_pending = max_pending
+        self._pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="Thumbnails")
+        os.makedirs(cache_dir, exist_ok=True)
+        self._init_db()
+
+    @classmethod
+    def from_config(cls, config, logger=None):
+        return cls(
+            cache_dir=config.get("THUMBNAILS", "cache_dir", fallback="thumbnails"),
+            max_size=(config.getint("THUMBNAILS", "max_width", fallback=320),
+                      config.getint("THUMBNAILS", "max_height", fallback=240)),
+            jpeg_quality=config.getint("THUMBNAILS", "jpeg_quality", fallback=80),
+            memory_items=config.getint("THUMBNAILS", "memory_items", fallback=256),
+            max_disk_mb=config.getfloat("THUMBNAILS", "max_disk_mb", fallback=512),
+            eager_dirs=[d.strip() for d in config.get("THUMBNAILS", "eager_dirs", fallback="results").split(",")
+                        if d.strip()],
+            logger=logger
+        )
+
+    def _get_connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        with self._get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS thumbs (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER,
+                    mtime REAL,
+                    digest TEXT,
+                    last_access REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_thumbs_digest ON thumbs (digest)")
+            conn.commit()
+
+    def _thumb_path(self, digest):
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.jpg")
+
+    # --- Public API ---
+
+    def on_written(self, path, data=None):
+        """ImageWriter listener (with_data=True): queue previews for captures and merged images."""
+        path = os.path.abspath(path)
+        if not any(path.startswith(d) for d in self.eager_dirs): return
+        with self._lock:
+            if self._pending >= self.max_pending: return
+            self._pending += 1
+        self._executor.submit(self._build_eager, path, data)
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _build_eager(self, path, raw):
+        try:
+            st = os.stat(path)
+            if self._load_indexed(path, st) is None:
+                self._build(path, st, raw)
+        except Exception as e:
+            self.log.error(f"Thumbnail build failed for {path}: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def get(self, path, remember=True) -> Optional[bytes]:
+        """JPEG bytes of the preview for `path`, or None if it cannot be produced."""
+        path = os.path.abspath(path)
+        with self._lock:
+            data = self._memory.get(path)
+            if data is not None:
+                self._memory.move_to_end(path)
+                return data
+
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None # Source gone (uploaded / cleaned up): the cached preview is still valid
+
+        data = self._load_indexed(path, st)
+        if data is None and st is not None:
+            data = self._build(path, st)
+        if data is not None and remember:
+            self._remember(path, data)
+        return data
+
+    def _remember(self, path, data):
+        with self._lock:
+            self._memory[path] = data
+            self._memory.move_to_end(path)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def _load_indexed(self, path, st):
+        with self._get_connection() as conn:
+            row = conn.execute("SELECT size, mtime, digest FROM thumbs WHERE path = ?", (path,)).fetchone()
+            if row is None: return None
+            if st is not None and (row['size'] != st.st_size or row['mtime'] != st.st_mtime):
+                return None # Source replaced
+            try:
+                with open(self._thumb_path(row['digest']), "rb") as f:
+                    data = f.read()
+            except OSError:
+                return None
+            conn.execute("UPDATE thumbs SET last_access = ? WHERE path = ?", (time.time(), path))
+            conn.commit()
+        return data
+
+    def _build(self, path, st, raw=None):
+        # 1. Content address from the encoded bytes (cheap compared to decoding)
+        if raw is None:
+            try:
+                with open(path, "rb") as f:
+                    raw = f.read()
+            except OSError:
+                return None
+        digest = hashlib.sha1(raw).hexdigest()
+        thumb_path = self._thumb_path(digest)
+
+        # 2. Reuse an existing preview of identical content, else decode at reduced size
+        data = None
+        if os.path.exists(thumb_path):
+            try:
+                with open(thumb_path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                data = None
+        if data is None:
+            data = self._render(raw)
+            if data is None:
+                self.log.warning(f"Thumbnail: cannot decode {path}")
+                return None
+            os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+            # Unique temp name: the loader thread and the eager builder may build the same image
+            fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(thumb_path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, thumb_path)
+
+        # 3. Index path -> digest
+        with self._get_connection() as conn:
+            conn.execute("INSERT OR REPLACE INTO thumbs (path, size, mtime, digest, last_access) VALUES (?, ?, ?, ?, ?)",
+                         (path, st.st_size, st.st_mtime, digest, time.time()))
+            conn.commit()
+
+        with self._lock:
+            self._writes_since_prune += 1
+            due = self._writes_since_prune >= 200
+            if due:
+                self._writes_since_prune = 0
+        if due:
+            self.prune()
+        return data
+
+    def _render(self, raw):
+        buf = np.frombuffer(raw, dtype=np.uint8)
+        # Pick the largest libjpeg downscale that still covers the target size
+        img = None
+        for flag, factor in ((cv2.IMREAD_REDUCED_COLOR_8, 8), (cv2.IMREAD_REDUCED_COLOR_4, 4),
+                             (cv2.IMREAD_REDUCED_COLOR_2, 2), (cv2.IMREAD_COLOR, 1)):
+            img = cv2.imdecode(buf, flag)
+            if img is None: return None
+            h, w = img.shape[:2]
+            if factor == 1 or (w >= self.max_w and h >= self.max_h): break
+        h, w = img.shape[:2]
+        scale = min(self.max_w / w, self.max_h / h, 1.0)
+        if scale < 1.0:
+            img = cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        ok, enc = cv2.imencode(".jpg", img, self.params)
+        return enc.tobytes() if ok else None
+
+    def prune(self):
+        """Drop least recently used previews while the cache exceeds max_disk_mb."""
+        try:
+            with self._get_connection() as conn:
+                rows = conn.execute("""
+                    SELECT digest, MAX(last_access) AS last_access FROM thumbs
+                    GROUP BY digest ORDER BY last_access ASC
+                """).fetchall()
+                sizes = {}
+                for r in rows:
+                    try:
+                        sizes[r['digest']] = os.path.getsize(self._thumb_path(r['digest']))
+                    except OSError:
+                        sizes[r['digest']] = 0
+                total = sum(sizes.values())
+                removed = 0
+                for r in rows:
+                    if total <= self.max_disk_bytes: break
+                    try:
+                        os.remove(self._thumb_path(r['digest']))
+                    except OSError:
+                        pass
+                    conn.execute("DELETE FROM thumbs WHERE digest = ?", (r['digest'],))
+                    total -= sizes[r['digest']]
+                    removed += 1
+                conn.commit()
+            if removed:
+                self.log.info(f"Thumbnail cache pruned {removed} previews")
+        except Exception as e:
+            self.log.error(f"Thumbnail prune failed: {e}")
@@ -0,0 +1,160 @@
+import time
+import logging
+import threading
+from datetime import datetime, time as dtime
+from typing import Optional, List, Tuple, Callable
+
+# Priority classes (lower value = uploaded first)
+PRIORITY_RESULT = 0 # Merged session images
+PRIORITY_RECORD = 1 # Data-lake log records
+PRIORITY_SNAP = 2   # Raw snapshots
+PRIORITY_LAKE = 3   # Filtered data-lake images (ai_image_filter); throttled, never paused
+PRIORITY_NAMES = {PRIORITY_RESULT: "result", PRIORITY_RECORD: "record", PRIORITY_SNAP: "snap",
+                  PRIORITY_LAKE: "lake"}
+
+
+class TokenBucket:
+    """Byte-rate limiter. rate <= 0 means unlimited."""
+    def __init__(self, rate_bytes=0.0, burst_bytes=None):
+        self.rate = rate_bytes
+        self.burst = burst_bytes or max(rate_bytes, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate_bytes, burst_bytes=None):
+        with self._lock:
+            self._fill()
+            self.rate = rate_bytes
+            self.burst = burst_bytes or max(rate_bytes, 1.0)
+            self.tokens = min(self.tokens, self.burst)
+
+    def _fill(self):
+        now = time.monotonic()
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_consume(self, n) -> float:
+        """Take n bytes if available (a file larger than the burst may drive the
+        bucket negative). Returns 0 on success, otherwise seconds to wait."""
+        with self._lock:
+            if self.rate <= 0: return 0.0
+            self._fill()
+            need = min(n, self.burst)
+            if self.tokens >= need:
+                self.tokens -= n
+                return 0.0
+            return (need - self.tokens) / self.rate
+
+
+def parse_hours(spec: str) -> List[Tuple[dtime, dtime]]:
+    """'06:00-12:00, 13:00-20:00' -> [(06:00, 12:00), ...]. Ranges may wrap midnight."""
+    ranges = []
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part: continue
+        start, end = part.split("-")
+        ranges.append((datetime.strptime(start.strip(), "%H:%M").time(),
+                       datetime.strptime(end.strip(), "%H:%M").time()))
+    return ranges
+
+
+def in_hours(ranges, now: Optional[dtime] = None) -> bool:
+    now = now or datetime.now().time()
+    for start, end in ranges:
+        if start <= end:
+            if start <= now < end: return True
+        elif now >= start or now < end: # Wraps midnight
+            return True
+    return False
+
+
+class UploadScheduler:
+    """
+    Shared gate in front of every upload so cloud sync does not starve the RTSP
+    streams feeding DumpProcessor on the factory link.
+
+    - Token bucket: bandwidth cap, with a separate rate for peak hours.
+    - Priority classes: while a higher-priority upload waits for bandwidth,
+      lower classes wait behind it (results -> records -> raw snaps -> lake images).
+    - Time-of-day windows: during peak hours raw snaps are paused...
+    - ...unless backpressure says otherwise: once the local snap backlog
+      reaches `snap_backlog_min` files they are let through (throttled) so the
+      disk does not fill up.
+
+    acquire() returns False for a paused class; callers leave the item pending
+    and retry it on a later pass.
+
+    The bucket is per process: with `share` uploading processes (the snapshot
+    filter's worker pool) each one gets 1/share of the configured rates.
+    """
+    def __init__(self, peak_hours="", peak_rate_kbps=0, offpeak_rate_kbps=0, pause_snaps_in_peak=True,
+                 snap_backlog_min=2000, share=1, logger: Optional[logging.Logger] = None):
+        share = max(1, share)
+        self.peak_ranges = parse_hours(peak_hours)
+        self.peak_rate = peak_rate_kbps * 1024 / 8 / share
+        self.offpeak_rate = offpeak_rate_kbps * 1024 / 8 / share
+        self.pause_snaps_in_peak = pause_snaps_in_peak
+        self.snap_backlog_min = snap_backlog_min
+        self.log = logger or logging.getLogger("UploadScheduler")
+
+        self.bucket = TokenBucket()
+        self._cond = threading.Condition()
+        self._waiting = {p: 0 for p in PRIORITY_NAMES}
+        self._backlog = 0
+        self._peak = None
+        self._update_window()
+
+    @classmethod
+    def from_config(cls, config, share=1, logger=None):
+        return cls(
+            peak_hours=config.get("UPLOAD", "peak_hours", fallback=""),
+            peak_rate_kbps=config.getint("UPLOAD", "peak_rate_kbps", fallback=0),
+            offpeak_rate_kbps=config.getint("UPLOAD", "offpeak_rate_kbps", fallback=0),
+            pause_snaps_in_peak=config.getboolean("UPLOAD", "pause_snaps_in_peak", fallback=True),
+            snap_backlog_min=config.getint("UPLOAD", "snap_backlog_min", fallback=2000),
+            share=share,
+            logger=logger
+        )
+
+    def _update_window(self):
+        peak = in_hours(self.peak_ranges)
+        if peak != self._peak:
+            self._peak = peak
+            rate = self.peak_rate if peak else self.offpeak_rate
+            # Burst of ~2s keeps transfers smooth without long idle gaps
+            self.bucket.set_rate(rate, burst_bytes=rate * 2 if rate > 0 else None)
+            self.log.info(f"Upload window: {'peak' if peak else 'off-peak'} "
+                          f"({'unlimited' if rate <= 0 else f'{rate * 8 / 1024:.0f} kbps'})")
+        return peak
+
+    def set_backlog(self, snap_files: int):
+        """Number of raw snaps waiting locally (backpressure input)."""
+        self._backlog = snap_files
+
+    def is_paused(self, priority) -> bool:
+        if priority != PRIORITY_SNAP or not self.pause_snaps_in_peak: return False
+        return self._update_window() and self._backlog < self.snap_backlog_min
+
+    def acquire(self, priority, nbytes, should_continue: Optional[Callable[[], bool]] = None) -> bool:
+        """Block until `nbytes` may be sent for this class. False if paused or stopping."""
+        if self.is_paused(priority): return False
+        with self._cond:
+            self._waiting[priority] += 1
+        try:
+            while True:
+                if should_continue and not should_continue(): return False
+                with self._cond:
+                    # Yield to higher-priority uploads waiting for bandwidth
+                    if any(self._waiting[p] for p in PRIORITY_NAMES if p < priority):
+                        self._cond.wait(0.5)
+                        continue
+                self._update_window()
+                wait = self.bucket.try_consume(nbytes)
+                if wait <= 0: return True
+                time.sleep(min(wait, 0.5))
+        finally:
+            with self._cond:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import logging
+from dataclasses import dataclass, asdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+import cv2
+
+# Optional: EXIF metadata embedding (encoding falls back to OpenCV without metadata)
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+EXIF_IMAGE_DESCRIPTION = 0x010E
+EXIF_SOFTWARE = 0x0131
+
+FORMAT_EXT = {"jpeg": ".jpg", "webp": ".webp"}
+
+
+@dataclass(frozen=True)
+class TransformSpec:
+    long_edge: int = 1280   # 0 = keep resolution
+    fmt: str = "jpeg"       # jpeg | webp
+    quality: int = 85
+    embed_metadata: bool = True
+
+
+def _reduced_read_flag(src_long_edge_hint, target):
+    """Pick a DCT-domain reduced JPEG decode when the target is much smaller."""
+    if not target or not src_long_edge_hint: return cv2.IMREAD_COLOR
+    ratio = src_long_edge_hint / target
+    if ratio >= 4: return cv2.IMREAD_REDUCED_COLOR_4
+    if ratio >= 2: return cv2.IMREAD_REDUCED_COLOR_2
+    return cv2.IMREAD_COLOR
+
+
+def transform_image(src: str, dst: str, spec: dict, metadata: Optional[dict] = None,
+                    src_long_edge_hint: int = 0) -> int:
+    """
+    Resize `src` to spec['long_edge'] and re-encode to `dst`. Runs in a worker
+    process (module-level so it pickles on Windows). Returns bytes written.
+    """
+    img = cv2.imread(src, _reduced_read_flag(src_long_edge_hint, spec['long_edge']))
+    if img is None:
+        raise ValueError(f"Cannot decode {src}")
+
+    h, w = img.shape[:2]
+    long_edge = spec['long_edge']
+    if long_edge and max(h, w) > long_edge:
+        scale = long_edge / max(h, w)
+        img = cv2.resize(img, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+
+    fmt = spec['fmt']
+    quality = int(spec['quality'])
+    tmp = dst + ".tmp"
+    if Image is not None and spec.get('embed_metadata') and metadata:
+        pil = Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+        exif = Image.Exif()
+        exif[EXIF_IMAGE_DESCRIPTION] = json.dumps(metadata, separators=(",", ":"), default=str)
+        exif[EXIF_SOFTWARE] = "sugarcane-dump-monitor"
+        if fmt == "webp":
+            pil.save(tmp, format="WEBP", quality=quality, method=4, exif=exif.tobytes())
+        else:
+            pil.save(tmp, format="JPEG", quality=quality, optimize=True, exif=exif.tobytes())
+    else:
+        if fmt == "webp":
+            ok, buf = cv2.imencode(".webp", img, [cv2.IMWRITE_WEBP_QUALITY, quality])
+        else:
+            ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, quality,
+                                                 cv2.IMWRITE_JPEG_OPTIMIZE, 1])
+        if not ok:
+            raise ValueError(f"Encode failed for {src}")
+        with open(tmp, "wb") as f:
+            f.write(buf.tobytes())
+    os.replace(tmp, dst)
+    return os.path.getsize(dst)
+
+
+class UploadTransformer:
+    """
+    Pre-upload stage for raw snaps: downscale to a target long edge and
+    re-encode (tuned JPEG or WebP, with dump/plate/state metadata in EXIF when
+    Pillow is available). CPU work runs in a process pool; upload threads just
+    wait on the result. The output is written to `staging_dir` (outside the
+    watched snapshot tree) and removed after upload.
+
+    With keep_original_days > 0 the full-resolution original is moved to
+    `originals_dir` (mirroring the S3 key) and purged after that many days, so
+    training-quality images can still be fetched on demand.
+    """
+    def __init__(self, spec: TransformSpec, workers=2, staging_dir="upload_staging",
+                 originals_dir="originals", keep_original_days=0, src_long_edge_hint=0,
+                 logger: Optional[logging.Logger] = None):
+        if spec.fmt not in FORMAT_EXT:
+            raise ValueError(f"Unsupported upload format: {spec.fmt}")
+        self.spec = spec
+        self.workers = workers
+        self.staging_dir = staging_dir
+        self.originals_dir = originals_dir
+        self.keep_original_days = keep_original_days
+        self.src_long_edge_hint = src_long_edge_hint
+        self.log = logger or logging.getLogger("UploadTransformer")
+        self._pool = None
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config, logger=None):
+        """None when [UPLOAD_TRANSFORM] is disabled."""
+        if not config.getboolean("UPLOAD_TRANSFORM", "enabled", fallback=False):
+            return None
+        fmt = config.get("UPLOAD_TRANSFORM", "format", fallback="jpeg").lower()
+        if fmt == "avif":
+            # OpenCV/Pillow builds on the dump PCs have no AVIF encoder
+            (logger or logging).warning("AVIF not supported here, using WebP for uploads")
+            fmt = "webp"
+        spec = TransformSpec(
+            long_edge=config.getint("UPLOAD_TRANSFORM", "long_edge", fallback=1280),
+            fmt=fmt,
+            quality=config.getint("UPLOAD_TRANSFORM", "quality", fallback=85),
+            embed_metadata=config.getboolean("UPLOAD_TRANSFORM", "embed_metadata", fallback=True)
+        )
+        return cls(
+            spec,
+            workers=config.getint("UPLOAD_TRANSFORM", "workers", fallback=2),
+            staging_dir=config.get("UPLOAD_TRANSFORM", "staging_dir", fallback="upload_staging"),
+            originals_dir=config.get("UPLOAD_TRANSFORM", "originals_dir", fallback="originals"),
+            keep_original_days=config.getint("UPLOAD_TRANSFORM", "keep_original_days", fallback=0),
+            src_long_edge_hint=config.getint("UPLOAD_TRANSFORM", "source_long_edge", fallback=0),
+            logger=logger
+        )
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def s3_key_for(self, s3_key: str) -> str:
+        root, _ext = os.path.splitext(s3_key)
+        return root + FORMAT_EXT[self.spec.fmt]
+
+    def prepare(self, local_path: str, s3_key: str, metadata: Optional[dict] = None) -> Tuple[str, str]:
+        """
+        Returns (path_to_upload, s3_key). Falls back to the original when the
+        transformed file would not be smaller.
+        """
+        out = os.path.join(self.staging_dir, f"{uuid.uuid4().hex}{FORMAT_EXT[self.spec.fmt]}")
+        size = self._get_pool().submit(transform_image, local_path, out, asdict(self.spec),
+                                       metadata, self.src_long_edge_hint).result()
+        if size >= os.path.getsize(local_path) and self.spec.fmt == "jpeg":
+            os.remove(out)
+            return local_path, s3_key
+        return out, self.s3_key_for(s3_key)
+
+    def finish(self, local_path: str, upload_path: str, s3_key: str, delete_original: bool):
+        """After a successful upload: drop the staged file, keep or delete the original."""
+        if upload_path != local_path and os.path.exists(upload_path):
+            os.remove(upload_path)
+        if not delete_original: return
+        if self.keep_original_days > 0:
+            keep_path = os.path.join(self.originals_dir, *s3_key.split("/"))
+            os.makedirs(os.path.dirname(keep_path), exist_ok=True)
+            shutil.move(local_path, keep_path)
+            os.utime(keep_path) # Retention counts from upload, not capture
+        else:
+            os.remove(local_path)
+
+    def discard(self, local_path: str, upload_path: str):
+        """Upload failed: the original stays pending, the staged copy is rebuilt next time."""
+        if upload_path != local_path and os.path.exists(upload_path):
+            os.remove(upload_path)
+
+    def purge_originals(self) -> int:
+        """Delete kept originals older than keep_original_days. Returns files removed."""
+        if self.keep_original_days <= 0 or not os.path.isdir(self.originals_dir): return 0
+        cutoff = time.time() - self.keep_original_days * 86400
+        removed = 0
+        for dirpath, _dirs, files in os.walk(self.originals_dir, topdown=False):
+            for f in files:
+                p = os.path.join(dirpath, f)
+                try:
+                    if os.path.getmtime(p) < cutoff:
+                        os.remove(p)
+                        removed += 1
+                except OSError:
+                    pass
+            if dirpath != self.originals_dir and not os.listdir(dirpath):
+                os.rmdir(dirpath)
+        if removed:
+            self.log.info(f"Purged {removed} originals older than {self.keep_original_days} days")
+        return removed
+
+    def shutdown(self):
+        if self._pool:
+            self._pool.shutdown(wait=True)
+            self._pool = None
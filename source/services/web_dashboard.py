@@ -0,0 +1,264 @@
+import json
+import hmac
+import asyncio
+import logging
+from typing import Optional
+
+import cv2
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+
+_INDEX_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Sugarcane AI - {factory}</title>
+<style>
+body {{ font-family: 'Segoe UI', sans-serif; background: #F1F5F9; margin: 0; padding: 16px; }}
+h1 {{ color: #1E3A8A; font-size: 22px; margin: 0 0 12px 0; }}
+.grid {{ display: grid; grid-template-columns: repeat(auto-fill, minmax(420px, 1fr)); gap: 12px; }}
+.card {{ background: white; border-radius: 10px; padding: 10px; }}
+.card h2 {{ font-size: 16px; margin: 0 0 6px 0; color: #0F172A; }}
+.card img {{ width: 49%; background: #0F172A; border-radius: 6px; min-height: 120px; }}
+.meta {{ font-family: Consolas, monospace; font-size: 13px; color: #334155; }}
+</style></head><body>
+<h1>{factory} | {milling}</h1>
+<div class="grid" id="grid"></div>
+<script>
+const grid = document.getElementById('grid');
+const cards = {{}};
+async function refresh() {{
+  const res = await fetch('api/state');
+  const data = await res.json();
+  for (const s of data.stations) {{
+    let c = cards[s.dump_id];
+    if (!c) {{
+      c = document.createElement('div'); c.className = 'card';
+      c.innerHTML = `<h2>${{s.dump_id}}</h2>` +
+        `<img src="api/stations/${{s.dump_id}}/mjpeg?view=LPR">` +
+        `<img src="api/stations/${{s.dump_id}}/mjpeg?view=AI">` +
+        `<div class="meta"></div>`;
+      grid.appendChild(c); cards[s.dump_id] = c;
+    }}
+    c.querySelector('.meta').textContent =
+      `${{s.status}} | ${{s.state}} | LPR ${{s.lpr}} | TRASH ${{s.trash_pct}}% | TX ${{s.transaction_id}}`;
+  }}
+}}
+refresh(); setInterval(refresh, 1000);
+</script></body></html>
+"""
+
+
+PREVIEW_VIEWS = ("LPR", "AI")
+
+
+class WebDashboard:
+    """
+    Small aiohttp server for headless mode (no Qt).
+
+    Serves station state (JSON), MJPEG / single-JPEG previews, paged
+    transactions and daily reports. Previews are encoded on demand only:
+    nothing is encoded while no client is connected, and clients watching the
+    same station/view share one encode per new frame (keyed by frame_seq),
+    rate-limited to preview_fps and downscaled to preview_width.
+
+    Live video, plates and transactions are sensitive: the server binds to
+    localhost by default. When a `token` is configured every request must carry
+    it (?token=..., "Authorization: Bearer ..." or the cookie set by the page).
+    """
+    def __init__(self, system, host="127.0.0.1", port=8080, preview_fps=2.0, preview_width=640, jpeg_quality=70,
+                 token="", logger: Optional[logging.Logger] = None):
+        if web is None:
+            raise RuntimeError("aiohttp is required for the web dashboard (pip install aiohttp)")
+        self.log = logger or logging.getLogger("WebDashboard")
+        self.system = system
+        self.host = host
+        self.port = port
+        self.preview_interval = 1.0 / max(0.1, preview_fps)
+        self.preview_width = preview_width
+        self.params = [int(cv2.IMWRITE_JPEG_QUALITY), int(jpeg_quality)]
+        self._previews = {}    # (dump_id, view) -> (frame_seq, jpeg bytes)
+        self._encode_locks = {}
+        self._info = None      # Static site metadata (SQLite), read once
+        self.clients = 0       # Connected MJPEG streams
+        self.token = token
+        if not token and host not in ("127.0.0.1", "localhost", "::1"):
+            self.log.warning(f"Web dashboard on {host} without [WEB] token: anyone on the network can watch")
+
+        middlewares = []
+        if token:
+            async def auth(request, handler):
+                return await self._auth(request, handler)
+            middlewares.append(web.middleware(auth))
+        self.app = web.Application(middlewares=middlewares)
+        self.app.add_routes([
+            web.get("/", self.handle_index),
+            web.get("/api/health", self.handle_health),
+            web.get("/api/state", self.handle_state),
+            web.get("/api/stations/{dump_id}/health", self.handle_stream_health),
+            web.get("/api/stations/{dump_id}/snapshot.jpg", self.handle_snapshot),
+            web.get("/api/stations/{dump_id}/mjpeg", self.handle_mjpeg),
+            web.get("/api/transactions", self.handle_transactions),
+            web.get("/api/transactions/{session_uuid}", self.handle_session),
+            web.get("/api/report/{date}", self.handle_report),
+        ])
+
+    @classmethod
+    def from_config(cls, config, system, logger=None):
+        return cls(
+            system,
+            host=config.get("WEB", "host", fallback="127.0.0.1"),
+            port=config.getint("WEB", "port", fallback=8080),
+            preview_fps=config.getfloat("WEB", "preview_fps", fallback=2.0),
+            preview_width=config.getint("WEB", "preview_width", fallback=640),
+            jpeg_quality=config.getint("WEB", "jpeg_quality", fallback=70),
+            token=config.get("WEB", "token", fallback="").strip(),
+            logger=logger
+        )
+
+    def run(self):
+        """Blocks until interrupted (Ctrl+C / SIGTERM)."""
+        self.log.info(f"Web dashboard on http://{self.host}:{self.port}/")
+        web.run_app(self.app, host=self.host, port=self.port, print=None)
+
+    async def _auth(self, request, handler):
+        auth = request.headers.get("Authorization", "")
+        given = (request.query.get("token") or request.cookies.get("dashboard_token")
+                 or (auth[7:] if auth.startswith("Bearer ") else ""))
+        if not hmac.compare_digest(given.encode(), self.token.encode()):
+            raise web.HTTPUnauthorized()
+        resp = await handler(request)
+        if request.query.get("token") and isinstance(resp, web.Response):
+            # The page's own fetch / <img> requests then authenticate by cookie
+            resp.set_cookie("dashboard_token", self.token, httponly=True, samesite="Strict")
+        return resp
+
+    # --- State ---
+
+    def _stations(self):
+        hub = getattr(self.system, 'state_hub', None)
+        if hub:
+            states = hub.all()
+            return [states[d] for d in sorted(states)]
+        return self.system.get_processor_states()
+
+    async def _system_info(self):
+        if self._info is None:
+            self._info = await asyncio.get_running_loop().run_in_executor(None, self.system.get_system_info)
+        return self._info
+
+    async def handle_index(self, request):
+        info = await self._system_info()
+        html = _INDEX_HTML.format(factory=info.get('factory', '-'), milling=info.get('milling', '-'))
+        return web.Response(text=html, content_type="text/html")
+
+    async def handle_health(self, request):
+        stations = self._stations()
+        return web.json_response({
+            'stations': len(stations),
+            'running': sum(1 for s in stations if s.get('status') == 'RUNNING'),
+            'preview_clients': self.clients,
+            'models': self.system.get_startup_status(),
+        })
+
+    async def handle_state(self, request):
+        return web.json_response({'info': await self._system_info(), 'stations': self._stations()})
+
+    async def handle_stream_health(self, request):
+        dump_id = request.match_info['dump_id']
+        if self.system.get_processor(dump_id) is None:
+            raise web.HTTPNotFound()
+        return web.json_response(self.system.get_stream_health(dump_id))
+
+    # --- Previews ---
+
+    def _encode(self, frame):
+        h, w = frame.shape[:2]
+        if w > self.preview_width:
+            scale = self.preview_width / w
+            frame = cv2.resize(frame, (self.preview_width, max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".jpg", frame, self.params)
+        return buf.tobytes() if ok else None
+
+    async def _preview(self, dump_id, view):
+        """Latest JPEG for a station view; re-encoded only when the processor published a new frame."""
+        p = self.system.get_processor(dump_id)
+        if p is None or view not in PREVIEW_VIEWS: return None
+        key = (dump_id, view)
+        lock = self._encode_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            seq = p.frame_seq
+            cached = self._previews.get(key)
+            if cached and cached[0] == seq:
+                return cached[1]
+            frame = p.latest_frames.get(view)
+            if frame is None:
+                return cached[1] if cached else None
+            jpeg = await asyncio.get_running_loop().run_in_executor(None, self._encode, frame)
+            if jpeg:
+                self._previews[key] = (seq, jpeg)
+            return jpeg
+
+    async def handle_snapshot(self, request):
+        jpeg = await self._preview(request.match_info['dump_id'], request.query.get('view', 'LPR'))
+        if jpeg is None:
+            raise web.HTTPNotFound()
+        return web.Response(body=jpeg, content_type="image/jpeg", headers={'Cache-Control': 'no-store'})
+
+    async def handle_mjpeg(self, request):
+        dump_id = request.match_info['dump_id']
+        view = request.query.get('view', 'LPR')
+        if view not in PREVIEW_VIEWS:
+            raise web.HTTPBadRequest(text=f"view must be one of {', '.join(PREVIEW_VIEWS)}")
+        if self.system.get_processor(dump_id) is None:
+            raise web.HTTPNotFound()
+
+        resp = web.StreamResponse(headers={
+            'Content-Type': 'multipart/x-mixed-replace; boundary=frame',
+            'Cache-Control': 'no-store',
+        })
+        await resp.prepare(request)
+        self.clients += 1
+        last = None
+        try:
+            while True:
+                jpeg = await self._preview(dump_id, view)
+                if jpeg is not None and jpeg is not last:
+                    last = jpeg
+                    await resp.write(b"--frame\r\nContent-Type: image/jpeg\r\n"
+                                     + f"Content-Length: {len(jpeg)}\r\n\r\n".encode() + jpeg + b"\r\n")
+                await asyncio.sleep(self.preview_interval)
+        except ConnectionResetError:
+            pass # Client went away
+        finally:
+            self.clients -= 1
+            if self.clients == 0:
+                self._previews.clear() # Nobody watching: drop cached JPEGs
+        return resp
+
+    # --- Reports ---
+
+    async def handle_transactions(self, request):
+        q = request.query
+        after = (q['after_time'], q.get('after_uuid', '')) if q.get('after_time') else None
+        try:
+            limit = min(int(q.get('limit', 100)), 1000)
+        except ValueError:
+            raise web.HTTPBadRequest(text="limit must be an integer")
+        rows = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: self.system.get_transactions_page(after, limit, dump_id=q.get('dump_id'),
+                                                            plate=q.get('plate'), status=q.get('status')))
+        return web.json_response(rows, dumps=lambda o: json.dumps(o, default=str))
+
+    async def handle_session(self, request):
+        detail = await asyncio.get_running_loop().run_in_executor(
+            None, self.system.get_session_detail, request.match_info['session_uuid'])
+        if not detail:
+            raise web.HTTPNotFound()
+        return web.json_response(detail, dumps=lambda o: json.dumps(o, default=str))
+
+    async def handle_report(self, request):
+        rows = await asyncio.get_running_loop().run_in_executor(
+            None, self.system.get_daily_report, request.match_info['date'])
+        return web.json_response(rows, dumps=lambda o: json.dumps(o, default=str))
@@ -8,7 +8,11 @@ from PySide6.QtGui import QIcon, QFont, QPalette, QColor
 from source.ui.qt_ui.sidebar import Sidebar
 from source.ui.qt_ui.overview_view import OverviewView
 from source.ui.qt_ui.single_view import SingleStationView
+from source.ui.qt_ui.transactions_view import TransactionsView
+from source.ui.qt_ui.session_detail_view import SessionDetailView
 from source.ui.qt_ui.modern_style import ModernStyle
+from source.ui.qt_ui.preview_renderer import PreviewRenderer
+from source.ui.qt_ui.state_bridge import QtStateBridge
 from source.services.cloud_sync import CloudSyncWorker
 from PySide6.QtCore import QThread
 
@@ -47,12 +51,21 @@ class QtMainWindow(QMainWindow):
         # Initial placement: Let the root layout have it first
         self.main_layout.addWidget(self.sidebar_container)
         
+        # Video tiles are resized / converted off the GUI thread
+        self.preview_renderer = PreviewRenderer()
+        self.preview_renderer.start()
+
+        # Station state is pushed by the processors when the system has a state hub
+        hub = getattr(self.system, 'state_hub', None)
+        self.state_bridge = QtStateBridge(hub, interval_ms=100, parent=self) if hub else None
+
         # 2. Stacked Content
         self.content_stack = QStackedWidget()
         self.main_layout.addWidget(self.content_stack)
         
         # Page 0: Overview
-        self.overview_view = OverviewView(self.system)
+        self.overview_view = OverviewView(self.system, renderer=self.preview_renderer,
+                                          bridge=self.state_bridge)
         self.overview_view.station_clicked.connect(self._on_view_selected)
         self.overview_view.order_changed.connect(self.sidebar.update_button_order)
         
@@ -62,13 +75,27 @@ class QtMainWindow(QMainWindow):
         self.content_stack.addWidget(self.overview_view)
         
         # Page 1: Single Dump View
-        self.single_view = SingleStationView(self.system)
+        self.single_view = SingleStationView(self.system, renderer=self.preview_renderer,
+                                             bridge=self.state_bridge)
         self.content_stack.addWidget(self.single_view)
         
+        # Page 2: Transaction History (paged, loaded on demand)
+        self.transactions_view = TransactionsView(self.system)
+        self.content_stack.addWidget(self.transactions_view)
+        
+        # Page 3: Session Detail (thumbnails)
+        self.session_view = SessionDetailView(self.system)
+        self.transactions_view.session_selected.connect(self._on_session_selected)
+        self.session_view.back_requested.connect(lambda: self.content_stack.setCurrentIndex(2))
+        self.content_stack.addWidget(self.session_view)
+        
         # Timer
+        self._models_ready = not hasattr(self.system, 'get_startup_status')
+        if self._models_ready:
+            self.sidebar.update_model_status({'ready': True})
         self.timer = QTimer()
         self.timer.timeout.connect(self._update_state)
-        self.timer.start(100) # 10 FPS
+        self.timer.start(100) # 10 FPS (clock; station polling only without a state bridge)
         
         # 3. Cloud Sync Integration (Unified Worker)
         self._init_cloud_service()
@@ -81,6 +108,9 @@ class QtMainWindow(QMainWindow):
     def _on_view_selected(self, view_id):
         if view_id == "overview":
             self.content_stack.setCurrentIndex(0)
+        elif view_id == "transactions":
+            self.transactions_view.refresh()
+            self.content_stack.setCurrentIndex(2)
         else:
             # Update Single View
             self.single_view.set_station(view_id)
@@ -90,6 +120,10 @@ class QtMainWindow(QMainWindow):
         # but in this case, we keep it visible.
         self.sidebar_container.show()
 
+    def _on_session_selected(self, session_uuid):
+        self.session_view.load_session(session_uuid)
+        self.content_stack.setCurrentIndex(3)
+
     def _setup_theme(self):
         pass
 
@@ -98,6 +132,14 @@ class QtMainWindow(QMainWindow):
         now_str = QDateTime.currentDateTime().toString("HH:mm:ss")
         self.sidebar.update_clock(now_str)
         
+        # Model loading progress (until the background loader is done)
+        if not self._models_ready:
+            status = self.system.get_startup_status()
+            self.sidebar.update_model_status(status)
+            self._models_ready = status.get('ready', False)
+        
+        if self.state_bridge: return # Views are updated by the bridge
+
         # Update Active View Only
         idx = self.content_stack.currentIndex()
         if idx == 0:
@@ -106,6 +148,12 @@ class QtMainWindow(QMainWindow):
             self.single_view.update_view()
 
     def closeEvent(self, event):
+        self.timer.stop()
+        if self.state_bridge:
+            self.state_bridge.stop()
+        self.preview_renderer.stop()
+        self.transactions_view.stop()
+        self.session_view.stop()
         self.system.stop_processors()
         
         # Stop Cloud Worker safely
@@ -135,7 +183,7 @@ class QtMainWindow(QMainWindow):
         self.status_bar.showMessage(f"System Active | Cloud Agent: {msg}")
 
     def _on_cloud_progress(self, uploaded, deleted):
-        self._on_cloud_status(f"Batch Done (Up: {uploaded}, Del: {deleted})")
+        self._on_cloud_status(f"Syncing (Up: {uploaded}, Del: {deleted})")
 
     def _on_cloud_error(self, err):
         self.status_bar.showMessage(f"System Warning | Cloud Error: {err}")
@@ -160,7 +208,22 @@ if __name__ == "__main__":
                 ('1002', 'MDC-A-02', False, 'XYZ-9999', '12:05:00'),
                 ('1003', 'MDC-A-01', True, 'LPR-5555', '12:10:00'),
             ]
+
+        def get_transactions_page(self, after=None, limit=200, dump_id=None, plate=None, status=None):
+            if after: return []
+            return [
+                {'session_uuid': '00000000-1001', 'dump_id': 'MDC-A-01', 'start_time': '2024-01-01 12:00:00',
+                 'end_time': '2024-01-01 12:04:00', 'plate_number': 'ABC-1234', 'status': 'COMPLETE', 'img_count': 4},
+                {'session_uuid': '00000000-1002', 'dump_id': 'MDC-A-02', 'start_time': '2024-01-01 12:05:00',
+                 'end_time': None, 'plate_number': 'XYZ-9999', 'status': 'INCOMPLETE', 'img_count': 2},
+            ]
         
+        def get_session_detail(self, session_uuid):
+            return {'session_uuid': session_uuid, 'dump_id': 'MDC-A-01', 'plate_number': 'ABC-1234',
+                    'start_time': '2024-01-01 12:00:00', 'status': 'COMPLETE', 'images': []}
+
+        def get_thumbnail(self, path): return None
+
         def get_dashboard_charts_data(self):
             return {
                 'hourly_trend': [('08:00', 5), ('09:00', 12), ('10:00', 8), ('11:00', 15)],
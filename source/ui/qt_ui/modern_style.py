@@ -42,6 +42,33 @@ class ModernStyle:
         }}
         
         /* Cards: Hover Effect (If using QFrame as button, but generic here) */
+
+        /* Station card state styles (switched via dynamic properties, not setStyleSheet) */
+        QLabel#StateBadge {{
+            background-color: #F1F5F9; color: #64748B;
+            padding: 4px 10px; border-radius: 4px; border: 1px solid #E2E8F0;
+            font-weight: 700; font-size: 11px;
+        }}
+        QLabel#CamBadge {{
+            background-color: #FEE2E2; color: #991B1B;
+            padding: 4px 8px; border-radius: 4px; border: 1px solid #FECACA;
+            font-weight: 700; font-size: 10px;
+        }}
+        QLabel#StateBadge[active="true"] {{
+            background-color: #DCFCE7; color: #166534; border: 1px solid #BBF7D0;
+        }}
+        QFrame#TrashFill {{
+            background-color: {ModernStyle.ACCENT_FG}; border-radius: 4px;
+        }}
+        QFrame#TrashFill[high="true"] {{
+            background-color: #EF4444;
+        }}
+        QLabel#ActionLabel {{
+            color: #64748B; font-weight: 700; font-size: 11px; margin-top: 5px;
+        }}
+        QLabel#ActionLabel[active="true"] {{
+            color: #10B981;
+        }}
         
         /* Sidebar */
         QWidget#Sidebar {{
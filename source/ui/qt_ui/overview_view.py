@@ -1,15 +1,22 @@
 from PySide6.QtWidgets import (QWidget, QGridLayout, QScrollArea, QVBoxLayout)
+from functools import partial
 from PySide6.QtCore import Qt, Signal
 from source.ui.qt_ui.station_card import StationCard
+from source.ui.qt_ui.station_view_model import StationViewModel
 
 class OverviewView(QWidget):
     station_clicked = Signal(str)
     order_changed = Signal(list)
 
-    def __init__(self, system, sidebar=None, parent=None):
+    def __init__(self, system, sidebar=None, renderer=None, bridge=None, parent=None):
         super().__init__(parent)
         self.system = system
         self.sidebar = sidebar
+        self.renderer = renderer
+        self.bridge = bridge # QtStateBridge (push updates), None = poll via update_view()
+        self._sub_tokens = []
+        if renderer:
+            renderer.frame_ready.connect(self._on_preview)
         self.setAcceptDrops(True)
         
         # Main Layout
@@ -22,6 +29,7 @@ class OverviewView(QWidget):
         
         # Track Custom Order
         self.dump_order = []
+        self.view_model = StationViewModel()
         self._init_data()
         self._build_grid()
 
@@ -43,12 +51,20 @@ class OverviewView(QWidget):
                  widget.setParent(None)
         
         self.cards = {}
+        self.view_model.reset() # New widgets need a full first paint
+        if self.bridge:
+            for token in self._sub_tokens:
+                self.bridge.unsubscribe(token)
+            self._sub_tokens = []
         
         # Grid Layout: 2 Columns
         for i, d_id in enumerate(self.dump_order):
-            card = StationCard(d_id)
+            card = StationCard(d_id, renderer=self.renderer)
             card.clicked.connect(self.station_clicked.emit)
             self.cards[d_id] = card
+            if self.bridge:
+                # Delivers the current state right away, then only changed fields
+                self._sub_tokens.append(self.bridge.subscribe(d_id, partial(self._on_station_changed, d_id)))
             
             row = i // 2
             col = i % 2
@@ -88,12 +104,26 @@ class OverviewView(QWidget):
             self.order_changed.emit(self.dump_order)
             event.acceptProposedAction()
 
+    def _on_preview(self, key, image):
+        d_id, _, view = key.rpartition(":")
+        if d_id == "single": return # SingleStationView's tiles
+        card = self.cards.get(d_id)
+        if card:
+            card.show_preview(view, image)
+        self.renderer.ack(key)
+
+    def _on_station_changed(self, d_id, changed):
+        card = self.cards.get(d_id)
+        if card is None: return
+        card.apply_changes(changed)
+        # Frames are only fetched while the grid is on screen
+        if 'frame_seq' in changed and self.isVisible():
+            card.update_images(self.system.get_latest_frames(d_id), changed['frame_seq'])
+
     def update_view(self):
-        states = self.system.get_processor_states()
-        state_map = {s['dump_id']: s for s in states}
-        
-        for d_id, card in self.cards.items():
-            if d_id in state_map:
-                card.update_state(state_map[d_id])
-                frames = self.system.get_latest_frames(d_id)
-                card.update_images(frames)
+        # Polling fallback (systems without a state hub)
+        # Only cards whose state changed are touched; frames only when a new one was published
+        changes = self.view_model.diff(self.system.get_processor_states())
+
+        for d_id, changed in changes.items():
+            self._on_station_changed(d_id, changed)
@@ -0,0 +1,83 @@
+import threading
+import cv2
+from PySide6.QtCore import QThread, Signal
+from PySide6.QtGui import QImage
+
+
+class PreviewRenderer(QThread):
+    """
+    Produces display-sized QImages for the video tiles off the GUI thread.
+
+    Views call request(key, frame, (w, h)) with the label size; the frame is
+    resized once, straight to the fitted size (INTER_LINEAR), wrapped in a
+    QImage and delivered through frame_ready (queued to the GUI thread).
+    Only the newest frame per key is kept: while a tile's previous image has
+    not been acknowledged (ack(key) after setPixmap), newer requests replace
+    each other instead of queueing up, so a busy UI drops frames rather than
+    falling behind.
+    """
+    frame_ready = Signal(str, QImage) # key, image
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setObjectName("PreviewRenderer")
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = {}      # key -> (frame, w, h)
+        self._in_flight = set() # keys delivered but not yet shown
+        self._running = True
+        self.dropped = 0
+
+    def request(self, key: str, frame, size):
+        w, h = size
+        if frame is None or w <= 0 or h <= 0: return
+        with self._lock:
+            if key in self._pending:
+                self.dropped += 1
+            self._pending[key] = (frame, w, h)
+        self._wake.set()
+
+    def ack(self, key: str):
+        """Called by the view once the delivered image is on screen."""
+        with self._lock:
+            self._in_flight.discard(key)
+            has_more = key in self._pending
+        if has_more:
+            self._wake.set()
+
+    def run(self):
+        while self._running:
+            self._wake.wait(0.5)
+            self._wake.clear()
+
+            with self._lock:
+                jobs = {k: v for k, v in self._pending.items() if k not in self._in_flight}
+                for k in jobs:
+                    del self._pending[k]
+                self._in_flight.update(jobs)
+
+            for key, (frame, w, h) in jobs.items():
+                try:
+                    image = self._render(frame, w, h)
+                except Exception:
+                    image = None
+                if image is None:
+                    self.ack(key)
+                    continue
+                self.frame_ready.emit(key, image)
+
+    @staticmethod
+    def _render(frame, w, h):
+        fh, fw = frame.shape[:2]
+        if fw == 0 or fh == 0: return None
+        # Fit inside the label keeping the aspect ratio (one resize, no second Qt scale)
+        scale = min(w / fw, h / fh)
+        tw, th = max(1, int(fw * scale)), max(1, int(fh * scale))
+        resized = cv2.resize(frame, (tw, th), interpolation=cv2.INTER_LINEAR)
+        image = QImage(resized.data, tw, th, resized.strides[0], QImage.Format_BGR888)
+        return image.copy() # Detach from the numpy buffer before crossing threads
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        self.wait(2000)
@@ -0,0 +1,129 @@
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QFrame, QPushButton,
+                               QSizePolicy)
+from PySide6.QtCore import Qt, QObject, QThread, Signal, Slot
+from PySide6.QtGui import QPixmap, QImage
+
+
+class _ThumbnailLoader(QObject):
+    """Fetches preview JPEG bytes on a worker thread (cache misses decode the source)."""
+    loaded = Signal(int, str, bytes) # generation, slot, jpeg
+
+    def __init__(self, get_thumbnail):
+        super().__init__()
+        self.get_thumbnail = get_thumbnail
+
+    @Slot(int, list)
+    def load(self, generation, items):
+        for slot, path in items:
+            try:
+                data = self.get_thumbnail(path)
+            except Exception:
+                data = None
+            if data:
+                self.loaded.emit(generation, slot, data)
+
+
+class SessionDetailView(QWidget):
+    """One transaction: header data, the four captures and the merged image (previews)."""
+    back_requested = Signal()
+    _load_requested = Signal(int, list) # generation, [(slot, path)]
+
+    SLOTS = ['IMAGE_1', 'IMAGE_2', 'IMAGE_3', 'IMAGE_4', 'MERGED']
+
+    def __init__(self, system, parent=None):
+        super().__init__(parent)
+        self.system = system
+        self._generation = 0
+
+        self._thread = QThread()
+        self._thread.setObjectName("ThumbnailLoader")
+        self._loader = _ThumbnailLoader(system.get_thumbnail)
+        self._loader.moveToThread(self._thread)
+        self._load_requested.connect(self._loader.load)
+        self._loader.loaded.connect(self._on_loaded)
+        self._thread.start()
+
+        self.layout = QVBoxLayout(self)
+        self.layout.setContentsMargins(15, 15, 15, 15)
+        self.layout.setSpacing(15)
+
+        # Header
+        header = QHBoxLayout()
+        btn_back = QPushButton("< TRANSACTIONS")
+        btn_back.setCursor(Qt.PointingHandCursor)
+        btn_back.setStyleSheet("background-color: #1E3A8A; color: white; border-radius: 8px; padding: 8px 14px; font-weight: 700;")
+        btn_back.clicked.connect(self.back_requested.emit)
+        header.addWidget(btn_back)
+
+        self.title_lbl = QLabel("TRANSACTION : -")
+        self.title_lbl.setStyleSheet("font-size: 22px; font-weight: 800; color: #1E3A8A;")
+        header.addWidget(self.title_lbl, 1)
+
+        self.info_lbl = QLabel("-")
+        self.info_lbl.setStyleSheet("font-size: 14px; font-weight: 700; color: #64748B;")
+        header.addWidget(self.info_lbl)
+        self.layout.addLayout(header)
+
+        # Image Grid: 4 captures (2x2) + merged on the right
+        grid = QGridLayout()
+        grid.setSpacing(10)
+        self.labels = {}
+        for i, slot in enumerate(self.SLOTS[:4]):
+            frame, lbl = self._create_tile(slot.replace("_", " "))
+            self.labels[slot] = lbl
+            grid.addWidget(frame, i // 2, i % 2)
+        frame, lbl = self._create_tile("MERGED")
+        self.labels['MERGED'] = lbl
+        grid.addWidget(frame, 0, 2, 2, 1)
+        self.layout.addLayout(grid, 1)
+
+    def _create_tile(self, title):
+        frame = QFrame()
+        frame.setStyleSheet("background-color: #0F172A; border-radius: 8px;")
+        layout = QVBoxLayout(frame)
+        layout.setContentsMargins(5, 5, 5, 5)
+
+        title_lbl = QLabel(title)
+        title_lbl.setStyleSheet("color: white; font-size: 10px; font-weight: 700; background: rgba(0,0,0,0.5); padding: 2px 8px; border-radius: 4px;")
+        layout.addWidget(title_lbl, 0, Qt.AlignLeft | Qt.AlignTop)
+
+        lbl = QLabel("NO IMAGE")
+        lbl.setAlignment(Qt.AlignCenter)
+        lbl.setStyleSheet("color: #475569; font-weight: 700;")
+        lbl.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Expanding)
+        layout.addWidget(lbl, 1)
+        return frame, lbl
+
+    def load_session(self, session_uuid):
+        self._generation += 1 # Late previews of the previous session are ignored
+        for lbl in self.labels.values():
+            lbl.clear()
+            lbl.setText("NO IMAGE")
+
+        detail = self.system.get_session_detail(session_uuid) or {}
+        self.title_lbl.setText(f"TRANSACTION : {session_uuid[-8:]}")
+        self.info_lbl.setText(f"{detail.get('dump_id', '-')} | {detail.get('plate_number') or '-'} | "
+                              f"{str(detail.get('start_time') or '-')[:19]} | {detail.get('status') or '-'}")
+
+        items = []
+        for img in detail.get('images', []):
+            if img['image_type'] in self.labels:
+                items.append((img['image_type'], img['image_path']))
+        if detail.get('merged_image_path'):
+            items.append(('MERGED', detail['merged_image_path']))
+        for slot, _ in items:
+            self.labels[slot].setText("LOADING...")
+        if items:
+            self._load_requested.emit(self._generation, items)
+
+    @Slot(int, str, bytes)
+    def _on_loaded(self, generation, slot, data):
+        if generation != self._generation: return
+        image = QImage.fromData(data, "JPG")
+        if image.isNull(): return
+        lbl = self.labels[slot]
+        lbl.setPixmap(QPixmap.fromImage(image).scaled(lbl.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+
+    def stop(self):
+        self._thread.quit()
+        self._thread.wait(2000)
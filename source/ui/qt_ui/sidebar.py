@@ -28,6 +28,13 @@ class Sidebar(QWidget):
         self.layout.addItem(QSpacerItem(20, 40, QSizePolicy.Minimum, QSizePolicy.Expanding))
         
         # 3. Footer
+        # AI model loading progress (hidden once all engines are ready)
+        self.model_lbl = QLabel("AI MODELS: LOADING...")
+        self.model_lbl.setAlignment(Qt.AlignCenter)
+        self.model_lbl.setWordWrap(True)
+        self.model_lbl.setStyleSheet("font-size: 12px; font-weight: 700; color: #F59E0B; margin: 0 15px;")
+        self.layout.addWidget(self.model_lbl)
+        
         self.clock_lbl = QLabel("--:--:--")
         self.clock_lbl.setAlignment(Qt.AlignCenter)
         self.clock_lbl.setObjectName("SidebarLabel")
@@ -155,6 +162,23 @@ class Sidebar(QWidget):
             
         ctrl_layout.addLayout(dump_grid)
         
+        # Transactions Button
+        btn_trans = QPushButton("TRANSACTIONS")
+        btn_trans.setCheckable(True)
+        btn_trans.setAutoExclusive(True)
+        btn_trans.setCursor(Qt.PointingHandCursor)
+        btn_trans.setStyleSheet("""
+            QPushButton {
+                background-color: #F8FAFC; border: 1px solid #CBD5E1; color: #334155; border-radius: 8px; padding: 10px; font-weight: 700; margin-top: 10px;
+            }
+            QPushButton:checked {
+                background-color: #1E3A8A; color: white; border: none;
+            }
+        """)
+        btn_trans.clicked.connect(lambda: self.view_selected.emit("transactions"))
+        self.btn_trans = btn_trans
+        ctrl_layout.addWidget(btn_trans)
+        
         # Diagnostics Button
         btn_diag = QPushButton("DIAGNOSTICS")
         btn_diag.setCursor(Qt.PointingHandCursor)
@@ -203,5 +227,17 @@ class Sidebar(QWidget):
         if page_id == "overview": self.btn_grid.setChecked(True)
         # Handle active state for dump buttons if needed
 
+    def update_model_status(self, status):
+        """status: SugarcaneSystem.get_startup_status()."""
+        if status.get('ready'):
+            self.model_lbl.hide()
+            return
+        engines = status.get('engines', {})
+        parts = [f"{name}: {state}" for name, state in engines.items()]
+        failed = any(state == "FAILED" for state in engines.values())
+        color = "#EF4444" if failed else "#F59E0B"
+        self.model_lbl.setStyleSheet(f"font-size: 12px; font-weight: 700; color: {color}; margin: 0 15px;")
+        self.model_lbl.setText("AI MODELS (SNAP ONLY)\n" + " | ".join(parts))
+
     def update_clock(self, time_str):
         self.clock_lbl.setText(time_str)
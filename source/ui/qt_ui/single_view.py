@@ -1,12 +1,20 @@
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QSizePolicy)
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QPixmap, QImage
+from source.ui.qt_ui.station_view_model import StationViewModel
 
 class SingleStationView(QWidget):
-    def __init__(self, system, parent=None):
+    def __init__(self, system, renderer=None, bridge=None, parent=None):
         super().__init__(parent)
         self.system = system
+        self.bridge = bridge # QtStateBridge (push updates), None = poll via update_view()
+        self._sub_token = None
+        self.renderer = renderer # PreviewRenderer (off-thread resize), None = render inline
+        if renderer:
+            renderer.frame_ready.connect(self._on_preview)
         self.dump_id = None
+        self.view_model = StationViewModel()
+        self._frame_seq = None
         
         # Main Layout
         self.layout = QHBoxLayout(self)
@@ -59,6 +67,8 @@ class SingleStationView(QWidget):
         self.lpr_val = self._add_info_row(dp_layout, "PLATE NUMBER", "-", "#0F172A")
         self.trans_val = self._add_info_row(dp_layout, "TRANSACTION ID", "-", "#0F172A")
         self.time_val = self._add_info_row(dp_layout, "LAST UPDATE", "-", "#64748B")
+        self.cam_val = self._add_info_row(dp_layout, "CAMERAS", "-", "#64748B")
+        self.cam_val.setStyleSheet("color: #64748B; font-size: 12px; font-weight: 700; font-family: 'Consolas', monospace;")
         
         dp_layout.addStretch()
         self.info_col.addWidget(self.data_panel)
@@ -101,31 +111,70 @@ class SingleStationView(QWidget):
     def set_station(self, dump_id):
         self.dump_id = dump_id
         self.title_lbl.setText(f"STATION : {dump_id}")
+        self.view_model.reset()
+        self._frame_seq = None
+        if self.bridge:
+            # Only the displayed station is subscribed
+            if self._sub_token is not None:
+                self.bridge.unsubscribe(self._sub_token)
+            self._sub_token = self.bridge.subscribe(dump_id, self._apply_changes)
 
     def update_view(self):
+        # Polling fallback (systems without a state hub)
         if not self.dump_id: return
         
-        # Get State
-        states = self.system.get_processor_states()
-        state = next((s for s in states if s['dump_id'] == self.dump_id), None)
-        
-        if state:
-            self.state_lbl.setText(f"STATE : {state.get('state', '-')}")
-            self.trash_val.setText(f"{state.get('trash_pct', 0)}%")
-            self.lpr_val.setText(state.get('lpr', '-'))
-            self.trans_val.setText(state.get('transaction_id', '-'))
-            self.time_val.setText(state.get('timestamp', '-'))
-            
+        # Get State (only changed fields are applied)
+        states = [s for s in self.system.get_processor_states() if s['dump_id'] == self.dump_id]
+        self._apply_changes(self.view_model.diff(states).get(self.dump_id, {}))
+
+    def _apply_changes(self, changed):
+        if 'state' in changed:
+            self.state_lbl.setText(f"STATE : {changed['state']}")
+        if 'trash_pct' in changed:
+            trash = changed['trash_pct']
+            self.trash_val.setText(f"{trash}%")
             # Color coding
-            trash = state.get('trash_pct', 0)
             color = "#EF4444" if trash > 30 else "#0EA5E9"
             self.trash_val.setStyleSheet(f"color: {color}; font-size: 32px; font-weight: 800;")
+        if 'lpr' in changed:
+            self.lpr_val.setText(changed['lpr'])
+        if 'transaction_id' in changed:
+            self.trans_val.setText(changed['transaction_id'])
+        if 'timestamp' in changed:
+            self.time_val.setText(changed['timestamp'])
+            self._update_camera_health() # Detailed stats, refreshed about once per second
 
-        # Get Frames
+        # Get Frames (skip repaint when no new frame was published)
+        if 'frame_seq' not in changed or not self.isVisible(): return
+        seq = changed['frame_seq']
+        if seq == self._frame_seq: return
+        self._frame_seq = seq
         frames = self.system.get_latest_frames(self.dump_id)
-        if frames:
-            self._set_image(self.img_lpr, frames.get('LPR'))
-            self._set_image(self.img_ai, frames.get('AI'))
+        if not frames: return
+        if self.renderer:
+            for view, label in (('LPR', self.img_lpr), ('AI', self.img_ai)):
+                size = label.size()
+                self.renderer.request(f"single:{view}", frames.get(view), (size.width(), size.height()))
+            return
+        self._set_image(self.img_lpr, frames.get('LPR'))
+        self._set_image(self.img_ai, frames.get('AI'))
+
+    def _update_camera_health(self):
+        if not hasattr(self.system, 'get_stream_health'): return
+        lines = []
+        for ch, h in sorted(self.system.get_stream_health(self.dump_id).items()):
+            if h['state'] == 'LIVE':
+                lines.append(f"{ch} LIVE {h['decode_fps']}/{h['fps']}fps {h['mode'].lower()} read {h['read_latency_ms']}ms")
+            else:
+                lines.append(f"{ch} {h['state']} fails {h['failures']} retry {h['retry_in_s']}s")
+        self.cam_val.setText("\n".join(lines) if lines else "-")
+
+    def _on_preview(self, key, image):
+        prefix, _, view = key.partition(":")
+        if prefix != "single": return
+        label = self.img_lpr if view == 'LPR' else self.img_ai
+        label.setPixmap(QPixmap.fromImage(image))
+        self.renderer.ack(key)
 
     def _set_image(self, label, cv_frame):
         if cv_frame is None: return
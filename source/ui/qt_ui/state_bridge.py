@@ -0,0 +1,59 @@
+import threading
+from PySide6.QtCore import QObject, QTimer, Signal
+
+
+class QtStateBridge(QObject):
+    """
+    Delivers StationStateHub changes to widgets on the GUI thread.
+
+    Hub callbacks (processor threads) only merge changed fields into a dirty
+    map; a GUI-thread timer flushes it at most every `interval_ms`, calling the
+    callbacks registered for each changed dump_id. Many publishes between two
+    flushes collapse into one widget update per station.
+    """
+    station_changed = Signal(str, dict) # dump_id, changed fields
+
+    def __init__(self, hub, interval_ms=100, parent=None):
+        super().__init__(parent)
+        self.hub = hub
+        self._lock = threading.Lock()
+        self._dirty = {}
+        self._subs = {} # dump_id -> {token: callback}
+        self._next_token = 1
+        self._hub_token = hub.subscribe(self._on_hub_change)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._flush)
+        self.timer.start(interval_ms)
+
+    def _on_hub_change(self, dump_id, changes):
+        # Processor thread: record only
+        with self._lock:
+            self._dirty.setdefault(dump_id, {}).update(changes)
+
+    def subscribe(self, dump_id, callback) -> int:
+        """callback(changed_fields) on the GUI thread; called once right away with the full state."""
+        token = self._next_token
+        self._next_token += 1
+        self._subs.setdefault(dump_id, {})[token] = callback
+        current = self.hub.get(dump_id)
+        if current:
+            callback(current)
+        return token
+
+    def unsubscribe(self, token):
+        for subs in self._subs.values():
+            if subs.pop(token, None): return
+
+    def _flush(self):
+        with self._lock:
+            if not self._dirty: return
+            dirty, self._dirty = self._dirty, {}
+        for dump_id, changes in dirty.items():
+            for cb in list(self._subs.get(dump_id, {}).values()):
+                cb(changes)
+            self.station_changed.emit(dump_id, changes)
+
+    def stop(self):
+        self.timer.stop()
+        self.hub.unsubscribe(self._hub_token)
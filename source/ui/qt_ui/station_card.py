@@ -5,9 +5,12 @@ from PySide6.QtGui import QPixmap, QImage, QColor
 class StationCard(QFrame):
     clicked = Signal(str) # dump_id
 
-    def __init__(self, dump_id, parent=None):
+    def __init__(self, dump_id, renderer=None, parent=None):
         super().__init__(parent)
         self.dump_id = dump_id
+        self.renderer = renderer # PreviewRenderer (off-thread resize), None = render inline
+        self._state = {}        # Last applied state fields
+        self._frame_seq = None  # Sequence number of the frames on screen
         
         # Style
         self.setObjectName("StationCard")
@@ -36,13 +39,16 @@ class StationCard(QFrame):
         
         header_layout.addStretch()
         
-        # State Badge (Top Right)
+        # Camera health badge (hidden while all cameras are live)
+        self.cam_badge = QLabel("")
+        self.cam_badge.setObjectName("CamBadge")
+        self.cam_badge.hide()
+        header_layout.addWidget(self.cam_badge)
+        
+        # State Badge (Top Right) - colours come from ModernStyle via the 'active' property
         self.state_badge = QLabel("IDLE")
-        self.state_badge.setStyleSheet("""
-            background-color: #F1F5F9; color: #475569; 
-            padding: 4px 10px; border-radius: 4px; 
-            font-weight: 700; font-size: 11px;
-        """)
+        self.state_badge.setObjectName("StateBadge")
+        self.state_badge.setProperty("active", False)
         header_layout.addWidget(self.state_badge)
         
         self.layout.addLayout(header_layout)
@@ -118,8 +124,9 @@ class StationCard(QFrame):
         bg_layout.setContentsMargins(0, 0, 0, 0)
         
         self.fill_bar = QFrame()
+        self.fill_bar.setObjectName("TrashFill")
+        self.fill_bar.setProperty("high", False)
         self.fill_bar.setFixedHeight(8)
-        self.fill_bar.setStyleSheet("background-color: #0EA5E9; border-radius: 4px;")
         self.fill_bar.setFixedWidth(0) 
         bg_layout.addWidget(self.fill_bar)
         bg_layout.addStretch()
@@ -128,7 +135,8 @@ class StationCard(QFrame):
         
         # Bottom status in right col or full width? Let's put it in right col for alignment
         self.action_lbl = QLabel("● IDLE")
-        self.action_lbl.setStyleSheet("color: #64748B; font-weight: 700; font-size: 11px; margin-top: 5px;")
+        self.action_lbl.setObjectName("ActionLabel")
+        self.action_lbl.setProperty("active", False)
         right_col.addWidget(self.action_lbl)
         right_col.addStretch()
         
@@ -163,66 +171,91 @@ class StationCard(QFrame):
         
         drag.exec_(Qt.MoveAction)
 
+    @staticmethod
+    def _set_flag(widget, name, value):
+        """Switch a style property and re-polish (no stylesheet re-parse). No-op if unchanged."""
+        if widget.property(name) == value: return
+        widget.setProperty(name, value)
+        widget.style().unpolish(widget)
+        widget.style().polish(widget)
+
+    @staticmethod
+    def _set_text(label, text):
+        if label.text() != text:
+            label.setText(text)
+
     def update_state(self, state_data):
-        # Update State Badge
-        state_text = state_data.get('state', '-')
-        
-        # Update Header Badge
+        """Full state dict (first paint)."""
+        self._state = {}
+        self.apply_changes(state_data)
+
+    def apply_changes(self, changes):
+        """Apply only the fields that changed since the last call (see StationViewModel)."""
+        state = self._state
+        state.update(changes)
+
+        state_text = state.get('state', '-')
         is_active = state_text != 'IDLE'
-        self.state_badge.setText(state_text)
-        if is_active:
-            self.state_badge.setStyleSheet("""
-                background-color: #DCFCE7; color: #166534; 
-                padding: 4px 10px; border-radius: 4px; border: 1px solid #BBF7D0;
-                font-weight: 700; font-size: 11px;
-            """)
-        else:
-             self.state_badge.setStyleSheet("""
-                background-color: #F1F5F9; color: #64748B; 
-                padding: 4px 10px; border-radius: 4px; border: 1px solid #E2E8F0;
-                font-weight: 700; font-size: 11px;
-            """)
-
-        # REAL Data from AI Engine
-        trash = state_data.get('trash_pct', 0)
-        lpr_text = state_data.get('lpr', '-')
-        trans_id = state_data.get('transaction_id', '-')
-        now_str = state_data.get('timestamp', '-')
-        
-        if is_active:
-            self.trash_val_lbl.setText(f"{trash}%")
-            
-            # Progress Bar Logic
-            width = int(trash * 2.5) # Scale factor for card width
-            self.fill_bar.setFixedWidth(max(2, width)) # Min 2px for visibility
-            color = "#EF4444" if trash > 30 else "#0EA5E9"
-            self.fill_bar.setStyleSheet(f"background-color: {color}; border-radius: 4px;")
-            
-            self.lbl_lpr_val.setText(f"LPR : {lpr_text}")
-            self.lbl_trans_id.setText(f"Trans : {trans_id}")
-            self.lbl_date_val.setText(f"Date : {now_str}")
-            
-            self.action_lbl.setText(f"● {state_text}")
+        trash = state.get('trash_pct', 0)
+
+        if 'state' in changes:
+            # Update Header Badge
+            self._set_text(self.state_badge, state_text)
+            self._set_flag(self.state_badge, "active", is_active)
+            self._set_text(self.action_lbl, f"● {state_text}" if is_active else "● IDLE")
             # Map state to color
-            if 'RESET' in state_text or 'IDLE' in state_text:
-                self.action_lbl.setStyleSheet("color: #64748B; font-weight: 700; font-size: 11px;")
+            self._set_flag(self.action_lbl, "active", is_active and 'RESET' not in state_text)
+
+        if 'state' in changes or 'trash_pct' in changes:
+            if is_active:
+                self._set_text(self.trash_val_lbl, f"{trash}%")
+                # Progress Bar Logic
+                width = max(2, int(trash * 2.5)) # Scale factor for card width, min 2px for visibility
+                self._set_flag(self.fill_bar, "high", trash > 30)
             else:
-                self.action_lbl.setStyleSheet("color: #10B981; font-weight: 700; font-size: 11px;")
-            
-        else:
-            self.trash_val_lbl.setText("0%")
-            self.fill_bar.setFixedWidth(0)
-            self.lbl_lpr_val.setText(f"LPR : {lpr_text}")
-            self.lbl_trans_id.setText(f"Trans : {trans_id}")
-            self.lbl_date_val.setText(f"Date : {now_str}")
-            self.action_lbl.setText("● IDLE")
-            self.action_lbl.setStyleSheet("color: #64748B; font-weight: 700; font-size: 11px;")
-
-    def update_images(self, frames):
+                self._set_text(self.trash_val_lbl, "0%")
+                width = 0
+            if self.fill_bar.maximumWidth() != width:
+                self.fill_bar.setFixedWidth(width)
+
+        if 'lpr' in changes:
+            self._set_text(self.lbl_lpr_val, f"LPR : {state.get('lpr', '-')}")
+        if 'transaction_id' in changes:
+            self._set_text(self.lbl_trans_id, f"Trans : {state.get('transaction_id', '-')}")
+        if 'timestamp' in changes:
+            self._set_text(self.lbl_date_val, f"Date : {state.get('timestamp', '-')}")
+        if 'cameras' in changes:
+            down = {ch: st for ch, st in (state.get('cameras') or {}).items() if st != 'LIVE'}
+            if down:
+                self._set_text(self.cam_badge, " | ".join(f"{ch} {st}" for ch, st in sorted(down.items())))
+                self.cam_badge.show()
+            else:
+                self.cam_badge.hide()
+
+    def update_images(self, frames, frame_seq=None):
+        """Repaint only when the processor published new frames (frame_seq changed)."""
         if not frames: return
+        if frame_seq is not None:
+            if frame_seq == self._frame_seq: return
+            self._frame_seq = frame_seq
+        if self.renderer:
+            # Display-sized images come back through show_preview()
+            self.renderer.request(f"{self.dump_id}:LPR", frames.get('LPR'), self._label_size(self.img_lpr))
+            self.renderer.request(f"{self.dump_id}:AI", frames.get('AI'), self._label_size(self.img_ai))
+            return
         self._set_image(self.img_lpr, frames.get('LPR'))
         self._set_image(self.img_ai, frames.get('AI'))
 
+    @staticmethod
+    def _label_size(label):
+        size = label.size()
+        return size.width(), size.height()
+
+    def show_preview(self, view, image):
+        """Slot target for PreviewRenderer output (GUI thread)."""
+        label = self.img_lpr if view == 'LPR' else self.img_ai
+        label.setPixmap(QPixmap.fromImage(image))
+
     def _set_image(self, label, cv_frame):
         if cv_frame is None: return
         
@@ -0,0 +1,32 @@
+class StationViewModel:
+    """
+    Remembers the last station state snapshot shown per dump and reports only
+    the fields that changed, so views touch just the widgets that need it.
+    """
+    def __init__(self):
+        self._last = {}
+
+    def diff(self, states):
+        """states: list of dicts from get_processor_states(). Returns {dump_id: {field: value}}."""
+        changes = {}
+        for s in states:
+            d_id = s['dump_id']
+            prev = self._last.get(d_id)
+            if prev is None:
+                changed = dict(s)
+            else:
+                changed = {k: v for k, v in s.items() if prev.get(k) != v}
+            if changed:
+                changes[d_id] = changed
+                self._last[d_id] = dict(s)
+        return changes
+
+    def get(self, dump_id):
+        return self._last.get(dump_id, {})
+
+    def reset(self, dump_id=None):
+        """Forget cached state (e.g. after widgets were rebuilt) so the next diff is complete."""
+        if dump_id is None:
+            self._last.clear()
+        else:
+            self._last.pop(dump_id, None)
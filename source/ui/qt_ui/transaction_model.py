@@ -0,0 +1,136 @@
+from PySide6.QtCore import (Qt, QAbstractTableModel, QModelIndex, QObject, QThread, Signal, Slot)
+from PySide6.QtGui import QColor
+
+
+class _PageFetcher(QObject):
+    """Runs page queries on its own thread (the DB opens a connection per call)."""
+    page_ready = Signal(int, list) # generation, rows
+
+    def __init__(self, fetch_page):
+        super().__init__()
+        self.fetch_page = fetch_page
+
+    @Slot(int, object, dict)
+    def fetch(self, generation, after, filters):
+        try:
+            rows = self.fetch_page(after=after, **filters)
+        except Exception:
+            rows = []
+        self.page_ready.emit(generation, rows)
+
+
+class TransactionTableModel(QAbstractTableModel):
+    """
+    Lazily paged view over dump_session.
+
+    Rows are loaded one page at a time when the view scrolls near the end
+    (canFetchMore/fetchMore); the query runs on a background thread and uses
+    keyset pagination (last start_time/session_uuid), so scrolling a whole
+    season never re-scans earlier pages or blocks the GUI. Changing filters
+    bumps a generation counter so pages from an older query are dropped.
+    """
+    COLUMNS = [
+        ('start_time', "START"),
+        ('dump_id', "STATION"),
+        ('plate_number', "PLATE"),
+        ('status', "STATUS"),
+        ('img_count', "IMAGES"),
+        ('end_time', "END"),
+        ('session_uuid', "TRANSACTION ID"),
+    ]
+    _request = Signal(int, object, dict) # generation, after, filters
+
+    def __init__(self, fetch_page, page_size=200, parent=None):
+        super().__init__(parent)
+        self.page_size = page_size
+        self._keys = [k for k, _ in self.COLUMNS]
+        self._rows = [] # tuples in COLUMNS order
+        self._filters = {}
+        self._after = None
+        self._generation = 0
+        self._loading = False
+        self._exhausted = False
+
+        self._thread = QThread()
+        self._thread.setObjectName("TransactionFetcher")
+        self._fetcher = _PageFetcher(fetch_page)
+        self._fetcher.moveToThread(self._thread)
+        self._request.connect(self._fetcher.fetch)
+        self._fetcher.page_ready.connect(self._on_page)
+        self._thread.start()
+
+    # --- Qt model interface ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        value = self._rows[index.row()][index.column()]
+        if role == Qt.DisplayRole:
+            if value is None: return "-"
+            key = self._keys[index.column()]
+            if key in ('start_time', 'end_time'):
+                return str(value)[:19] # Drop microseconds
+            if key == 'session_uuid':
+                return str(value)[-8:]
+            return str(value)
+        if role == Qt.ForegroundRole and self._keys[index.column()] == 'status':
+            return QColor("#10B981") if value == 'COMPLETE' else QColor("#F59E0B")
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.COLUMNS[section][1]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted and not self._loading
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._loading or self._exhausted: return
+        self._loading = True
+        self._request.emit(self._generation, self._after, dict(self._filters, limit=self.page_size))
+
+    # --- API ---
+
+    def set_filters(self, dump_id=None, plate=None, status=None):
+        """Restart from the newest transaction with the given filters."""
+        self.beginResetModel()
+        self._filters = {'dump_id': dump_id or None, 'plate': plate or None, 'status': status or None}
+        self._rows = []
+        self._after = None
+        self._generation += 1
+        self._loading = False
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def refresh(self):
+        self.set_filters(**self._filters)
+
+    def session_at(self, row):
+        return self._rows[row][self._keys.index('session_uuid')] if 0 <= row < len(self._rows) else None
+
+    @Slot(int, list)
+    def _on_page(self, generation, rows):
+        if generation != self._generation: return # Filters changed meanwhile
+        self._loading = False
+        if len(rows) < self.page_size:
+            self._exhausted = True
+        if not rows: return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self._rows.extend(tuple(r.get(k) for k in self._keys) for r in rows)
+        self.endInsertRows()
+        last = rows[-1]
+        self._after = (last['start_time'], last['session_uuid'])
+
+    def stop(self):
+        self._thread.quit()
+        self._thread.wait(2000)
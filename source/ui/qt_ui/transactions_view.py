@@ -0,0 +1,91 @@
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QComboBox,
+                               QTableView, QHeaderView, QAbstractItemView)
+from PySide6.QtCore import Qt, QTimer, Signal
+from source.ui.qt_ui.transaction_model import TransactionTableModel
+
+class TransactionsView(QWidget):
+    """Scrollable transaction history with station / plate / status filters."""
+    session_selected = Signal(str) # session_uuid (double-click)
+
+    def __init__(self, system, parent=None):
+        super().__init__(parent)
+        self.system = system
+        self.model = TransactionTableModel(system.get_transactions_page, page_size=200, parent=self)
+        self._loaded = False
+
+        self.layout = QVBoxLayout(self)
+        self.layout.setContentsMargins(15, 15, 15, 15)
+        self.layout.setSpacing(10)
+
+        title = QLabel("TRANSACTIONS")
+        title.setStyleSheet("font-size: 24px; font-weight: 800; color: #1E3A8A;")
+        self.layout.addWidget(title)
+
+        # Filter Bar
+        bar = QHBoxLayout()
+        bar.setSpacing(10)
+
+        self.dump_box = QComboBox()
+        self.dump_box.addItem("ALL STATIONS", "")
+        for s in system.get_processor_states():
+            self.dump_box.addItem(s['dump_id'], s['dump_id'])
+        self.dump_box.currentIndexChanged.connect(self._apply_filters)
+        bar.addWidget(self.dump_box)
+
+        self.plate_edit = QLineEdit()
+        self.plate_edit.setPlaceholderText("Plate number...")
+        self.plate_edit.setClearButtonEnabled(True)
+        # Debounce typing: one query after the operator pauses
+        self._plate_timer = QTimer(self)
+        self._plate_timer.setSingleShot(True)
+        self._plate_timer.setInterval(300)
+        self._plate_timer.timeout.connect(self._apply_filters)
+        self.plate_edit.textChanged.connect(self._plate_timer.start)
+        bar.addWidget(self.plate_edit, 1)
+
+        self.status_box = QComboBox()
+        for label, value in (("ALL STATUS", ""), ("COMPLETE", "COMPLETE"), ("INCOMPLETE", "INCOMPLETE")):
+            self.status_box.addItem(label, value)
+        self.status_box.currentIndexChanged.connect(self._apply_filters)
+        bar.addWidget(self.status_box)
+
+        self.layout.addLayout(bar)
+
+        # Table (only visible rows are painted; pages load while scrolling)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setAlternatingRowColors(True)
+        self.table.verticalHeader().setVisible(False)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed) # No per-row size hints
+        self.table.verticalHeader().setDefaultSectionSize(28)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setStyleSheet("background-color: white; border-radius: 8px;")
+        self.table.doubleClicked.connect(self._on_double_click)
+        self.layout.addWidget(self.table, 1)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        # First open loads the newest page; returning from a session keeps the scroll position
+        if not self._loaded:
+            self._loaded = True
+            self._apply_filters()
+
+    def refresh(self):
+        if self._loaded:
+            self.model.refresh()
+
+    def _apply_filters(self):
+        self._plate_timer.stop()
+        self.model.set_filters(dump_id=self.dump_box.currentData(),
+                               plate=self.plate_edit.text().strip(),
+                               status=self.status_box.currentData())
+
+    def _on_double_click(self, index):
+        session_uuid = self.model.session_at(index.row())
+        if session_uuid:
+            self.session_selected.emit(session_uuid)
+
+    def stop(self):
+        self.model.stop()
@@ -0,0 +1,195 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Optional, List, Iterable, Tuple, Callable
+
+from source.utils.image_hash import hash_file
+
+
+def _to_signed(h: int) -> int:
+    """SQLite INTEGER is signed 64-bit."""
+    h = int(h)
+    return h - (1 << 64) if h >= (1 << 63) else h
+
+def _to_unsigned(h: int) -> int:
+    return h + (1 << 64) if h < 0 else h
+
+
+class BKTree:
+    """BK-tree over 64-bit hashes for sub-linear Hamming-radius queries."""
+    def __init__(self):
+        self.root = None # [hash, {distance: child}]
+        self.size = 0
+
+    def add(self, h: int):
+        h = int(h)
+        if self.root is None:
+            self.root = [h, {}]
+            self.size = 1
+            return
+        node = self.root
+        while True:
+            d = (node[0] ^ h).bit_count()
+            if d == 0: return # Already present
+            child = node[1].get(d)
+            if child is None:
+                node[1][d] = [h, {}]
+                self.size += 1
+                return
+            node = child
+
+    def query(self, h: int, radius: int, first_only=False) -> List[int]:
+        """Hashes within `radius` of h (stops at the first match when first_only)."""
+        if self.root is None: return []
+        h = int(h)
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            d = (node[0] ^ h).bit_count()
+            if d <= radius:
+                found.append(node[0])
+                if first_only: return found
+            # Triangle inequality: only children with |dist - d| <= radius can match
+            for cd, child in node[1].items():
+                if d - radius <= cd <= d + radius:
+                    stack.append(child)
+        return found
+
+
+class PerceptualHashIndex:
+    """
+    Persistent per-channel perceptual-hash index (SQLite) with in-memory BK-trees,
+    shared by the snapshot filter and the cloud uploader to skip images that are
+    already represented in the data lake.
+
+    The filter and the uploader run in different processes: rows added by the
+    other one are picked up incrementally (rowid above the last one seen),
+    at most every `refresh_interval` seconds per channel.
+    """
+    def __init__(self, db_path="hash_index.db", max_age_days=30, refresh_interval=5.0,
+                 logger: Optional[logging.Logger] = None):
+        self.db_path = db_path
+        self.max_age_days = max_age_days
+        self.refresh_interval = refresh_interval
+        self.log = logger or logging.getLogger("PerceptualHashIndex")
+        self._trees = {}
+        self._seen_rowid = {}  # channel -> highest rowid loaded into its tree
+        self._refreshed = {}   # channel -> time of the last catch-up query
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _get_connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        with self._get_connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS phash_index (
+                    channel TEXT,
+                    hash INTEGER,
+                    ref TEXT,
+                    added_at DATETIME,
+                    PRIMARY KEY (channel, hash)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_phash_added ON phash_index(added_at)")
+            if self.max_age_days:
+                # Stations change over a season; drop references older than the window
+                conn.execute("DELETE FROM phash_index WHERE added_at < ?",
+                             (datetime.now() - timedelta(days=self.max_age_days),))
+            conn.commit()
+
+    def _load_new(self, channel: str, tree: BKTree):
+        last = self._seen_rowid.get(channel, 0)
+        with self._get_connection() as conn:
+            for row in conn.execute("SELECT rowid, hash FROM phash_index WHERE rowid > ? AND channel = ?",
+                                    (last, channel)):
+                tree.add(_to_unsigned(row['hash']))
+                last = max(last, row['rowid'])
+        self._seen_rowid[channel] = last
+        self._refreshed[channel] = time.time()
+
+    def _tree(self, channel: str) -> BKTree:
+        tree = self._trees.get(channel)
+        if tree is None:
+            tree = BKTree()
+            self._load_new(channel, tree)
+            self._trees[channel] = tree
+            self.log.info(f"Hash index loaded for {channel}: {tree.size} entries")
+        elif time.time() - self._refreshed.get(channel, 0) >= self.refresh_interval:
+            self._load_new(channel, tree) # Hashes added by the other process since
+        return tree
+
+    def contains_near(self, channel: str, h: int, radius: int) -> bool:
+        with self._lock:
+            return bool(self._tree(channel).query(h, radius, first_only=True))
+
+    def add(self, channel: str, h: int, ref: str = None):
+        self.add_many(channel, [(h, ref)])
+
+    def add_many(self, channel: str, items: Iterable[Tuple[int, Optional[str]]]):
+        rows = [(channel, _to_signed(h), ref, datetime.now()) for h, ref in items]
+        if not rows: return
+        with self._lock:
+            tree = self._tree(channel)
+            for _, h, _, _ in rows:
+                tree.add(_to_unsigned(h))
+            with self._get_connection() as conn:
+                conn.executemany("""
+                    INSERT OR IGNORE INTO phash_index (channel, hash, ref, added_at)
+                    VALUES (?, ?, ?, ?)
+                """, rows)
+                conn.commit()
+
+
+def snap_channel_key(path: str, method: str = "dhash") -> str:
+    """
+    Index key of a snapshot, shared by the snapshot filter and the uploader:
+    'ch{N}' from .../ch{N}/{Date}/file.jpg (both the raw_images/{ViewType}/ and
+    the snap_image_{factory}/ layouts; channel numbers are unique per site).
+    Hashes of different methods are not comparable, so non-dHash keys carry it.
+    """
+    ch = os.path.basename(os.path.dirname(os.path.dirname(os.path.abspath(path))))
+    return ch if method == "dhash" else f"{ch}:{method}"
+
+
+class LakeDeduplicator:
+    """
+    Upload hook: skips snapshots whose hash is within `radius` of one already
+    uploaded for the same channel; records hashes once uploads succeed.
+    The hash computed at capture time is used when given, so those snaps are
+    not decoded again; files found by the sweep are hashed from disk.
+    """
+    def __init__(self, index: PerceptualHashIndex, radius=4, method="dhash",
+                 channel_of: Optional[Callable[[str], str]] = None):
+        self.index = index
+        self.radius = radius
+        self.method = method
+        self.channel_of = channel_of or (lambda p: snap_channel_key(p, method))
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def is_duplicate(self, path: str, h: Optional[int] = None) -> bool:
+        if h is None:
+            h = hash_file(path, self.method)
+        if h is None: return False # Let the quality check decide
+        channel = self.channel_of(path)
+        with self._lock:
+            self._hashes[path] = (channel, h)
+        return self.index.contains_near(channel, h, self.radius)
+
+    def mark_uploaded(self, path: str, ref: str = None):
+        with self._lock:
+            entry = self._hashes.pop(path, None)
+        if entry:
+            self.index.add(entry[0], entry[1], ref)
+
+    def forget(self, path: str):
+        with self._lock:
+            self._hashes.pop(path, None)
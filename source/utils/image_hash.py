@@ -0,0 +1,148 @@
+import cv2
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from source.utils.image_quality import is_corrupted
+
+# Decode scale of every hash fed to the shared lake index (filter, capture, upload):
+# hashes computed at different scales are not comparable
+HASH_READ_FLAG = cv2.IMREAD_REDUCED_COLOR_4
+HASH_SCALE = 4
+
+# Popcount lookup per byte (numpy 1.26 has no bitwise_count)
+_POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount64(values: np.ndarray) -> np.ndarray:
+    """Number of set bits for each uint64 in `values`."""
+    v = np.ascontiguousarray(values, dtype=np.uint64)
+    return _POPCOUNT8[v.view(np.uint8).reshape(-1, 8)].sum(axis=1, dtype=np.uint32).reshape(v.shape)
+
+
+def hamming_many(h, hashes: np.ndarray) -> np.ndarray:
+    """Hamming distance between one hash and an array of uint64 hashes."""
+    return popcount64(np.bitwise_xor(np.asarray(hashes, dtype=np.uint64), np.uint64(int(h))))
+
+
+def _pack_bits(bits: np.ndarray) -> np.ndarray:
+    """(N, 64) bool -> (N,) uint64, bit i of the hash = bits[:, i] (LSB first)."""
+    packed = np.packbits(bits.astype(np.uint8), axis=1, bitorder='little')
+    return np.ascontiguousarray(packed).view('<u8').ravel().astype(np.uint64)
+
+
+def dhash_batch(grays: np.ndarray) -> np.ndarray:
+    """grays: (N, hash_size, hash_size + 1) uint8 -> (N,) uint64 difference hashes."""
+    diff = grays[:, :, 1:] > grays[:, :, :-1]
+    return _pack_bits(diff.reshape(len(grays), -1))
+
+
+def phash_batch(grays32: np.ndarray) -> np.ndarray:
+    """grays32: (N, 32, 32) -> (N,) uint64 DCT perceptual hashes."""
+    if len(grays32) == 0: return np.zeros(0, dtype=np.uint64)
+    low = np.stack([cv2.dct(g.astype(np.float32))[:8, :8] for g in grays32])
+    flat = low.reshape(len(low), -1)
+    med = np.median(flat[:, 1:], axis=1, keepdims=True) # Ignore DC term
+    return _pack_bits(flat > med)
+
+
+def crop_center_square(image):
+    """Crop the image to a square (1:1 aspect ratio) from the center."""
+    h, w = image.shape[:2]
+    min_dim = min(h, w)
+    start_x = (w - min_dim) // 2
+    start_y = (h - min_dim) // 2
+    return image[start_y:start_y+min_dim, start_x:start_x+min_dim]
+
+
+def _hash_input(img, method="dhash", hash_size=8) -> Tuple[Optional[np.ndarray], bool]:
+    if img is None or is_corrupted(img): return None, True
+    gray = cv2.cvtColor(crop_center_square(img), cv2.COLOR_BGR2GRAY)
+    size = (32, 32) if method == "phash" else (hash_size + 1, hash_size)
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA), False
+
+
+def load_hash_input(path, method="dhash", hash_size=8) -> Tuple[Optional[np.ndarray], bool]:
+    """
+    Decode at reduced size (HASH_READ_FLAG), check corruption, crop center square
+    and shrink to the hash input. Returns (small_gray, corrupted). Runs in worker
+    threads (OpenCV releases the GIL while decoding).
+    """
+    return _hash_input(cv2.imread(path, HASH_READ_FLAG), method, hash_size)
+
+
+def _hash_one(small, method):
+    batch = phash_batch(small[np.newaxis]) if method == "phash" else dhash_batch(small[np.newaxis])
+    return int(batch[0])
+
+
+def hash_file(path, method="dhash") -> Optional[int]:
+    """Single-file hash (None if unreadable/corrupted)."""
+    small, corrupted = load_hash_input(path, method)
+    if corrupted: return None
+    return _hash_one(small, method)
+
+
+def hash_image(image, method="dhash") -> Optional[int]:
+    """
+    Hash of an in-memory BGR frame (capture time), matching hash_file() of its
+    JPEG: the frame is area-downscaled by HASH_SCALE like the reduced decode.
+    """
+    if image is None or image.size == 0: return None
+    h, w = image.shape[:2]
+    small_img = cv2.resize(image, (max(1, w // HASH_SCALE), max(1, h // HASH_SCALE)), interpolation=cv2.INTER_AREA)
+    small, corrupted = _hash_input(small_img, method)
+    if corrupted: return None
+    return _hash_one(small, method)
+
+
+class DedupEngine:
+    """
+    Batched near-duplicate filter for a time-ordered list of snapshots.
+    Decoding runs in a thread pool, hashes are computed for the whole batch as
+    uint64 arrays, and each image is compared (vectorised popcount) against a
+    rolling window of the last `window` kept hashes; window=1 is the classic
+    "compare with last kept" behaviour.
+    """
+    def __init__(self, threshold=12, window=1, method="dhash", workers=4):
+        if method not in ("dhash", "phash"):
+            raise ValueError(f"Unknown hash method: {method}")
+        self.threshold = threshold
+        self.window = max(1, window)
+        self.method = method
+        self.workers = workers
+
+    def hash_files(self, paths: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (hashes uint64, valid bool mask) aligned with paths."""
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            loaded = list(pool.map(lambda p: load_hash_input(p, self.method), paths))
+
+        valid = np.array([not corrupted and small is not None for small, corrupted in loaded], dtype=bool)
+        hashes = np.zeros(len(paths), dtype=np.uint64)
+        if valid.any():
+            stack = np.stack([small for (small, _), ok in zip(loaded, valid) if ok])
+            batch = phash_batch(stack) if self.method == "phash" else dhash_batch(stack)
+            hashes[valid] = batch
+        return hashes, valid
+
+    def select(self, hashes: np.ndarray, valid: np.ndarray, seed: Optional[np.ndarray] = None) -> List[int]:
+        """Indices of images to keep. `seed`: previously kept hashes to compare against first."""
+        recent = list(seed[-self.window:]) if seed is not None else []
+        keep = []
+        for i in np.flatnonzero(valid):
+            h = hashes[i]
+            if recent:
+                dist = hamming_many(h, np.array(recent, dtype=np.uint64))
+                if dist.min() <= self.threshold:
+                    continue
+            keep.append(int(i))
+            recent.append(h)
+            if len(recent) > self.window:
+                recent.pop(0)
+        return keep
+
+    def filter(self, paths: List[str]) -> Tuple[List[str], np.ndarray]:
+        """Returns (kept paths in order, their hashes)."""
+        hashes, valid = self.hash_files(paths)
+        idx = self.select(hashes, valid)
+        return [paths[i] for i in idx], hashes[idx]
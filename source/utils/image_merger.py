@@ -1,57 +1,129 @@
 import cv2
 import numpy as np
 import os
+from functools import lru_cache
 from datetime import datetime
 
-def merge_production_images(images: list, metadata: dict) -> np.ndarray:
+LAYOUTS = {
+    "2x2": (2, 2), # (cols, rows)
+    "1x4": (4, 1),
+}
+
+SLOT_LABELS = ["IMAGE 1: LPR", "IMAGE 2: 100%", "IMAGE 3: 50%", "IMAGE 4: 25%"]
+
+_READ_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+class MergedImageCompositor:
+    """
+    Composes the 4 session captures + header into one report image.
+    Everything static (header background, placeholder slot, slot labels) is
+    rendered once per layout; each compose() only resizes the captures
+    directly into their slot of a single output canvas and draws the header text.
+    """
+    def __init__(self, layout="2x2", slot_size=(640, 480), header=True, header_h=100, output_size=None):
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown merge layout: {layout} (expected one of {list(LAYOUTS)})")
+        self.cols, self.rows = LAYOUTS[layout]
+        self.header_h = header_h if header else 0
+
+        if output_size:
+            out_w, out_h = output_size
+            self.slot_w = out_w // self.cols
+            self.slot_h = (out_h - self.header_h) // self.rows
+        else:
+            self.slot_w, self.slot_h = slot_size
+
+        self.canvas_w = self.slot_w * self.cols
+        self.canvas_h = self.slot_h * self.rows + self.header_h
+
+        # 1. Static header background
+        self._header_bg = np.full((self.header_h, self.canvas_w, 3), (40, 40, 40), dtype=np.uint8)
+
+        # 2. Placeholder for missing captures
+        self._placeholder = np.zeros((self.slot_h, self.slot_w, 3), dtype=np.uint8)
+        cv2.putText(self._placeholder, "IMAGE MISSING (INCOMPLETE)", (50, self.slot_h // 2),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (100, 100, 100), 2)
+
+        # 3. Slot label masks (drawn on top of the resized captures)
+        self._label_masks = []
+        for label in SLOT_LABELS:
+            (tw, th), base = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+            mask = np.zeros((th + base + 32, tw + 12), dtype=np.uint8)
+            cv2.putText(mask, label, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, 255, 2)
+            mask = mask[:self.slot_h, :self.slot_w] > 0
+            self._label_masks.append(mask)
+
+        # Header font scale: 1.2 at 1280px wide, shrunk for narrower canvases
+        self._header_scale = min(1.2, 1.2 * self.canvas_w / 1280)
+
+    @property
+    def shape(self):
+        return (self.canvas_h, self.canvas_w, 3)
+
+    def slot_view(self, canvas, i):
+        x = (i % self.cols) * self.slot_w
+        y = self.header_h + (i // self.cols) * self.slot_h
+        return canvas[y:y + self.slot_h, x:x + self.slot_w]
+
+    def compose(self, images: list, metadata: dict, out: np.ndarray = None) -> np.ndarray:
+        """
+        images: List of 4 images (BGR arrays). Some might be None.
+        metadata: {datetime, factory, milling, dump, lpr}
+        out: optional canvas (shape == self.shape) to reuse instead of allocating.
+        """
+        canvas = out if out is not None else np.empty(self.shape, dtype=np.uint8)
+
+        # 1. Header
+        if self.header_h:
+            canvas[:self.header_h] = self._header_bg
+            # Format: Datetime | FACTORY | MILLING PROCESS | DUMP | LPR
+            header_text = f"{metadata.get('datetime', '')} | {metadata.get('factory', '')} | {metadata.get('milling', '')} | {metadata.get('dump', '')} | {metadata.get('lpr', 'UNKNOWN')}"
+            cv2.putText(canvas, header_text, (20, int(self.header_h * 0.6)),
+                        cv2.FONT_HERSHEY_SIMPLEX, self._header_scale, (255, 255, 255), 2, cv2.LINE_AA)
+
+        # 2. Slots: resize straight into the canvas
+        for i in range(self.cols * self.rows):
+            view = self.slot_view(canvas, i)
+            img = images[i] if i < len(images) else None
+            if img is not None and img.ndim == 3:
+                res = cv2.resize(img, (self.slot_w, self.slot_h), dst=view)
+                if res is not view:
+                    view[...] = res
+            else:
+                view[...] = self._placeholder
+
+            if i < len(self._label_masks):
+                mask = self._label_masks[i]
+                view[:mask.shape[0], :mask.shape[1]][mask] = (0, 255, 0)
+
+        return canvas
+
+
+@lru_cache(maxsize=8)
+def get_compositor(layout="2x2", header=True, output_size=None) -> MergedImageCompositor:
+    """Shared compositor per layout (static parts are read-only, so thread-safe)."""
+    return MergedImageCompositor(layout=layout, header=header, output_size=output_size)
+
+
+def merge_production_images(images: list, metadata: dict, layout="2x2", header=True, output_size=None) -> np.ndarray:
     """
     images: List of 4 images (BGR arrays). Some might be None.
     metadata: {datetime, factory, milling, dump, lpr}
     """
-    # 1. Standardize size for the 4 slots
-    slot_w, slot_h = 640, 480
-    processed_imgs = []
-    
-    placeholder = np.zeros((slot_h, slot_w, 3), dtype=np.uint8)
-    cv2.putText(placeholder, "IMAGE MISSING (INCOMPLETE)", (50, 240), 
-               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (100, 100, 100), 2)
-
-    for i in range(4):
-        if i < len(images) and images[i] is not None:
-            processed_imgs.append(cv2.resize(images[i], (slot_w, slot_h)))
-        else:
-            processed_imgs.append(placeholder.copy())
-
-    # 2. Create Grid
-    row1 = np.hstack([processed_imgs[0], processed_imgs[1]])
-    row2 = np.hstack([processed_imgs[2], processed_imgs[3]])
-    grid = np.vstack([row1, row2])
-
-    # 3. Add Header
-    header_h = 100
-    canvas_w = slot_w * 2
-    canvas_h = (slot_h * 2) + header_h
-    
-    final_img = np.zeros((canvas_h, canvas_w, 3), dtype=np.uint8)
-    # Fill header with dark blue/grey
-    final_img[0:header_h, :] = (40, 40, 40)
-    
-    # 4. Header Text
-    # Format: Datetime | FACTORY | MILLING PROCESS | DUMP | LPR
-    header_text = f"{metadata.get('datetime', '')} | {metadata.get('factory', '')} | {metadata.get('milling', '')} | {metadata.get('dump', '')} | {metadata.get('lpr', 'UNKNOWN')}"
-    
-    cv2.putText(final_img, header_text, (20, 60), 
-               cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255, 255, 255), 2, cv2.LINE_AA)
-    
-    # Add labels to images
-    labels = ["IMAGE 1: LPR", "IMAGE 2: 100%", "IMAGE 3: 50%", "IMAGE 4: 25%"]
-    for i in range(4):
-        x = (i % 2) * slot_w + 10
-        y = header_h + (i // 2) * slot_h + 30
-        cv2.putText(final_img, labels[i], (x, y), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-
-    # Place grid onto canvas
-    final_img[header_h:, :] = grid
-    
-    return final_img
+    return get_compositor(layout, header, output_size).compose(images, metadata)
+
+
+def merge_from_paths(paths: list, metadata: dict, reduce=1, **kwargs) -> np.ndarray:
+    """
+    Regenerate a merged image from stored captures (e.g. dump_images rows).
+    reduce: 1/2/4/8 - decode JPEGs at reduced size when the output is small.
+    """
+    flag = _READ_FLAGS.get(reduce, cv2.IMREAD_COLOR)
+    images = [cv2.imread(p, flag) if p and os.path.exists(p) else None for p in paths]
+    return merge_production_images(images, metadata, **kwargs)
@@ -0,0 +1,77 @@
+import cv2
+import numpy as np
+from dataclasses import dataclass, asdict
+
+# Verdict labels stored in the upload manifest
+QUALITY_OK = "OK"
+QUALITY_CORRUPT = "CORRUPT"
+
+
+@dataclass(frozen=True)
+class QualityVerdict:
+    corrupted: bool
+    reason: str       # '', 'EMPTY', 'WHITE', 'PINK', 'GREEN', 'FLAT'
+    white: float = 0.0
+    pink: float = 0.0
+    green: float = 0.0
+    std: float = 0.0
+
+    @property
+    def label(self) -> str:
+        return QUALITY_CORRUPT if self.corrupted else QUALITY_OK
+
+    def to_dict(self):
+        return asdict(self)
+
+
+def _downscale(image, max_side):
+    h, w = image.shape[:2]
+    scale = max_side / max(h, w)
+    if scale >= 1.0: return image
+    # NEAREST is enough for area ratios and avoids filtering cost
+    return cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_NEAREST)
+
+
+def assess_image(image, threshold=0.05, flat_std=5.0, max_side=160) -> QualityVerdict:
+    """
+    Checks for decoder corruption (White/Pink/Green blocks, flat gray screen)
+    on a small downscaled view. All colour ratios come from one pass of two
+    per-pixel comparisons instead of separate full-size masks.
+    flat_std: min grayscale std-dev (None/0 disables the flat check).
+    """
+    if image is None or image.size == 0 or image.ndim != 3:
+        return QualityVerdict(True, "EMPTY")
+
+    small = _downscale(image, max_side)
+    hi = small > 200
+    lo = small < 100
+    n = small.shape[0] * small.shape[1]
+
+    # BGR channel order
+    white = np.count_nonzero((small > 225).all(axis=-1)) / n
+    pink = np.count_nonzero(hi[..., 2] & hi[..., 0] & lo[..., 1]) / n
+    green = np.count_nonzero(hi[..., 1] & lo[..., 2] & lo[..., 0]) / n
+
+    std = 0.0
+    if flat_std:
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        std = float(cv2.meanStdDev(gray)[1][0][0])
+
+    reason = ""
+    if white > threshold: reason = "WHITE"
+    elif pink > threshold: reason = "PINK"
+    elif green > threshold: reason = "GREEN"
+    elif flat_std and std < flat_std: reason = "FLAT"
+
+    return QualityVerdict(bool(reason), reason, white, pink, green, std)
+
+
+def assess_jpeg(path, threshold=0.05, flat_std=5.0) -> QualityVerdict:
+    """Assess a JPEG on disk using the 1/8 DCT-domain reduced decode (no full decode)."""
+    img = cv2.imread(path, cv2.IMREAD_REDUCED_COLOR_8)
+    return assess_image(img, threshold=threshold, flat_std=flat_std)
+
+
+def is_corrupted(image, threshold=0.05):
+    """Checks for image corruption (White/Pink/Green blocks)."""
+    return assess_image(image, threshold=threshold, flat_std=None).corrupted